@@ -9,14 +9,456 @@ import sys
 import subprocess
 import time
 import argparse
+import atexit
 import json
+import re
+import shlex
+import shutil
+import signal
+import socket
+import struct
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
+from blobstore import BLOB_CODECS, BLOB_INLINE_LIMIT, OUTPUT_FIELDS, BlobStore, load_log
+from checkpoint import CHECKPOINT_MAX_AGE_HOURS, Checkpoint
+from eventlog import STREAMED_FIELDS, EventLog, compact_event_log, dump_json, event_log_path
+from imei import valid_imei
+from manifest import JobManifest, ManifestError, sign_manifest
+from metrics import Metrics, MetricsServer, command_kind, latency_summary
+from profiles import DeviceProfiles, profile_key
+from storage_verify import AdbBlockSource, LocalBlockSource, verify_storage
+from timeouts import DEFAULT_COMMAND_TIMEOUT, TimeoutPolicy, timeout_key
+
+# Device properties reported in device_info, keyed by log field name
+DEVICE_PROPERTIES = {
+    "model": "ro.product.model",
+    "manufacturer": "ro.product.manufacturer",
+    "android_version": "ro.build.version.release",
+    "serial": "ro.serialno",
+    "product_name": "ro.product.name",
+    "build_id": "ro.build.id",
+    "build_version": "ro.build.version.incremental",
+    "hardware": "ro.hardware",
+    "platform": "ro.board.platform",
+}
+
+# Extra properties recorded for audit purposes
+AUDIT_PROPERTIES = {
+    "security_patch": "ro.build.version.security_patch",
+    "bootloader_version": "ro.bootloader",
+    "encryption_state": "ro.crypto.state",
+    "encryption_type": "ro.crypto.type",
+    "verified_boot_state": "ro.boot.verifiedbootstate",
+    "build_fingerprint": "ro.build.fingerprint",
+}
+
+# Bootloader (un)lock variants tried in order: (name, fastboot args, stdin)
+UNLOCK_METHODS = [
+    ("flashing_unlock_confirm", ("flashing", "unlock"), "\ny\n"),
+    ("oem_unlock", ("oem", "unlock"), None),
+    ("flashing_unlock_yes", ("flashing", "unlock"), "y\n"),
+]
+
+LOCK_METHODS = [
+    ("flashing_lock", ("flashing", "lock"), None),
+    ("flashing_lock_yes", ("flashing", "lock"), "y\n"),
+    ("oem_lock", ("oem", "lock"), None),
+]
+
+# Wipe order used when the bootloader does not report its partition layout
+DEFAULT_WIPE_PLAN = [
+    ("userdata", "erase"),
+    ("userdata", "format"),
+    ("cache", "erase"),
+    ("cache", "format"),
+    ("system", "erase"),
+    ("boot", "erase"),
+    ("recovery", "erase"),
+    ("persist", "erase"),
+    ("metadata", "erase"),
+]
+
+# Partitions targeted by the planner and whether they get a fresh filesystem afterwards
+WIPE_TARGETS = [
+    ("userdata", True),
+    ("cache", True),
+    ("system", False),
+    ("boot", False),
+    ("recovery", False),
+    ("persist", False),
+    ("metadata", False),
+]
+
+# Filesystems 'fastboot format' knows how to create
+FORMATTABLE_TYPES = ("ext4", "f2fs")
+
+PROPERTY_DUMP_SEPARATOR = "__ZEROTRACE_PROPS_END__"
+GETPROP_LINE = re.compile(r"^\[(?P<key>[^\]]+)\]: \[(?P<value>.*)\]$")
+
+# Vendor properties that expose the IMEI when the telephony service call is not permitted
+IMEI_PROPERTIES = ("ro.ril.oem.imei", "persist.radio.imei", "ro.gsm.imei", "persist.sys.imei")
+# 'service call iphonesubinfo 1' is getDeviceId(); shell may read it on Android 9 and older
+IMEI_SERVICE_CALL = "service call iphonesubinfo 1"
+PARCEL_WORD = re.compile(r"(?<![0-9a-fx])[0-9a-f]{8}(?![0-9a-f])")
+
+
+def parse_getprop(output):
+    """Parse 'getprop' output ('[key]: [value]' per line) into a dict"""
+    props = {}
+    for line in output.splitlines():
+        match = GETPROP_LINE.match(line.strip())
+        if match:
+            props[match.group("key")] = match.group("value").strip()
+    return props
+
+
+def parse_df_size(output):
+    """Return the total size in bytes from 'df -k' output, or None"""
+    lines = [line for line in output.strip().splitlines() if line.strip()]
+    if len(lines) < 2:
+        return None
+    # The size column is the first numeric field; toybox and busybox differ in layout
+    for field in lines[-1].split()[1:]:
+        if field.isdigit():
+            return int(field) * 1024
+    return None
+
+
+def parse_parcel_string(output):
+    """Decode the String16 in a 'service call' Parcel dump, or None on an error status"""
+    words = PARCEL_WORD.findall(output)
+    if len(words) < 2 or int(words[0], 16) != 0:
+        return None
+    length = int(words[1], 16)
+    chars = []
+    # UTF-16 code units, two per little-endian 32-bit word
+    for word in words[2:]:
+        chars.extend((int(word[4:], 16), int(word[:4], 16)))
+    if length > len(chars):
+        return None
+    return "".join(chr(code) for code in chars[:length])
+
+
+_binary_cache = {}
+_binary_cache_lock = threading.Lock()
+
+
+def resolve_binary(name):
+    """Locate an executable on PATH once per process and cache the result"""
+    with _binary_cache_lock:
+        if name not in _binary_cache:
+            _binary_cache[name] = shutil.which(name)
+        return _binary_cache[name]
+
+
+def parse_getvar_all(output):
+    """Parse 'fastboot getvar all' into slot info and a per-partition table"""
+    partitions = {}
+    variables = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("(bootloader)"):
+            line = line[len("(bootloader)"):].strip()
+        if ":" not in line or line.startswith("all:") or line.startswith("Finished"):
+            continue
+        
+        fields = [field.strip() for field in line.split(":")]
+        name = fields[0]
+        if name in ("partition-type", "partition-size", "is-logical") and len(fields) >= 3:
+            entry = partitions.setdefault(fields[1], {})
+            value = fields[2]
+            if name == "partition-type":
+                entry["type"] = value
+            elif name == "partition-size":
+                try:
+                    entry["size_bytes"] = int(value, 16) if value.lower().startswith("0x") else int(value)
+                except ValueError:
+                    pass
+            else:
+                entry["logical"] = value == "yes"
+        elif name == "has-slot" and len(fields) >= 3:
+            variables.setdefault("has_slot", {})[fields[1]] = fields[2] == "yes"
+        elif len(fields) == 2:
+            variables[name] = fields[1]
+    
+    try:
+        slot_count = int(variables.get("slot-count", "0") or 0)
+    except ValueError:
+        slot_count = 0
+    return {
+        "slot_count": slot_count,
+        "current_slot": variables.get("current-slot"),
+        "has_slot": variables.get("has_slot", {}),
+        "partitions": partitions,
+    }
+
+
+def build_wipe_plan(layout):
+    """Build the minimal list of fastboot actions for the reported partition layout"""
+    partitions = layout["partitions"]
+    plan = []
+    for base, reformat in WIPE_TARGETS:
+        names = [name for name in (base, f"{base}_a", f"{base}_b") if name in partitions]
+        if not names:
+            plan.append({"partition": base, "action": "skip", "reason": "partition not present"})
+            continue
+        
+        for name in names:
+            info = partitions[name]
+            if info.get("logical"):
+                # Logical partitions live inside super and can only be erased from fastbootd
+                plan.append({"partition": name, "action": "skip", "reason": "logical partition inside super"})
+                continue
+            plan.append({"partition": name, "action": "erase", "size_bytes": info.get("size_bytes")})
+            if reformat and info.get("type") in FORMATTABLE_TYPES:
+                plan.append({"partition": name, "action": "format", "size_bytes": info.get("size_bytes")})
+    return plan
+
+
+class SubprocessTransport:
+    """Run adb/fastboot as argv lists, without an intermediate shell.
+    
+    Each child gets its own process group, so a timeout kills it together with
+    anything it spawned instead of leaving a hung helper holding the device.
+    """
+    
+    name = "subprocess"
+    
+    def __init__(self):
+        self.processes = set()
+        self.lock = threading.Lock()
+    
+    def run(self, argv, input=None, timeout=120):
+        process = subprocess.Popen(argv, stdin=subprocess.DEVNULL if input is None else subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   start_new_session=os.name == "posix")
+        with self.lock:
+            self.processes.add(process)
+        try:
+            stdout, stderr = process.communicate(input, timeout=timeout)
+        except BaseException:
+            # Timeouts and Ctrl+C alike: a new session no longer gets the terminal's SIGINT
+            self.kill(process)
+            raise
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+        return subprocess.CompletedProcess(argv, process.returncode, stdout, stderr)
+    
+    @staticmethod
+    def kill(process):
+        """Kill the child's whole process group and reap it"""
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            # A grandchild that left the group may still hold the pipes open; do not wait on it forever
+            process.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+    
+    def kill_all(self):
+        """Kill every command still running, e.g. when the operator aborts a fleet run"""
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            self.kill(process)
+
+
+class AdbServerError(Exception):
+    pass
+
+
+class AdbServerTransport:
+    """Talk to the adb server over its socket protocol instead of forking the adb client.
+    
+    Only the services the wiper needs are spoken natively (devices, get-state,
+    shell, reboot); anything else, including every fastboot call, falls back
+    to the subprocess transport. The adb server dedicates a socket to each
+    service request, so one connection is opened per command.
+    """
+    
+    name = "adb-server"
+    
+    def __init__(self, host="127.0.0.1", port=5037, fallback=None):
+        self.host = host
+        self.port = port
+        self.fallback = fallback or SubprocessTransport()
+    
+    def kill_all(self):
+        # Native services die with their socket; only fallback children need killing
+        self.fallback.kill_all()
+    
+    def run(self, argv, input=None, timeout=120):
+        serial, args = self.split_adb_argv(argv)
+        if args is None or input is not None:
+            return self.fallback.run(argv, input=input, timeout=timeout)
+        
+        try:
+            if args == ["devices"]:
+                devices = self.query("host:devices", timeout=timeout)
+                return self.completed(argv, 0, "List of devices attached\n" + devices)
+            if args == ["get-state"]:
+                service = f"host-serial:{serial}:get-state" if serial else "host:get-state"
+                return self.completed(argv, 0, self.query(service, timeout=timeout) + "\n")
+            if args[0] == "shell" and len(args) > 1:
+                return self.shell(argv, serial, " ".join(args[1:]), timeout)
+            if args[0] == "reboot":
+                target = args[1] if len(args) > 1 else ""
+                with self.open_transport(serial, timeout) as sock:
+                    self.send_request(sock, f"reboot:{target}")
+                return self.completed(argv, 0, "")
+        except AdbServerError as e:
+            return self.completed(argv, 1, "", f"error: {e}")
+        except socket.timeout:
+            raise subprocess.TimeoutExpired(argv, timeout)
+        return self.fallback.run(argv, input=input, timeout=timeout)
+    
+    @staticmethod
+    def split_adb_argv(argv):
+        """Return (serial, args) for an adb argv, or (None, None) for anything else"""
+        if not argv or os.path.basename(argv[0]) not in ("adb", "adb.exe"):
+            return None, None
+        args = list(argv[1:])
+        serial = None
+        if args[:1] == ["-s"] and len(args) >= 2:
+            serial = args[1]
+            args = args[2:]
+        if not args or args[0].startswith("-"):
+            return None, None
+        return serial, args
+    
+    @staticmethod
+    def completed(argv, returncode, stdout, stderr=""):
+        return subprocess.CompletedProcess(argv, returncode, stdout, stderr)
+    
+    def connect(self, timeout):
+        sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        sock.settimeout(timeout)
+        return sock
+    
+    def send_request(self, sock, request):
+        payload = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+        status = self.read_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbServerError(self.read_message(sock))
+        raise AdbServerError(f"unexpected adb server reply {status!r}")
+    
+    def read_message(self, sock):
+        length = int(self.read_exact(sock, 4), 16)
+        return self.read_exact(sock, length).decode("utf-8", "replace")
+    
+    @staticmethod
+    def read_exact(sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise AdbServerError("connection closed by adb server")
+            data += chunk
+        return data
+    
+    def query(self, service, timeout=30):
+        """Run a host: service that answers with a single length-prefixed message"""
+        with self.connect(timeout) as sock:
+            self.send_request(sock, service)
+            return self.read_message(sock)
+    
+    def open_transport(self, serial, timeout):
+        sock = self.connect(timeout)
+        try:
+            self.send_request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+        except Exception:
+            sock.close()
+            raise
+        return sock
+    
+    def shell(self, argv, serial, command, timeout):
+        """Run a command with the shell v2 protocol, which carries stderr and the exit code"""
+        stdout, stderr, returncode = [], [], 0
+        with self.open_transport(serial, timeout) as sock:
+            self.send_request(sock, f"shell,v2,raw:{command}")
+            while True:
+                try:
+                    header = self.read_exact(sock, 5)
+                except AdbServerError:
+                    break
+                packet_id, length = struct.unpack("<BI", header)
+                data = self.read_exact(sock, length)
+                if packet_id == 1:
+                    stdout.append(data)
+                elif packet_id == 2:
+                    stderr.append(data)
+                elif packet_id == 3:
+                    returncode = data[0] if data else 0
+                    break
+        return self.completed(argv, returncode,
+                              b"".join(stdout).decode("utf-8", "replace"),
+                              b"".join(stderr).decode("utf-8", "replace"))
+
+
+def listed_serials(output):
+    """Serials from 'adb devices' or 'fastboot devices' output"""
+    serials = []
+    for line in output.strip().split('\n'):
+        parts = line.split()
+        if len(parts) >= 2 and not line.startswith("List of devices"):
+            serials.append(parts[0])
+    return serials
+
+
+def create_transport(kind, adb_server="127.0.0.1:5037"):
+    """Build the transport selected on the command line"""
+    if kind == "adb-server":
+        host, _, port = adb_server.rpartition(":")
+        return AdbServerTransport(host or "127.0.0.1", int(port))
+    return SubprocessTransport()
+
+
 class AndroidDataWiper:
-    def __init__(self, verbose=False, log_file="wipe_log.json"):
+    def __init__(self, verbose=False, log_file="wipe_log.json", serial=None,
+                 adb_path=None, fastboot_path=None, state_timeout=120, countdown=10,
+                 transport=None, buffer_size=200, checkpoint_dir="wipe_checkpoints", resume=True,
+                 verify_source=None, verify_confidence=0.99, verify_max_unwiped=0.001,
+                 verify_block_size=4096, imei=None, metrics=None, profiles=None, timeouts=None,
+                 blobs=None, manifest=None, operator=None, checkpoint_max_age=CHECKPOINT_MAX_AGE_HOURS):
         self.verbose = verbose
         self.log_file = log_file
+        self.serial = serial
+        self.state_timeout = state_timeout
+        self.countdown = countdown
+        self.transport = transport or SubprocessTransport()
+        self.checkpoint_dir = checkpoint_dir
+        self.resume_enabled = resume
+        self.checkpoint_max_age = checkpoint_max_age
+        self.checkpoint = None
+        self.verify_source = verify_source
+        self.verify_confidence = verify_confidence
+        self.verify_max_unwiped = verify_max_unwiped
+        self.verify_block_size = verify_block_size
+        self.imei = imei
+        # Shared with the rest of the fleet; per-device figures are also kept for the summary
+        self.metrics = metrics or Metrics()
+        self.command_seconds = {}
+        self.profiles = profiles
+        self.profile_learned = False
+        self.timeouts = timeouts or TimeoutPolicy(profiles)
+        self.timed_out = {"commands": 0, "seconds": 0.0}
+        self.blobs = blobs
+        # With a signed job manifest, devices it lists are wiped without prompting
+        self.manifest = manifest
+        self.operator = operator
         self.log_data = {
             "tool": "Android Data Wiping Tool (Fastboot Method)",
             "timestamp": datetime.now().isoformat(),
@@ -28,16 +470,42 @@ class AndroidDataWiper:
             "device_info": {},
             "settings": {
                 "verbose": verbose,
-                "log_file": log_file
+                "log_file": log_file,
+                "serial": serial,
+                "state_timeout": state_timeout,
+                "countdown": countdown,
+                "transport": self.transport.name,
+                "checkpoint_dir": checkpoint_dir,
+                "verify_target": verify_source.name if verify_source else None,
+                "verify_confidence": verify_confidence,
+                "verify_max_unwiped": verify_max_unwiped,
+                "profiles": profiles.path if profiles else None,
+                "adaptive_timeouts": self.timeouts.adaptive,
+                "blob_dir": blobs.root if blobs else None,
+                "manifest": manifest.path if manifest else None,
+                "operator": operator
             },
-            "steps": [],
-            "commands_executed": [],
+            # Recent entries only; the complete history is streamed to the event log
+            "steps": deque(maxlen=buffer_size),
+            "commands_executed": deque(maxlen=buffer_size),
+            "stage_durations": {},
             "result": "not_started",
             "errors": [],
             "warnings": []
         }
-        self.adb_path = self.find_adb()
-        self.fastboot_path = self.find_fastboot()
+        self.counters = {"total_steps": 0, "successful_steps": 0, "commands_executed": 0}
+        self.events = None
+        self.event_log_bytes = 0
+        # JSON of each field as last written to the event log, so snapshots only carry changes
+        self.snapshotted = {}
+        self.compacted = False
+        if log_file != os.devnull:
+            self.events = EventLog(event_log_path(log_file, datetime.now().strftime("%Y%m%dT%H%M%S%f")))
+            self.log_data["settings"]["event_log"] = self.events.path
+            self.snapshot()
+        # Fleet runs resolve the binaries once and hand them to every wiper
+        self.adb_path = adb_path or self.find_adb()
+        self.fastboot_path = fastboot_path or self.find_fastboot()
     
     def log_step(self, step, status, details=None):
         """Log a step in the process"""
@@ -48,18 +516,78 @@ class AndroidDataWiper:
             "details": details
         }
         self.log_data["steps"].append(step_data)
+        self.counters["total_steps"] += 1
+        if status == "success":
+            self.counters["successful_steps"] += 1
         
+        if self.events:
+            # Pipeline steps are durable boundaries; per-command chatter is only buffered
+            boundary = step != "command"
+            self.events.append("step", step_data)
+            if boundary:
+                self.snapshot(sync=True)
+        
+        prefix = f"<{self.serial}> " if self.serial else ""
         if self.verbose:
-            print(f"[{step}] {status}: {details}")
+            print(f"{prefix}[{step}] {status}: {details}")
         else:
-            print(f"{step}: {status}")
+            print(f"{prefix}{step}: {status}")
+    
+    def snapshot(self, sync=False):
+        """Record the non-streamed log fields that changed since the last snapshot in the event log"""
+        changed = {}
+        for key, value in self.log_data.items():
+            value = None if key in STREAMED_FIELDS else value
+            encoded = dump_json(value)
+            if self.snapshotted.get(key) != encoded:
+                self.snapshotted[key] = encoded
+                changed[key] = value
+        if changed:
+            self.events.append("state", changed, sync=sync)
+        elif sync:
+            self.events.sync()
+    
+    def close_events(self):
+        """Remove the event log once the report it rebuilt is final"""
+        self.events.close()
+        self.event_log_bytes = self.events.bytes_written
+        os.remove(self.events.path)
+        self.events = None
+        self.compacted = True
+        # Everything so far is in the report; the buffers only collect what comes after it
+        self.log_data["steps"].clear()
+        self.log_data["commands_executed"].clear()
     
     def save_log(self):
         """Save the log data to JSON file"""
+        started = time.monotonic()
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.log_data, f, indent=2, ensure_ascii=False)
+            if self.events:
+                finished = self.log_data["result"] not in ("not_started", "in_progress")
+                if finished:
+                    self.log_data["settings"]["event_log"] = None
+                self.snapshot(sync=True)
+                compact_event_log(self.events.path, self.log_file)
+                if finished:
+                    self.close_events()
+            elif self.compacted:
+                # Saved again after the event log was removed: extend the finished report
+                with open(self.log_file, encoding="utf-8") as f:
+                    report = json.load(f)
+                for key, value in self.log_data.items():
+                    report[key] = report[key] + list(value) if key in STREAMED_FIELDS else value
+                with open(self.log_file, 'w') as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+                self.log_data["steps"].clear()
+                self.log_data["commands_executed"].clear()
+            else:
+                with open(self.log_file, 'w') as f:
+                    json.dump({key: list(value) if key in STREAMED_FIELDS else value
+                               for key, value in self.log_data.items()},
+                              f, indent=2, ensure_ascii=False)
+            self.metrics.observe("log_write_seconds", time.monotonic() - started, model=self.device_model())
             self.log_step("save_log", "success", f"Log saved to {self.log_file}")
+            self.learn_profile()
             return True
         except Exception as e:
             error_msg = f"Failed to save log: {e}"
@@ -67,39 +595,93 @@ class AndroidDataWiper:
             self.log_data["errors"].append(error_msg)
             return False
     
-    def run_command(self, command, check=True, timeout=120):
-        """Run a system command and return the result"""
+    def learn_profile(self):
+        """Teach the profile registry what this finished run found out about its model"""
+        if self.profiles and not self.profile_learned and self.log_data["result"] in ("success", "failed"):
+            self.profile_learned = bool(self.profiles.learn(self.log_data))
+            if self.profile_learned and os.path.exists(self.log_file):
+                self.profiles.mark_ingested(self.log_file)
+                self.profiles.save()
+    
+    def apply_profile(self):
+        """Log which learned profile, if any, this device's wipe will use"""
+        if not self.profiles:
+            return None
+        info = self.log_data["device_info"]
+        profile = self.profiles.lookup(info)
+        key = profile_key(info)
+        if profile:
+            self.log_data["profile"] = {"key": key, "wipes": profile["wipes"],
+                                        "successful_wipes": profile["successful_wipes"]}
+            self.log_step("profile", "success", f"Using profile {key} learned from {profile['wipes']} wipes")
+        else:
+            self.log_step("profile", "skipped", f"No profile learned yet for {key or 'unknown model'}")
+        return profile
+    
+    def methods(self, methods, field):
+        """Bootloader (un)lock variants, with the ones known to work on this model first"""
+        if not self.profiles:
+            return methods
+        return self.profiles.method_order(methods, self.log_data["device_info"], field)
+    
+    def learned_timeout(self, stage):
+        """Wait for stage tuned to this model's history, or None for --state-timeout"""
+        if not self.profiles:
+            return None
+        return self.profiles.stage_timeout(self.log_data["device_info"], stage, self.state_timeout)
+    
+    def adb(self, *args):
+        """Build an adb argv targeting this wiper's device"""
+        if self.serial:
+            return [self.adb_path, "-s", self.serial, *args]
+        return [self.adb_path, *args]
+    
+    def fastboot(self, *args):
+        """Build a fastboot argv targeting this wiper's device"""
+        if self.serial:
+            return [self.fastboot_path, "-s", self.serial, *args]
+        return [self.fastboot_path, *args]
+    
+    def run_command(self, argv, check=True, timeout=None, input=None):
+        """Run an adb/fastboot argv through the transport and return the result"""
+        command = shlex.join(argv)
+        if input is not None:
+            command += f" <<< {input!r}"
         self.log_step("command", "started", command)
         
+        # Without an explicit timeout the policy picks one from this command's history on this model
+        key = timeout_key(argv)
+        source = "explicit"
+        if timeout is None:
+            timeout, source = self.timeouts.deadline(key, self.log_data["device_info"])
+        
         # Add to commands executed list
         cmd_data = {
             "command": command,
+            "timeout_key": key,
             "timestamp": datetime.now().isoformat(),
-            "timeout": timeout
+            "timeout": timeout,
+            "timeout_source": source
         }
         self.log_data["commands_executed"].append(cmd_data)
+        self.counters["commands_executed"] += 1
+        started = time.monotonic()
         
         try:
-            result = subprocess.run(
-                command, 
-                shell=True,
-                capture_output=True, 
-                text=True, 
-                timeout=timeout
-            )
+            result = self.transport.run(argv, input=input, timeout=timeout)
             
+            # Long output goes to the blob store once; the step and the command entry both reference it
+            outputs = self.store_outputs(result)
             log_details = {
                 "command": command,
                 "returncode": result.returncode,
-                "stdout": result.stdout.strip(),
-                "stderr": result.stderr.strip()
+                **outputs
             }
             
             # Update command data with results
             cmd_data.update({
                 "returncode": result.returncode,
-                "stdout": result.stdout.strip(),
-                "stderr": result.stderr.strip(),
+                **outputs,
                 "completed": True
             })
             
@@ -128,19 +710,125 @@ class AndroidDataWiper:
             })
             self.log_data["errors"].append(error_msg)
             return None
+        finally:
+            self.record_command(argv, cmd_data, time.monotonic() - started)
+            if self.events:
+                self.events.append("command", cmd_data)
+    
+    def store_outputs(self, result):
+        """stdout/stderr inline, or as stdout_blob/stderr_blob references when long enough"""
+        outputs = {}
+        for name in OUTPUT_FIELDS:
+            text = getattr(result, name).strip()
+            if self.blobs and len(text) > BLOB_INLINE_LIMIT:
+                outputs[f"{name}_blob"] = self.blobs.put(text)
+            else:
+                outputs[name] = text
+        return outputs
+    
+    def device_model(self):
+        return self.log_data["device_info"].get("model") or "unknown"
+    
+    def record_command(self, argv, cmd_data, seconds):
+        """Add a command's duration to its log entry and the latency metrics"""
+        kind = command_kind(argv)
+        cmd_data["duration_seconds"] = round(seconds, 4)
+        if cmd_data.get("error"):
+            outcome = cmd_data["error"] if cmd_data["error"] == "timeout" else "error"
+        else:
+            outcome = "success" if cmd_data.get("returncode") == 0 else "failed"
+        self.command_seconds.setdefault(kind, []).append(seconds)
+        self.timeouts.observe(cmd_data["timeout_key"], self.log_data["device_info"], seconds,
+                              timed_out=outcome == "timeout", source=cmd_data["timeout_source"])
+        if outcome == "timeout":
+            self.timed_out["commands"] += 1
+            self.timed_out["seconds"] += seconds
+        self.metrics.observe("command_duration_seconds", seconds, command=kind, model=self.device_model())
+        self.metrics.increment("commands_total", command=kind, outcome=outcome)
+    
+    def timed_stage(self, stage, handler):
+        """Run one pipeline stage, recording its duration"""
+        started = time.monotonic()
+        try:
+            return handler()
+        finally:
+            seconds = time.monotonic() - started
+            durations = self.log_data["stage_durations"]
+            durations[stage] = round(durations.get(stage, 0.0) + seconds, 4)
+            self.metrics.observe("stage_duration_seconds", seconds, stage=stage, model=self.device_model())
+    
+    def probe(self, argv, timeout=10):
+        """Run a quick status query without recording it as a step"""
+        try:
+            return self.transport.run(argv, timeout=timeout)
+        except (subprocess.TimeoutExpired, OSError):
+            return None
+    
+    def current_state(self):
+        """Return the device's current mode: bootloader, device, recovery, sideload or None"""
+        result = self.probe([self.fastboot_path, "devices"])
+        if result:
+            for line in result.stdout.splitlines():
+                parts = line.split()
+                if len(parts) >= 2 and parts[1] == "fastboot" and (not self.serial or parts[0] == self.serial):
+                    return "bootloader"
+        
+        result = self.probe(self.adb("get-state"))
+        if result and result.returncode == 0:
+            state = result.stdout.strip()
+            if state in ("device", "recovery", "sideload", "bootloader"):
+                return state
+        return None
+    
+    def wait_for(self, condition, description, timeout=None):
+        """Poll condition() with backoff until it holds or the deadline passes"""
+        timeout = self.state_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        delay = 0.25
+        
+        while True:
+            if condition():
+                elapsed = time.monotonic() - start
+                self.log_step("wait", "success", f"{description} after {elapsed:.1f}s")
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, 2.0)
+        
+        error_msg = f"Timed out after {timeout}s waiting for: {description}"
+        self.log_step("wait", "timeout", error_msg)
+        self.log_data["warnings"].append(error_msg)
+        return False
+    
+    def wait_for_state(self, *states, timeout=None):
+        """Wait until the device reports one of the given states (None means disconnected)"""
+        names = ", ".join(state or "disconnected" for state in states)
+        return self.wait_for(lambda: self.current_state() in states, f"device state {names}", timeout)
+    
+    def bootloader_unlocked(self):
+        """Return True/False from 'fastboot getvar unlocked', or None if it can't be read"""
+        result = self.probe(self.fastboot("getvar", "unlocked"))
+        if not result:
+            return None
+        # fastboot prints getvar results on stderr
+        output = result.stdout + result.stderr
+        if "unlocked: yes" in output:
+            return True
+        if "unlocked: no" in output:
+            return False
+        return None
     
     def find_adb(self):
         """Locate ADB executable"""
         self.log_step("find_adb", "started", "Looking for ADB executable")
         
-        try:
-            result = subprocess.run(["which", "adb"], capture_output=True, text=True)
-            if result.returncode == 0:
-                adb_path = result.stdout.strip()
-                self.log_step("find_adb", "success", f"Found ADB at {adb_path}")
-                return adb_path
-        except Exception as e:
-            self.log_step("find_adb", "error", f"Error finding ADB: {e}")
+        adb_path = resolve_binary("adb")
+        if adb_path:
+            self.log_step("find_adb", "success", f"Found ADB at {adb_path}")
+            return adb_path
             
         error_msg = "ADB not found. Please install: sudo apt install adb fastboot"
         self.log_step("find_adb", "failed", error_msg)
@@ -152,14 +840,10 @@ class AndroidDataWiper:
         """Locate Fastboot executable"""
         self.log_step("find_fastboot", "started", "Looking for Fastboot executable")
         
-        try:
-            result = subprocess.run(["which", "fastboot"], capture_output=True, text=True)
-            if result.returncode == 0:
-                fastboot_path = result.stdout.strip()
-                self.log_step("find_fastboot", "success", f"Found Fastboot at {fastboot_path}")
-                return fastboot_path
-        except Exception as e:
-            self.log_step("find_fastboot", "error", f"Error finding Fastboot: {e}")
+        fastboot_path = resolve_binary("fastboot")
+        if fastboot_path:
+            self.log_step("find_fastboot", "success", f"Found Fastboot at {fastboot_path}")
+            return fastboot_path
             
         error_msg = "Fastboot not found. Please install: sudo apt install adb fastboot"
         self.log_step("find_fastboot", "failed", error_msg)
@@ -171,7 +855,7 @@ class AndroidDataWiper:
         """Verify that a device is connected and authorized"""
         self.log_step("check_connection", "started", "Checking device connection")
         
-        result = self.run_command(f"{self.adb_path} devices", check=False)
+        result = self.run_command([self.adb_path, "devices"], check=False)
         if not result:
             self.log_step("check_connection", "failed", "ADB devices command failed")
             return False
@@ -192,6 +876,8 @@ class AndroidDataWiper:
                 if len(parts) >= 2:
                     device_id = parts[0]
                     status = parts[1]
+                    if self.serial and device_id != self.serial:
+                        continue
                     devices.append({"id": device_id, "status": status})
                     
                     if status == "unauthorized":
@@ -214,36 +900,60 @@ class AndroidDataWiper:
         return False
     
     def get_device_info(self):
-        """Get information about the connected device"""
+        """Get information about the connected device in a single adb round-trip"""
         self.log_step("get_device_info", "started", "Collecting device information")
         
-        info = {}
-        commands = {
-            "model": "getprop ro.product.model",
-            "manufacturer": "getprop ro.product.manufacturer",
-            "android_version": "getprop ro.build.version.release",
-            "serial": "getprop ro.serialno",
-            "product_name": "getprop ro.product.name",
-            "build_id": "getprop ro.build.id",
-            "build_version": "getprop ro.build.version.incremental",
-            "hardware": "getprop ro.hardware",
-            "platform": "getprop ro.board.platform",
-        }
+        # One shell invocation dumps every property plus the data partition size,
+        # instead of spawning adb once per property
+        result = self.run_command(
+            self.adb("shell", f"getprop; echo {PROPERTY_DUMP_SEPARATOR}; df -k /data 2>/dev/null; "
+                              f"echo {PROPERTY_DUMP_SEPARATOR}; {IMEI_SERVICE_CALL} 2>/dev/null"),
+            check=False
+        )
+        output = result.stdout if result else ""
+        getprop_output, _, rest = output.partition(PROPERTY_DUMP_SEPARATOR)
+        df_output, _, imei_output = rest.partition(PROPERTY_DUMP_SEPARATOR)
+        props = parse_getprop(getprop_output)
         
-        for key, cmd in commands.items():
-            result = self.run_command(f"{self.adb_path} shell {cmd}", check=False)
-            if result and result.stdout.strip():
-                info[key] = result.stdout.strip()
+        info = {}
+        for key, prop in DEVICE_PROPERTIES.items():
+            if props.get(prop):
+                info[key] = props[prop]
             else:
                 info[key] = "unknown"
                 self.log_data["warnings"].append(f"Could not retrieve {key} from device")
         
+        # Audit profile: collected from the same dump, so missing values are not warnings
+        for key, prop in AUDIT_PROPERTIES.items():
+            info[key] = props.get(prop) or "unknown"
+        info["storage_bytes"] = parse_df_size(df_output)
+        
+        # Certificates are tracked by IMEI; an operator-supplied value wins over what the device reports
+        candidates = [self.imei, parse_parcel_string(imei_output)] + [props.get(prop) for prop in IMEI_PROPERTIES]
+        info["imei"] = next((value for value in candidates if valid_imei(value)), "unknown")
+        if info["imei"] == "unknown":
+            self.log_data["warnings"].append("Could not retrieve imei from device; pass --imei to record it")
+        
         self.log_data["device_info"].update(info)
         self.log_step("get_device_info", "completed", f"Collected info for {info.get('manufacturer', 'Unknown')} {info.get('model', 'Unknown')}")
         return info
     
+    def is_authorized(self):
+        """True once this run has a confirmation or manifest decision allowing the wipe"""
+        return (self.log_data.get("authorization") or {}).get("decision") in ("authorized", "confirmed")
+    
+    def authorize(self, device_info):
+        """Check the device against the job manifest and record the decision"""
+        decision = self.manifest.authorize(device_info, self.operator, self.serial)
+        self.log_data["authorization"] = decision
+        self.log_step("confirmation", decision["decision"], decision["reason"])
+        return decision["decision"] == "authorized"
+    
     def confirm_wipe(self, device_info):
-        """Ask for confirmation before wiping"""
+        """Ask for confirmation before wiping, or check the job manifest when there is one"""
+        if self.manifest:
+            return self.authorize(device_info)
+        
         self.log_step("confirmation", "started", "Requesting user confirmation")
         
         print("\n" + "="*60)
@@ -272,27 +982,33 @@ class AndroidDataWiper:
             print("Wipe cancelled.")
             return False
         
+        self.log_data["authorization"] = {"mode": "interactive", "decision": "confirmed",
+                                          "checked_at": datetime.now().astimezone().isoformat(),
+                                          "operator": self.operator}
         self.log_step("confirmation", "confirmed", "User confirmed wipe operation")
         return True
     
     def reboot_to_bootloader(self):
         """Reboot device to bootloader mode"""
         self.log_step("reboot_bootloader", "started", "Rebooting to bootloader mode")
-        result = self.run_command(f"{self.adb_path} reboot bootloader")
-        time.sleep(10)  # Wait for reboot
-        return result is not None
+        result = self.run_command(self.adb("reboot", "bootloader"))
+        if result is None:
+            return False
+        return self.wait_for_state("bootloader", timeout=self.learned_timeout("bootloader"))
     
     def check_fastboot_connection(self):
         """Check if device is connected in fastboot mode"""
         self.log_step("check_fastboot", "started", "Checking fastboot connection")
         
-        result = self.run_command(f"{self.fastboot_path} devices", check=False)
+        result = self.run_command([self.fastboot_path, "devices"], check=False)
         if not result:
             self.log_step("check_fastboot", "failed", "Fastboot devices command failed")
             return False
             
         lines = result.stdout.strip().split('\n')
-        if len(lines) < 1 or "fastboot" not in result.stdout:
+        if self.serial:
+            lines = [line for line in lines if line.split()[:1] == [self.serial]]
+        if len(lines) < 1 or not any("fastboot" in line for line in lines):
             error_msg = "No devices found in fastboot mode"
             self.log_step("check_fastboot", "failed", error_msg)
             self.log_data["errors"].append(error_msg)
@@ -315,58 +1031,94 @@ class AndroidDataWiper:
         self.log_step("unlock_bootloader", "started", "Unlocking bootloader")
         
         # First check if already unlocked
-        result = self.run_command(f"{self.fastboot_path} getvar unlocked", check=False)
-        if result and "yes" in result.stdout:
+        result = self.run_command(self.fastboot("getvar", "unlocked"), check=False)
+        if result and "unlocked: yes" in result.stdout + result.stderr:
             self.log_step("unlock_bootloader", "skipped", "Bootloader already unlocked")
             self.log_data["device_info"]["bootloader_status"] = "already_unlocked"
             return True
         
         # Try to unlock using different methods
-        unlock_methods = [
-            f"echo -e '\ny\n' | {self.fastboot_path} flashing unlock",
-            f"{self.fastboot_path} oem unlock",
-            f"echo y | {self.fastboot_path} flashing unlock"
-        ]
-        
-        for method in unlock_methods:
-            result = self.run_command(method, check=False)
+        for method, args, stdin in self.methods(UNLOCK_METHODS, "unlock_methods"):
+            result = self.run_command(self.fastboot(*args), check=False, input=stdin)
             if result and result.returncode == 0:
                 self.log_step("unlock_bootloader", "success", "Bootloader unlock command sent")
                 self.log_data["device_info"]["bootloader_status"] = "unlocked"
                 self.log_data["device_info"]["unlock_method"] = method
                 print("Please confirm unlock on your device using volume and power buttons")
-                time.sleep(10)
+                # Returns as soon as the device reports unlocked instead of sleeping blindly
+                if not self.wait_for(lambda: self.bootloader_unlocked() is True, "bootloader unlocked"):
+                    print("Device did not report an unlocked bootloader yet, continuing anyway.")
                 return True
         
         self.log_step("unlock_bootloader", "failed", "Could not unlock bootloader")
         self.log_data["errors"].append("Failed to unlock bootloader")
         return False
     
+    def probe_partitions(self):
+        """Read the partition layout once with 'fastboot getvar all'"""
+        self.log_step("probe_partitions", "started", "Reading partition layout")
+        result = self.run_command(self.fastboot("getvar", "all"), check=False)
+        # getvar output goes to stderr on most fastboot builds
+        layout = parse_getvar_all(result.stdout + result.stderr) if result else None
+        
+        if not layout or not layout["partitions"]:
+            self.log_step("probe_partitions", "failed", "No partition layout reported, using default plan")
+            self.log_data["warnings"].append("Could not read partition layout, using default wipe plan")
+            return None
+        
+        self.log_data["partition_layout"] = layout
+        self.log_step("probe_partitions", "success",
+                      f"{len(layout['partitions'])} partitions, slot-count {layout['slot_count']}")
+        return layout
+    
     def wipe_partitions(self):
         """Wipe all partitions using fastboot"""
         self.log_step("wipe_partitions", "started", "Wiping partitions")
         
-        partitions = [
-            ("userdata", "erase"),
-            ("userdata", "format"),
-            ("cache", "erase"),
-            ("cache", "format"),
-            ("system", "erase"),
-            ("boot", "erase"),
-            ("recovery", "erase"),
-            ("persist", "erase"),
-            ("metadata", "erase"),
-        ]
+        # A resumed run keeps the plan it started with instead of probing again
+        plan = self.checkpoint.data["wipe_plan"] if self.checkpoint else None
+        if not plan and self.profiles:
+            plan = self.profiles.wipe_plan(self.log_data["device_info"])
+            if plan:
+                self.log_step("probe_partitions", "skipped", "Using the wipe plan learned for this model")
+                self.log_data["wipe_plan_source"] = "profile"
+                if self.checkpoint:
+                    self.checkpoint.save(wipe_plan=plan)
+        if not plan:
+            layout = self.probe_partitions()
+            plan = build_wipe_plan(layout) if layout else [
+                {"partition": partition, "action": action} for partition, action in DEFAULT_WIPE_PLAN
+            ]
+            if self.checkpoint:
+                self.checkpoint.save(wipe_plan=plan)
+        self.log_data["wipe_plan"] = plan
         
         wipe_results = []
         
-        for partition, action in partitions:
-            if action == "erase":
-                cmd = f"{self.fastboot_path} erase {partition}"
-            else:
-                cmd = f"{self.fastboot_path} format {partition}"
+        for entry in plan:
+            partition, action = entry["partition"], entry["action"]
+            if self.checkpoint and self.checkpoint.wiped(partition, action):
+                self.log_step(f"wipe_{partition}", "skipped", f"Already {action}ed before resume")
+                wipe_results.append(next(
+                    result for result in self.checkpoint.data["wipe_results"]
+                    if result["partition"] == partition and result["action"] == action
+                ))
+                continue
+            if action == "skip":
+                self.log_step(f"wipe_{partition}", "skipped", entry["reason"])
+                wipe_results.append({
+                    "partition": partition,
+                    "action": action,
+                    "status": "skipped",
+                    "reason": entry["reason"],
+                    "timestamp": datetime.now().isoformat()
+                })
+                continue
             
-            result = self.run_command(cmd, check=False)
+            # fastboot handles one command per device at a time, so partitions stay sequential
+            started = time.monotonic()
+            result = self.run_command(self.fastboot(action, partition), check=False)
+            duration = time.monotonic() - started
             if not result or result.returncode != 0:
                 status = "failed"
                 self.log_step(f"wipe_{partition}", "failed", f"Failed to {action} {partition}")
@@ -378,32 +1130,58 @@ class AndroidDataWiper:
                 "partition": partition,
                 "action": action,
                 "status": status,
+                "size_bytes": entry.get("size_bytes"),
+                "duration_seconds": round(duration, 3),
                 "timestamp": datetime.now().isoformat()
             })
-            
-            time.sleep(2)
+            if self.checkpoint and status == "success":
+                self.checkpoint.data["wipe_results"].append(wipe_results[-1])
+                self.checkpoint.save()
         
         self.log_data["wipe_results"] = wipe_results
         self.log_step("wipe_partitions", "completed", "Partition wiping completed")
         return True
     
+    def verify_wipe(self):
+        """Read back a random sample of blocks to confirm the storage holds no data"""
+        if not self.verify_source:
+            self.log_step("verify_wipe", "skipped", "No verification target configured")
+            return True
+        self.log_step("verify_wipe", "started",
+                      f"Sampling {self.verify_source.name} at {self.verify_confidence:.2%} confidence")
+        
+        try:
+            verification = verify_storage(self.verify_source, self.verify_block_size,
+                                          self.verify_confidence, self.verify_max_unwiped)
+        except (OSError, ValueError) as e:
+            error_msg = f"Verification could not read {self.verify_source.name}: {e}"
+            self.log_step("verify_wipe", "failed", error_msg)
+            self.log_data["errors"].append(error_msg)
+            return False
+        self.log_data["verification"] = verification
+        
+        details = (f"{verification['samples_read']}/{verification['samples_planned']} blocks "
+                   f"({verification['fraction_read']:.4%} of the target) in {verification['duration_seconds']}s")
+        if verification["result"] != "passed":
+            error_msg = verification["failure"]
+            self.log_step("verify_wipe", "failed", f"{error_msg}; {details}")
+            self.log_data["errors"].append(error_msg)
+            return False
+        self.log_step("verify_wipe", "success", details)
+        return True
+    
     def lock_bootloader(self):
         """Lock the bootloader after wiping"""
         self.log_step("lock_bootloader", "started", "Locking bootloader")
         
-        lock_methods = [
-            f"{self.fastboot_path} flashing lock",
-            f"echo y | {self.fastboot_path} flashing lock",
-            f"{self.fastboot_path} oem lock"
-        ]
-        
-        for method in lock_methods:
-            result = self.run_command(method, check=False)
+        for method, args, stdin in self.methods(LOCK_METHODS, "lock_methods"):
+            result = self.run_command(self.fastboot(*args), check=False, input=stdin)
             if result and result.returncode == 0:
                 self.log_step("lock_bootloader", "success", "Bootloader lock command sent")
                 self.log_data["device_info"]["bootloader_status"] = "locked"
+                self.log_data["device_info"]["lock_method"] = method
                 print("Please confirm lock on your device using volume and power buttons")
-                time.sleep(10)
+                self.wait_for(lambda: self.bootloader_unlocked() is not True, "bootloader locked")
                 return True
         
         self.log_step("lock_bootloader", "failed", "Could not lock bootloader")
@@ -413,14 +1191,18 @@ class AndroidDataWiper:
     def reboot_device(self):
         """Reboot the device"""
         self.log_step("reboot_device", "started", "Rebooting device")
-        result = self.run_command(f"{self.fastboot_path} reboot")
-        time.sleep(5)
-        return result is not None
+        result = self.run_command(self.fastboot("reboot"))
+        if result is None:
+            return False
+        # Only confirm the device left fastboot; the first boot after a wipe can take minutes
+        self.wait_for(lambda: self.current_state() != "bootloader", "device left fastboot", timeout=30)
+        return True
     
     def generate_summary(self):
         """Generate a summary of the wipe operation"""
-        success_steps = sum(1 for step in self.log_data["steps"] if step["status"] == "success")
-        total_steps = len(self.log_data["steps"])
+        # Running counters, since the in-memory step buffer is bounded
+        success_steps = self.counters["successful_steps"]
+        total_steps = self.counters["total_steps"]
         
         summary = {
             "start_time": self.log_data["timestamp"],
@@ -431,11 +1213,18 @@ class AndroidDataWiper:
             "success_rate": f"{(success_steps / total_steps * 100):.1f}%" if total_steps > 0 else "0%",
             "errors_count": len(self.log_data["errors"]),
             "warnings_count": len(self.log_data["warnings"]),
-            "commands_executed": len(self.log_data["commands_executed"]),
+            "commands_executed": self.counters["commands_executed"],
             "device_model": self.log_data["device_info"].get("model", "Unknown"),
-            "android_version": self.log_data["device_info"].get("android_version", "Unknown")
+            "android_version": self.log_data["device_info"].get("android_version", "Unknown"),
+            "stage_durations": dict(self.log_data["stage_durations"]),
+            "timed_out_commands": self.timed_out["commands"],
+            "seconds_lost_to_timeouts": round(self.timed_out["seconds"], 1),
+            "command_latency": {kind: latency_summary(values)
+                                for kind, values in sorted(self.command_seconds.items())}
         }
         
+        if "summary" not in self.log_data:
+            self.metrics.increment("devices_total", model=self.device_model(), result=self.log_data["result"])
         self.log_data["summary"] = summary
         return summary
     
@@ -456,70 +1245,205 @@ class AndroidDataWiper:
             self.save_log()
             return False
             
-        # Check device connection
-        if not self.check_device_connection():
+        # An interrupted wipe carries on from its last checkpoint once it is authorized again
+        checkpoint = self.find_checkpoint()
+        if checkpoint:
+            return self.resume(checkpoint)
+        
+        # Check device connection and get device info
+        device_info = self.prepare()
+        if device_info is None:
             self.log_step("main", "failed", "No device connected")
             self.log_data["result"] = "failed"
             self.generate_summary()
             self.save_log()
             return False
-            
-        # Get device info
-        device_info = self.get_device_info()
         
         # Confirm the wipe
         if not self.confirm_wipe(device_info):
-            self.log_step("main", "cancelled", "User cancelled the operation")
+            self.log_step("main", "cancelled", "Wipe not authorized for this device" if self.manifest
+                          else "User cancelled the operation")
             self.log_data["result"] = "cancelled"
             self.generate_summary()
             self.save_log()
             return False
             
-        print("Starting wipe process in 10 seconds...")
-        print("Press Ctrl+C to cancel")
-        time.sleep(10)
+        if self.countdown:
+            print(f"Starting wipe process in {self.countdown} seconds...")
+            print("Press Ctrl+C to cancel")
+            time.sleep(self.countdown)
         
-        # Step 1: Reboot to bootloader
-        if not self.reboot_to_bootloader():
-            self.log_step("main", "failed", "Failed to reboot to bootloader")
-            self.log_data["result"] = "failed"
+        self.open_checkpoint()
+        return self.run_wipe()
+    
+    def prepare(self):
+        """Connection check and device info, timed as the 'prepare' stage; None if no device"""
+        def prepare():
+            if not self.check_device_connection():
+                return None
+            device_info = self.get_device_info()
+            self.apply_profile()
+            return device_info
+        return self.timed_stage("prepare", prepare)
+    
+    def find_checkpoint(self):
+        """Return the checkpoint of an interrupted wipe of this device, if there is one"""
+        if not self.checkpoint_dir or not self.resume_enabled:
+            return None
+        if self.serial:
+            serials = [self.serial]
+        else:
+            # Without -s, resume only when exactly one attached device has a checkpoint
+            serials = []
+            for argv in ([self.adb_path, "devices"], [self.fastboot_path, "devices"]):
+                result = self.probe(argv)
+                if result:
+                    serials.extend(listed_serials(result.stdout))
+        checkpoints = [checkpoint for checkpoint in
+                       (Checkpoint.load(self.checkpoint_dir, serial) for serial in dict.fromkeys(serials))
+                       if checkpoint]
+        return checkpoints[0] if len(checkpoints) == 1 else None
+    
+    def open_checkpoint(self):
+        """Start checkpointing a freshly confirmed wipe"""
+        serial = self.serial or self.log_data["device_info"].get("device_id")
+        if not self.checkpoint_dir or not serial:
+            return
+        self.checkpoint = Checkpoint.create(self.checkpoint_dir, serial, self.log_file,
+                                            self.log_data["device_info"], self.log_data.get("authorization"),
+                                            self.log_data["settings"].get("event_log"))
+        self.advance("connected")
+    
+    def clear_checkpoint(self):
+        """Drop the checkpoint of a wipe that finished, successfully or not; only interrupted wipes resume"""
+        if self.checkpoint:
+            self.checkpoint.clear()
+            self.checkpoint = None
+    
+    def advance(self, state):
+        """Record that the pipeline reached state"""
+        if not self.checkpoint:
+            return
+        self.checkpoint.save(state=state)
+        self.log_step("checkpoint", "success", f"{state} (saved to {self.checkpoint.path})")
+    
+    def check_resume(self, checkpoint):
+        """Refuse a checkpoint that is too old or was authorized for another operator or job"""
+        reason = checkpoint.refusal(self.operator, self.manifest.job_id if self.manifest else None,
+                                    self.checkpoint_max_age)
+        if reason is None:
+            return True
+        self.log_data["authorization"] = {"mode": "checkpoint", "decision": "denied", "reason": reason,
+                                          "checked_at": datetime.now().astimezone().isoformat(),
+                                          "operator": self.operator, "checkpoint": checkpoint.path}
+        self.log_step("confirmation", "denied", reason)
+        if checkpoint.expired(self.checkpoint_max_age):
+            # Too old to say anything about the device now; the next run starts from the beginning
+            checkpoint.clear()
+        return False
+    
+    def set_aside_previous_log(self, checkpoint):
+        """Keep the interrupted run's report from being overwritten by this one's; returns where it is"""
+        previous = checkpoint.data["log_file"]
+        if os.path.abspath(previous) != os.path.abspath(self.log_file):
+            return previous
+        root, ext = os.path.splitext(self.log_file)
+        stamp = re.sub(r"[^0-9T]", "", checkpoint.data["started_at"])
+        aside = f"{root}.{stamp}{ext or '.json'}"
+        events = checkpoint.data.get("event_log")
+        if events and os.path.exists(events):
+            # Its event log is still there, so it never finished a report; rebuild the fullest one
+            compact_event_log(events, aside)
+        elif os.path.exists(previous):
+            os.replace(previous, aside)
+        else:
+            return None
+        checkpoint.save(log_file=aside)
+        self.log_step("resume", "success", f"Report of the interrupted run kept as {aside}")
+        return aside
+    
+    def resume(self, checkpoint):
+        """Continue an interrupted wipe from its last completed state, after authorizing it like a new one"""
+        self.serial = self.serial or checkpoint.data["serial"]
+        self.log_data["device_info"].update(checkpoint.data["device_info"])
+        self.log_data["resumed_from"] = {
+            "checkpoint": checkpoint.path,
+            "state": checkpoint.state,
+            "started_at": checkpoint.data["started_at"],
+            "previous_log": self.set_aside_previous_log(checkpoint),
+            "previous_event_log": checkpoint.data.get("event_log"),
+            "partitions_already_wiped": len(checkpoint.data["wipe_results"]),
+        }
+        # Fleet runs authorize every device up front; a single run asks (or checks the manifest) here.
+        # A device left in fastboot cannot report itself, so what the checkpoint recorded is checked.
+        if not self.check_resume(checkpoint) or not (
+                self.is_authorized() or self.confirm_wipe(checkpoint.data["device_info"])):
+            self.log_step("main", "cancelled", "Resuming the interrupted wipe was not authorized")
+            self.log_data["result"] = "cancelled"
             self.generate_summary()
             self.save_log()
             return False
         
-        # Step 2: Check fastboot connection
+        self.checkpoint = checkpoint
+        checkpoint.save(authorization=self.log_data["authorization"])
+        self.log_step("resume", "started", f"Resuming {self.serial} after state '{checkpoint.state}'")
+        self.apply_profile()
+        print(f"Resuming interrupted wipe of {self.serial} (last completed state: {checkpoint.state})")
+        return self.run_wipe()
+    
+    def enter_bootloader(self):
+        """Get the device into fastboot mode, rebooting it only if it is still in Android"""
+        if self.current_state() != "bootloader" and not self.reboot_to_bootloader():
+            self.log_step("enter_bootloader", "failed", "Failed to reboot to bootloader")
+            return False
+        
         if not self.check_fastboot_connection():
-            # Try one more time
-            self.reboot_to_bootloader()
-            time.sleep(10)
+            # Still booted into Android, ask once more and wait for the mode change
+            if self.current_state() == "device":
+                self.reboot_to_bootloader()
             if not self.check_fastboot_connection():
+                return False
+        return True
+    
+    def wipe_transitions(self):
+        """(target state, handler, failure message or None if the step is optional)"""
+        return [
+            ("bootloader", self.enter_bootloader, "Failed to connect in fastboot mode"),
+            ("unlocked", self.unlock_bootloader, "Failed to unlock bootloader"),
+            ("wiped", self.wipe_partitions, "Failed to wipe partitions"),
+            ("verified", self.verify_wipe, "Post-wipe verification failed"),
+            ("locked", self.lock_bootloader, None),
+            ("rebooted", self.reboot_device, None),
+        ]
+    
+    def run_wipe(self):
+        """Run the destructive part of the pipeline, starting after the last checkpointed state"""
+        self.log_data["result"] = "in_progress"
+        
+        resumed = self.checkpoint is not None and self.checkpoint.reached("bootloader")
+        if resumed and not self.checkpoint.reached("wiped") and self.current_state() != "bootloader":
+            # Interrupted mid-pipeline and the device left fastboot since
+            if not self.enter_bootloader():
                 self.log_step("main", "failed", "Failed to connect in fastboot mode")
+                self.clear_checkpoint()
                 self.log_data["result"] = "failed"
                 self.generate_summary()
                 self.save_log()
                 return False
         
-        # Step 3: Unlock bootloader
-        if not self.unlock_bootloader():
-            self.log_step("main", "failed", "Failed to unlock bootloader")
-            self.log_data["result"] = "failed"
-            self.generate_summary()
-            self.save_log()
-            return False
-        
-        # Step 4: Wipe partitions
-        if not self.wipe_partitions():
-            self.log_step("main", "failed", "Failed to wipe partitions")
-            self.log_data["result"] = "failed"
-            self.generate_summary()
-            self.save_log()
-            return False
-        
-        # Step 5: Lock bootloader (optional)
-        self.lock_bootloader()
-        
-        # Step 6: Reboot device
-        self.reboot_device()
+        for state, handler, failure in self.wipe_transitions():
+            if self.checkpoint and self.checkpoint.reached(state):
+                self.log_step(state, "skipped", "Completed before resume")
+                continue
+            # Optional steps count as done once attempted, so a resume does not repeat them
+            if not self.timed_stage(state, handler) and failure:
+                self.log_step("main", "failed", failure)
+                self.clear_checkpoint()
+                self.log_data["result"] = "failed"
+                self.generate_summary()
+                self.save_log()
+                return False
+            self.advance(state)
         
         self.log_step("main", "completed", "Wipe process completed")
         self.log_data["result"] = "success"
@@ -527,6 +1451,7 @@ class AndroidDataWiper:
         # Generate and display summary
         summary = self.generate_summary()
         self.save_log()
+        self.clear_checkpoint()
         
         print("=" * 60)
         print("WIPE COMPLETED SUCCESSFULLY!")
@@ -543,14 +1468,487 @@ class AndroidDataWiper:
         
         return True
 
+
+class FleetWiper:
+    """Wipe every authorized device on the bench concurrently, one log per serial"""
+    
+    def __init__(self, verbose=False, log_dir="wipe_logs", max_workers=None, serials=None,
+                 state_timeout=120, countdown=10, transport=None, checkpoint_dir="wipe_checkpoints",
+                 resume=True, metrics=None, metrics_file=None, profiles=None, timeouts=None, blobs=None,
+                 manifest=None, operator=None, checkpoint_max_age=CHECKPOINT_MAX_AGE_HOURS):
+        self.verbose = verbose
+        self.log_dir = Path(log_dir)
+        self.max_workers = max_workers
+        self.serials = serials
+        self.state_timeout = state_timeout
+        self.countdown = countdown
+        self.transport = transport or SubprocessTransport()
+        self.checkpoint_dir = checkpoint_dir
+        self.resume_enabled = resume
+        self.checkpoint_max_age = checkpoint_max_age
+        self.metrics = metrics or Metrics()
+        self.metrics_file = metrics_file
+        self.profiles = profiles
+        # Shared, so what one device teaches about a model applies to the rest of the fleet
+        self.timeouts = timeouts or TimeoutPolicy(profiles)
+        self.blobs = blobs
+        self.manifest = manifest
+        self.operator = operator
+        self.wipers = {}
+        self.pool = None
+        self.print_lock = threading.Lock()
+        
+        # Resolve adb/fastboot once for the whole fleet instead of once per device
+        locator = AndroidDataWiper(verbose=verbose, log_file=os.devnull)
+        self.adb_path = locator.adb_path
+        self.fastboot_path = locator.fastboot_path
+    
+    def list_devices(self, binary):
+        """Output of '<binary> devices', or '' if the server hung or could not be started"""
+        try:
+            return self.transport.run([binary, "devices"], timeout=30).stdout
+        except (subprocess.TimeoutExpired, OSError) as e:
+            print(f"Could not list devices with {os.path.basename(binary)}: {e}")
+            return ""
+    
+    def discover_devices(self):
+        """Return the serials of every authorized device reported by adb"""
+        serials = []
+        for line in self.list_devices(self.adb_path).strip().split('\n')[1:]:
+            parts = line.split()
+            if len(parts) >= 2:
+                if parts[1] == "device":
+                    serials.append(parts[0])
+                else:
+                    print(f"Skipping {parts[0]}: {parts[1]}")
+        # Devices interrupted mid-wipe may be sitting in fastboot, invisible to adb
+        if self.checkpoint_dir and self.resume_enabled:
+            serials.extend(serial for serial in listed_serials(self.list_devices(self.fastboot_path))
+                           if serial not in serials and Checkpoint.load(self.checkpoint_dir, serial))
+        if self.serials:
+            serials = [serial for serial in serials if serial in self.serials]
+        return serials
+    
+    def create_wiper(self, serial):
+        """Create a wiper bound to a single serial with its own log file"""
+        log_file = self.log_dir / f"wipe_log_{serial}.json"
+        return AndroidDataWiper(verbose=self.verbose, log_file=str(log_file), serial=serial,
+                                adb_path=self.adb_path, fastboot_path=self.fastboot_path,
+                                state_timeout=self.state_timeout, transport=self.transport,
+                                checkpoint_dir=self.checkpoint_dir, resume=self.resume_enabled,
+                                metrics=self.metrics, profiles=self.profiles, timeouts=self.timeouts,
+                                blobs=self.blobs, manifest=self.manifest, operator=self.operator,
+                                checkpoint_max_age=self.checkpoint_max_age)
+    
+    def prepare_device(self, wiper):
+        """Check the connection and collect device info before confirmation"""
+        device_info = wiper.prepare()
+        if device_info is None:
+            wiper.log_step("main", "failed", "No device connected")
+            wiper.log_data["result"] = "failed"
+            wiper.generate_summary()
+            wiper.save_log()
+        return device_info
+    
+    def confirm_fleet(self, device_infos):
+        """Ask once for confirmation covering every device in the fleet"""
+        print("\n" + "="*60)
+        print(f"WARNING: THIS WILL ERASE ALL DATA ON {len(device_infos)} DEVICES")
+        print("="*60)
+        for serial, info in device_infos.items():
+            print(f"{serial}: {info.get('manufacturer', 'Unknown')} {info.get('model', 'Unknown')} "
+                  f"(Android {info.get('android_version', 'Unknown')})")
+        print("="*60)
+        print("MAKE SURE OEM UNLOCKING IS ENABLED ON EVERY DEVICE!")
+        print("="*60)
+        
+        response = input(f"Type 'ERASE {len(device_infos)} DEVICES' to confirm: ")
+        if response != f"ERASE {len(device_infos)} DEVICES":
+            print("Wipe cancelled.")
+            return False
+        response = input("Are you absolutely sure? This cannot be undone! (yes/NO): ")
+        if response.lower() != "yes":
+            print("Wipe cancelled.")
+            return False
+        return True
+    
+    def authorize_fleet(self, device_infos):
+        """Check every device against the job manifest; returns the serials it authorizes"""
+        authorized = []
+        for serial, info in device_infos.items():
+            wiper = self.wipers[serial]
+            if wiper.authorize(info):
+                authorized.append(serial)
+                continue
+            wiper.log_step("main", "cancelled", "Wipe not authorized for this device")
+            wiper.log_data["result"] = "cancelled"
+            wiper.generate_summary()
+            wiper.save_log()
+            with self.print_lock:
+                print(f"<{serial}> not authorized: {wiper.log_data['authorization']['reason']}")
+        print(f"Job {self.manifest.job_id}: {len(authorized)}/{len(device_infos)} devices authorized "
+              f"for {self.operator}")
+        return authorized
+    
+    def main(self):
+        """Discover, confirm and wipe all devices in parallel"""
+        print("Android Data Wiping Tool (Fastboot Method) - Fleet Mode")
+        print("=" * 50)
+        
+        serials = self.discover_devices()
+        if not serials:
+            print("No authorized devices found.")
+            return False
+        
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.wipers = {serial: self.create_wiper(serial) for serial in serials}
+        workers = self.max_workers or len(serials)
+        
+        # Interrupted wipes skip the connection check but are authorized again with the rest
+        resumable = {}
+        refused = set()
+        for serial, wiper in self.wipers.items():
+            checkpoint = wiper.find_checkpoint()
+            if not checkpoint:
+                continue
+            if not wiper.check_resume(checkpoint):
+                refused.add(serial)
+                wiper.log_step("main", "cancelled", "Interrupted wipe may not be resumed")
+                wiper.log_data["result"] = "cancelled"
+                wiper.generate_summary()
+                wiper.save_log()
+                print(f"<{serial}> not resumed: {wiper.log_data['authorization']['reason']}")
+                continue
+            resumable[serial] = checkpoint
+            print(f"<{serial}> interrupted after state '{checkpoint.state}', resumes once authorized")
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.prepare_device, wiper): serial
+                       for serial, wiper in self.wipers.items() if serial not in resumable and serial not in refused}
+            device_infos = {}
+            for future in as_completed(futures):
+                info = future.result()
+                if info is not None:
+                    device_infos[futures[future]] = info
+        
+        if not device_infos and not resumable:
+            print("No devices passed the connection check.")
+            return False
+        
+        # A resumed device may sit in fastboot, so it is judged on what its checkpoint recorded
+        candidates = dict(device_infos)
+        candidates.update((serial, checkpoint.data["device_info"]) for serial, checkpoint in resumable.items())
+        if self.manifest:
+            authorized = set(self.authorize_fleet(candidates))
+            device_infos = {serial: info for serial, info in device_infos.items() if serial in authorized}
+            resumable = {serial: checkpoint for serial, checkpoint in resumable.items() if serial in authorized}
+            if not device_infos and not resumable:
+                print("No devices are authorized by the job manifest.")
+                return False
+        elif not self.confirm_fleet(dict(sorted(candidates.items()))):
+            for serial in candidates:
+                wiper = self.wipers[serial]
+                wiper.log_step("main", "cancelled", "User cancelled the fleet operation")
+                wiper.log_data["result"] = "cancelled"
+                wiper.generate_summary()
+                wiper.save_log()
+            return False
+        else:
+            for serial in candidates:
+                wiper = self.wipers[serial]
+                wiper.log_data["authorization"] = {"mode": "interactive", "decision": "confirmed",
+                                                   "checked_at": datetime.now().astimezone().isoformat(),
+                                                   "operator": self.operator}
+                wiper.log_step("confirmation", "confirmed", "User confirmed fleet wipe operation")
+        
+        if self.countdown and (device_infos or resumable):
+            print(f"Starting wipe process in {self.countdown} seconds...")
+            print("Press Ctrl+C to cancel")
+            time.sleep(self.countdown)
+        
+        start = time.monotonic()
+        results = {}
+        # No context manager here: on Ctrl+C abort() must not wait for running wipes
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        futures = {self.pool.submit(self.wipe_device, self.wipers[serial], resumable.get(serial)): serial
+                   for serial in [*resumable, *device_infos]}
+        for future in as_completed(futures):
+            serial = futures[future]
+            results[serial] = future.result()
+            with self.print_lock:
+                print(f"<{serial}> finished: {'success' if results[serial] else 'failed'}")
+            if self.metrics_file:
+                self.metrics.write(self.metrics_file)
+        self.pool.shutdown()
+        
+        self.save_fleet_summary(results, time.monotonic() - start)
+        succeeded = sum(1 for ok in results.values() if ok)
+        lost = sum(wiper.timed_out["seconds"] for wiper in self.wipers.values())
+        print("=" * 60)
+        print(f"FLEET WIPE FINISHED: {succeeded}/{len(results)} devices succeeded")
+        if lost:
+            print(f"Time lost to timed-out commands: {lost:.1f}s")
+        print(f"Logs saved to: {self.log_dir}")
+        print("=" * 60)
+        self.print_latency_report()
+        return succeeded == len(results)
+    
+    def wipe_device(self, wiper, checkpoint=None):
+        """Run one device's pipeline, making sure its log is saved whatever happens"""
+        try:
+            if checkpoint:
+                return wiper.resume(checkpoint)
+            wiper.open_checkpoint()
+            return wiper.run_wipe()
+        except Exception as e:
+            error_msg = f"Unexpected error: {e}"
+            wiper.log_step("main", "error", error_msg)
+            wiper.log_data["result"] = "error"
+            wiper.log_data["errors"].append(error_msg)
+            wiper.generate_summary()
+            wiper.save_log()
+            return False
+    
+    def save_fleet_summary(self, results, wall_seconds):
+        """Write a fleet-level index pointing at every per-device log"""
+        summary = {
+            "tool": "Android Data Wiping Tool (Fastboot Method) - Fleet Mode",
+            "timestamp": datetime.now().isoformat(),
+            "wall_clock_seconds": wall_seconds,
+            "devices": {
+                serial: {
+                    "result": self.wipers[serial].log_data["result"],
+                    "log_file": self.wipers[serial].log_file,
+                    "duration_seconds": self.wipers[serial].log_data.get("summary", {}).get("duration_seconds")
+                }
+                for serial in results
+            },
+            "command_latency": self.metrics.quantiles("command_duration_seconds", "command"),
+            "stage_latency": self.metrics.quantiles("stage_duration_seconds", "stage"),
+            "latency_by_model": {
+                "commands": self.metrics.quantiles("command_duration_seconds", "model", "command"),
+                "stages": self.metrics.quantiles("stage_duration_seconds", "model", "stage"),
+            }
+        }
+        with open(self.log_dir / "fleet_summary.json", 'w') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    
+    def print_latency_report(self):
+        """Per-stage and per-command p50/p95/p99 across the fleet"""
+        for title, name, label in (("Stage", "stage_duration_seconds", "stage"),
+                                   ("Command", "command_duration_seconds", "command")):
+            rows = self.metrics.quantiles(name, label)
+            if not rows:
+                continue
+            print(f"{title:<24} {'count':>6} {'p50 s':>9} {'p95 s':>9} {'p99 s':>9}")
+            for key, stats in sorted(rows.items(), key=lambda item: -item[1]["p95_seconds"]):
+                print(f"{key:<24} {stats['count']:>6} {stats['p50_seconds']:>9.3f} "
+                      f"{stats['p95_seconds']:>9.3f} {stats['p99_seconds']:>9.3f}")
+        print("=" * 60)
+    
+    def abort(self, reason):
+        """Mark every unfinished device as interrupted and flush its log"""
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self.transport, "kill_all"):
+            self.transport.kill_all()
+        for wiper in self.wipers.values():
+            if wiper.log_data["result"] in ("not_started", "in_progress"):
+                wiper.log_step("main", "interrupted", reason)
+                wiper.log_data["result"] = "cancelled"
+                wiper.generate_summary()
+                wiper.save_log()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Android Data Wiping Tool (Fastboot Method)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("-l", "--log-file", default="wipe_log.json", help="JSON log file name")
+    parser.add_argument("-s", "--serial", help="Serial of the device to wipe (default: first authorized device)")
+    parser.add_argument("--fleet", action="store_true", help="Wipe every authorized device concurrently")
+    parser.add_argument("--fleet-serials", nargs="+", help="Restrict fleet mode to these serials")
+    parser.add_argument("--log-dir", default="wipe_logs", help="Directory for per-device logs in fleet mode")
+    parser.add_argument("--workers", type=int, help="Maximum devices wiped at once in fleet mode (default: all)")
+    parser.add_argument("--state-timeout", type=float, default=120,
+                        help="Seconds to wait for a device to reach the next mode (default: 120)")
+    parser.add_argument("--countdown", type=int,
+                        help="Seconds to wait before wiping so the operator can cancel (default: 10, 0 with --manifest)")
+    parser.add_argument("--transport", choices=["subprocess", "adb-server"], default="subprocess",
+                        help="Run adb as a child process or talk to the adb server socket directly")
+    parser.add_argument("--compact", metavar="EVENTS_JSONL",
+                        help="Rebuild a JSON report (written to --log-file) from an event log and exit")
+    parser.add_argument("--adb-server", default="127.0.0.1:5037",
+                        help="adb server address for --transport adb-server (default: 127.0.0.1:5037)")
+    parser.add_argument("--checkpoint-dir", default="wipe_checkpoints",
+                        help="Where per-serial progress is saved so interrupted wipes can resume")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignore saved checkpoints and start the wipe from the beginning")
+    parser.add_argument("--checkpoint-max-age", type=float, default=CHECKPOINT_MAX_AGE_HOURS, metavar="HOURS",
+                        help="Refuse to resume a checkpoint authorized longer ago than this "
+                             f"(default: {CHECKPOINT_MAX_AGE_HOURS})")
+    parser.add_argument("--verify-path", metavar="PATH",
+                        help="Disk image or block device on this machine to sample after wiping")
+    parser.add_argument("--verify-device-path", metavar="BLOCK_DEVICE",
+                        help="Partition to sample over adb shell (needs root adb); only with --verify-only")
+    parser.add_argument("--verify-only", action="store_true",
+                        help="Only run the sampling verification, writing the result to --log-file")
+    parser.add_argument("--verify-confidence", type=float, default=0.99,
+                        help="Confidence of catching unwiped data above --verify-max-unwiped (default: 0.99)")
+    parser.add_argument("--verify-max-unwiped", type=float, default=0.001,
+                        help="Fraction of unwiped blocks the sample must be able to detect (default: 0.001)")
+    parser.add_argument("--verify-block-size", type=int, default=4096,
+                        help="Bytes per sampled block (default: 4096)")
+    parser.add_argument("--command-timeout", type=float, default=DEFAULT_COMMAND_TIMEOUT,
+                        help="Seconds a command may run before its history on the model is known (default: 120)")
+    parser.add_argument("--fixed-timeouts", action="store_true",
+                        help="Always use --command-timeout instead of deadlines learned from earlier commands")
+    parser.add_argument("--blob-dir", default="command_blobs",
+                        help="Where long command output is stored once, compressed, and referenced from logs")
+    parser.add_argument("--blob-codec", choices=sorted(BLOB_CODECS), default="zlib",
+                        help="Compression for new blobs (default: zlib)")
+    parser.add_argument("--inline-output", action="store_true",
+                        help="Keep all command output inside the log instead of the blob store")
+    parser.add_argument("--rehydrate", metavar="LOG",
+                        help="Write LOG with its command output expanded from the blob store to --log-file and exit")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while wiping")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Write Prometheus metrics to PATH (e.g. for node_exporter's textfile collector)")
+    parser.add_argument("--profiles", default="device_profiles.json",
+                        help="Device profile registry learned from earlier wipes (default: device_profiles.json)")
+    parser.add_argument("--no-profiles", action="store_true",
+                        help="Neither use nor update the device profile registry")
+    parser.add_argument("--learn-profiles", nargs="+", metavar="LOG",
+                        help="Learn device profiles from wipe logs or log directories, then exit")
+    parser.add_argument("--manifest", metavar="JOB_JSON",
+                        help="Signed job manifest; devices it lists are wiped without prompting")
+    parser.add_argument("--manifest-key", metavar="PEM",
+                        help="EC public key the job manifest must be signed with")
+    parser.add_argument("--operator", help="Operator running the wipe; must match the manifest's operator")
+    parser.add_argument("--sign-manifest", metavar="JOB_JSON",
+                        help="Sign a job manifest in place with --signing-key and exit")
+    parser.add_argument("--signing-key", metavar="PEM", help="EC private key for --sign-manifest")
+    parser.add_argument("--imei", help="IMEI to record for the device, e.g. from its label, when it does not report one")
     
     args = parser.parse_args()
     
-    wiper = AndroidDataWiper(verbose=args.verbose, log_file=args.log_file)
+    if args.compact:
+        compact_event_log(args.compact, args.log_file)
+        print(f"Report rebuilt from {args.compact} into {args.log_file}")
+        sys.exit(0)
+    
+    if args.rehydrate:
+        with open(args.log_file, "w", encoding="utf-8") as f:
+            json.dump(load_log(args.rehydrate), f, indent=2, ensure_ascii=False)
+        print(f"Expanded {args.rehydrate} into {args.log_file}")
+        sys.exit(0)
+    
+    if args.sign_manifest:
+        if not args.signing_key:
+            parser.error("--sign-manifest needs --signing-key")
+        try:
+            fingerprint = sign_manifest(args.sign_manifest, args.signing_key)
+        except (ManifestError, ImportError, ValueError, OSError) as e:
+            print(f"Could not sign {args.sign_manifest}: {e}")
+            sys.exit(1)
+        print(f"Signed {args.sign_manifest} with key {fingerprint}")
+        sys.exit(0)
+    
+    manifest = None
+    if args.manifest:
+        if not (args.manifest_key and args.operator):
+            parser.error("--manifest needs --manifest-key and --operator")
+        if args.imei:
+            parser.error("--imei cannot be used with --manifest: the device itself must match the manifest")
+        try:
+            manifest = JobManifest.load(args.manifest, args.manifest_key)
+        except (ManifestError, ValueError, OSError) as e:
+            print(f"Job manifest rejected: {e}")
+            sys.exit(1)
+        print(f"Job {manifest.job_id}: {len(manifest.document['devices'])} devices for {manifest.operator}, "
+              f"expires {manifest.expires_at.isoformat()}")
+    countdown = args.countdown if args.countdown is not None else (0 if manifest else 10)
+    
+    blobs = None if args.inline_output else BlobStore(args.blob_dir, args.blob_codec)
+    
+    profiles = None if args.no_profiles else DeviceProfiles(args.profiles)
+    if args.learn_profiles:
+        if not profiles:
+            parser.error("--learn-profiles cannot be used with --no-profiles")
+        learned, skipped = profiles.learn_files(args.learn_profiles)
+        print(f"Learned from {learned} logs ({skipped} unchanged or unusable) into {args.profiles}")
+        for key, profile in sorted(profiles.profiles.items()):
+            unlock = max(profile["unlock_methods"], key=profile["unlock_methods"].get, default="-")
+            print(f"  {key}: {profile['successful_wipes']}/{profile['wipes']} successful, unlock via {unlock}, "
+                  f"{'cached' if profile['wipe_plan'] else 'no'} wipe plan")
+        sys.exit(0)
+    
+    if args.verify_device_path and not args.verify_only:
+        parser.error("--verify-device-path needs --verify-only: a device in fastboot cannot be read over adb")
+    if not 0 < args.verify_confidence < 1 or not 0 < args.verify_max_unwiped <= 1:
+        parser.error("--verify-confidence must be in (0, 1) and --verify-max-unwiped in (0, 1]")
+    if args.imei and not valid_imei(args.imei):
+        parser.error(f"--imei {args.imei} is not a valid 15-digit IMEI")
+    if args.imei and args.fleet:
+        parser.error("--imei names one device and cannot be used with --fleet")
+    
+    transport = create_transport(args.transport, args.adb_server)
+    timeouts = TimeoutPolicy(profiles, default=args.command_timeout, adaptive=not args.fixed_timeouts)
+    metrics = Metrics()
+    if args.metrics_port:
+        MetricsServer(metrics, args.metrics_port).start()
+        print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    if args.metrics_file:
+        atexit.register(metrics.write, args.metrics_file)
+    
+    if args.verify_only:
+        # Sampling a local image needs neither binary, so a missing one is not fatal there
+        binaries = {} if args.verify_device_path else {
+            "adb_path": resolve_binary("adb") or "adb",
+            "fastboot_path": resolve_binary("fastboot") or "fastboot",
+        }
+        wiper = AndroidDataWiper(verbose=args.verbose, log_file=args.log_file, serial=args.serial,
+                                 transport=transport, checkpoint_dir=None, **binaries,
+                                 verify_confidence=args.verify_confidence,
+                                 verify_max_unwiped=args.verify_max_unwiped,
+                                 verify_block_size=args.verify_block_size, metrics=metrics)
+        if args.verify_device_path:
+            wiper.verify_source = AdbBlockSource(wiper, args.verify_device_path)
+        elif args.verify_path:
+            wiper.verify_source = LocalBlockSource(args.verify_path)
+        else:
+            parser.error("--verify-only needs --verify-path or --verify-device-path")
+        wiper.log_data["settings"]["verify_target"] = wiper.verify_source.name
+        passed = wiper.verify_wipe()
+        wiper.log_data["result"] = "success" if passed else "failed"
+        wiper.generate_summary()
+        wiper.save_log()
+        sys.exit(0 if passed else 1)
+    
+    if args.fleet:
+        fleet = FleetWiper(verbose=args.verbose, log_dir=args.log_dir,
+                           max_workers=args.workers, serials=args.fleet_serials,
+                           state_timeout=args.state_timeout, countdown=countdown,
+                           transport=transport, checkpoint_dir=args.checkpoint_dir,
+                           resume=not args.no_resume, metrics=metrics, metrics_file=args.metrics_file,
+                           profiles=profiles, timeouts=timeouts, blobs=blobs, manifest=manifest,
+                           operator=args.operator, checkpoint_max_age=args.checkpoint_max_age)
+        try:
+            sys.exit(0 if fleet.main() else 1)
+        except KeyboardInterrupt:
+            fleet.abort("Operation cancelled by user")
+            print("\nOperation cancelled by user.")
+            sys.exit(1)
+    
+    wiper = AndroidDataWiper(verbose=args.verbose, log_file=args.log_file, serial=args.serial,
+                             state_timeout=args.state_timeout, countdown=countdown,
+                             transport=transport, checkpoint_dir=args.checkpoint_dir,
+                             resume=not args.no_resume,
+                             verify_source=LocalBlockSource(args.verify_path) if args.verify_path else None,
+                             verify_confidence=args.verify_confidence,
+                             verify_max_unwiped=args.verify_max_unwiped,
+                             verify_block_size=args.verify_block_size, imei=args.imei, metrics=metrics,
+                             profiles=profiles, timeouts=timeouts, blobs=blobs, manifest=manifest,
+                             operator=args.operator, checkpoint_max_age=args.checkpoint_max_age)
     
     try:
         success = wiper.main()
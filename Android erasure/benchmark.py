@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Wipe Pipeline Benchmark - load test for andnr.py and the certificate tools
+Runs the real AndroidDataWiper pipeline against simulated phones (see
+fakeadb.SimulatedTransport), then times certificate verification and PDF
+rendering with the certcore package, and writes everything to one JSON file:
+
+    python3 benchmark.py --devices 16 --concurrency 8 --time-scale 0.02
+    python3 benchmark.py --compare benchmark_results/old.json benchmark_results/new.json
+
+--time-scale shrinks every simulated latency (reboots, key confirmations,
+erase times) so a run finishes in seconds; the scale is recorded with the
+results, and only runs with the same configuration should be compared.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from andnr import AndroidDataWiper
+from blobstore import BlobStore
+from fakeadb import REALISTIC_LATENCY, REALISTIC_PROPERTY_COUNT, FakeDevice, SimulatedTransport
+from metrics import Metrics, percentile
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "windows removal backend")
+RESULTS_VERSION = 1
+
+# Suffixes that tell --compare which direction is better
+HIGHER_IS_BETTER = ("per_second", "per_hour", "succeeded")
+LOWER_IS_BETTER = ("seconds", "bytes", "failed", "failures")
+# Timings below this are scheduler noise and never count as regressions
+NOISE_FLOOR_SECONDS = 0.01
+
+
+def describe(values):
+    return {
+        "count": len(values),
+        "mean_seconds": round(statistics.fmean(values), 4) if values else None,
+        "p50_seconds": round(percentile(values, 50), 4) if values else None,
+        "p95_seconds": round(percentile(values, 95), 4) if values else None,
+        "max_seconds": round(max(values), 4) if values else None,
+    }
+
+
+def wipe_one(wiper):
+    start = time.perf_counter()
+    # Connection check and device info, as FleetWiper.prepare_device does before confirming
+    ok = bool(wiper.prepare())
+    if ok:
+        wiper.open_checkpoint()
+        ok = wiper.run_wipe()
+    return ok, time.perf_counter() - start
+
+
+def directory_bytes(path, suffix=""):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(path) for name in names if name.endswith(suffix))
+
+
+def bench_pipeline(devices=8, concurrency=8, time_scale=0.02, failure_rate=0.0, latency=None,
+                   workdir=None, seed=0, inline_output=False, blob_codec="zlib"):
+    """Wipe simulated devices like a fleet run; returns stage latencies, devices/hour, memory and log size"""
+    workdir = workdir or tempfile.mkdtemp(prefix="zerotrace_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    latency = latency or REALISTIC_LATENCY
+    phones = [FakeDevice(f"BENCH{index:04d}", latency=latency, failure_rate=failure_rate, seed=seed + index,
+                         filler_props=REALISTIC_PROPERTY_COUNT)
+              for index in range(devices)]
+    transport = SimulatedTransport(phones, time_scale=time_scale)
+    metrics = Metrics(window=100_000)
+    blob_dir = os.path.join(workdir, "blobs")
+    blobs = None if inline_output else BlobStore(blob_dir, blob_codec)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    # The wiper narrates every step; the benchmark only wants its own summary
+    with contextlib.redirect_stdout(io.StringIO()):
+        wipers = [AndroidDataWiper(log_file=os.path.join(workdir, f"wipe_log_{phone.serial}.json"),
+                                   serial=phone.serial, adb_path="adb", fastboot_path="fastboot",
+                                   transport=transport, countdown=0, metrics=metrics, blobs=blobs,
+                                   checkpoint_dir=os.path.join(workdir, "checkpoints"))
+                  for phone in phones]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(wipe_one, wipers))
+        wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    stages = {}
+    for wiper in wipers:
+        for stage, seconds in wiper.log_data["stage_durations"].items():
+            stages.setdefault(stage, []).append(seconds)
+    succeeded = sum(1 for ok, _ in outcomes if ok)
+    # A failed erase does not fail the run, so it is counted separately
+    partition_failures = sum(1 for wiper in wipers for result in wiper.log_data.get("wipe_results", [])
+                             if result["status"] == "failed")
+    return {
+        "devices": devices,
+        "concurrency": concurrency,
+        "succeeded": succeeded,
+        "failed": devices - succeeded,
+        "partition_failures": partition_failures,
+        "wall_seconds": round(wall, 3),
+        "devices_per_hour": round(succeeded / wall * 3600, 1) if wall > 0 else None,
+        "device_seconds": describe([seconds for _, seconds in outcomes]),
+        "stages": {stage: describe(values) for stage, values in stages.items()},
+        "commands": {kind: describe(values) for (kind,), values
+                     in sorted(metrics.samples("command_duration_seconds", "command").items())},
+        "log_write_seconds": describe(metrics.samples("log_write_seconds").get((), [])),
+        "log_bytes_per_device": directory_bytes(workdir, ".json") // devices if devices else None,
+        # Event logs are removed once their report is written, so they are measured as written
+        "event_log_bytes_per_device": sum(wiper.event_log_bytes or (wiper.events.bytes_written if wiper.events else 0)
+                                          for wiper in wipers) // devices if devices else None,
+        "blob_bytes": directory_bytes(blob_dir),
+        "blob_count": blobs.disk_usage()[0] if blobs else 0,
+        "peak_traced_bytes": peak,
+        "traced_bytes_per_device": peak // devices if devices else None,
+        "log_dir": workdir,
+    }
+
+
+def synthetic_certificates(count, private_key, canonicalize):
+    """Signed certificates shaped like the server schema built by submit_certificates.py"""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    for index in range(count):
+        certificate = {
+            "certificate_id": f"CERT-BENCH-{index:06d}",
+            "device_info": {"model": "Fake Phone", "serial": f"BENCH{index:04d}", "size_bytes": 118340493312,
+                            "imei": "359760857203935"},
+            "wipe_details": {"method": "Fastboot partition erase/format", "compliance": "NIST SP 800-88 Clear",
+                             "passes": 1, "duration_seconds": 812.5, "hpa_removed": False,
+                             "end_time": datetime.now().isoformat()},
+            "verification": {"method": "random_block_sampling", "result": "passed"},
+        }
+        certificate["signature"] = private_key.sign(canonicalize(certificate), ec.ECDSA(hashes.SHA256())).hex()
+        yield certificate
+
+
+def bench_certificates(count=500, pdf_count=50, workdir=None):
+    """Throughput of batch signature verification and bulk PDF rendering"""
+    workdir = workdir or tempfile.mkdtemp(prefix="zerotrace_certs_")
+    os.makedirs(workdir, exist_ok=True)
+    # Measure real verification, not hits in the persistent cache; set before workers start
+    os.environ["CERTCORE_CACHE"] = "off"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    try:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from certcore import canonicalize
+        from certcore.batch import verify_batch
+    except ModuleNotFoundError as e:
+        return {"error": f"needs the {e.name} package"}
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    key_path = os.path.join(workdir, "public_key.pem")
+    with open(key_path, "wb") as f:
+        f.write(private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                      serialization.PublicFormat.SubjectPublicKeyInfo))
+    cert_dir = os.path.join(workdir, "certs")
+    os.makedirs(cert_dir, exist_ok=True)
+    for certificate in synthetic_certificates(count, private_key, canonicalize):
+        with open(os.path.join(cert_dir, f"{certificate['certificate_id']}.json"), "w") as f:
+            json.dump(certificate, f)
+
+    results = {"certificates": count}
+    for workers in sorted({1, os.cpu_count() or 1}):
+        report = verify_batch(cert_dir, [key_path], workers=workers)
+        results[f"verify_{workers}_workers"] = {
+            "passed": report["passed"],
+            "seconds": report["elapsed_seconds"],
+            "certificates_per_second": report["certificates_per_second"],
+        }
+
+    try:
+        from certcore.pdf import bulk_create
+    except ModuleNotFoundError as e:
+        results["pdf"] = {"error": f"needs the {e.name} package"}
+        return results
+    pdf_source = os.path.join(workdir, "pdf_source")
+    os.makedirs(pdf_source, exist_ok=True)
+    for name in sorted(os.listdir(cert_dir))[:pdf_count]:
+        os.link(os.path.join(cert_dir, name), os.path.join(pdf_source, name))
+    summary = bulk_create(pdf_source, key_path, os.path.join(workdir, "pdfs"), workers=1)
+    results["pdf"] = {
+        "rendered": summary["rendered"],
+        "seconds": summary["elapsed_seconds"],
+        "certificates_per_second": summary["certificates_per_second"],
+    }
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit or None,
+    }
+
+
+def flatten(results, prefix=""):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numbers only"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old, new, threshold=0.10):
+    """Print metric changes between two result files; returns the regressions"""
+    before, after = flatten(old.get("results", {})), flatten(new.get("results", {}))
+    if old.get("config") != new.get("config"):
+        print("Warning: the runs used different configurations; differences may not be regressions")
+    regressions = []
+    print(f"{'metric':<58} {'before':>12} {'after':>12} {'change':>8}")
+    for name in sorted(before.keys() & after.keys()):
+        old_value, new_value = before[name], after[name]
+        if not old_value or name.endswith((".count", "devices", "concurrency", "certificates", "rendered", "passed")):
+            continue
+        if name.endswith("seconds") and max(old_value, new_value) < NOISE_FLOOR_SECONDS:
+            continue
+        change = (new_value - old_value) / abs(old_value)
+        better_higher = name.endswith(HIGHER_IS_BETTER)
+        worse = (change < -threshold) if better_higher else (
+            change > threshold and name.endswith(LOWER_IS_BETTER))
+        marker = "  REGRESSION" if worse else ""
+        if worse:
+            regressions.append(name)
+        print(f"{name:<58} {old_value:>12} {new_value:>12} {change:>+8.1%}{marker}")
+    return regressions
+
+
+def print_results(results):
+    pipeline = results.get("pipeline")
+    if pipeline:
+        print(f"Pipeline: {pipeline['succeeded']}/{pipeline['devices']} devices in {pipeline['wall_seconds']}s "
+              f"at concurrency {pipeline['concurrency']} -> {pipeline['devices_per_hour']} devices/hour "
+              f"({pipeline['partition_failures']} partition wipes failed)")
+        print(f"Memory: {pipeline['traced_bytes_per_device'] / 1024:.0f} KiB traced per device")
+        print(f"Logs: {pipeline['log_bytes_per_device'] / 1024:.1f} KiB JSON + "
+              f"{pipeline['event_log_bytes_per_device'] / 1024:.1f} KiB events per device, "
+              f"{pipeline['blob_bytes'] / 1024:.1f} KiB in {pipeline['blob_count']} blobs; "
+              f"p50 log write {pipeline['log_write_seconds']['p50_seconds']}s")
+        print(f"{'stage':<24} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+        for name, stats in [*pipeline["stages"].items(), *pipeline["commands"].items()]:
+            print(f"{name:<24} {stats['p50_seconds']:>8} {stats['p95_seconds']:>8} {stats['max_seconds']:>8}")
+    certificates = results.get("certificates")
+    if certificates:
+        if "error" in certificates:
+            print(f"Certificates: skipped, {certificates['error']}")
+            return
+        for key, value in certificates.items():
+            if key.startswith("verify_"):
+                print(f"Verify ({key[7:].replace('_', ' ')}): {value['certificates_per_second']} certificates/s")
+        pdf = certificates.get("pdf", {})
+        print(f"PDF: {pdf.get('certificates_per_second', pdf.get('error'))} certificates/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the wipe pipeline and certificate tools on fake devices")
+    parser.add_argument("--devices", type=int, default=16, help="Simulated devices to wipe (default: 16)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Devices wiped at once (default: 8)")
+    parser.add_argument("--time-scale", type=float, default=0.02,
+                        help="Multiplier on every simulated latency (default: 0.02)")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Fraction of erase/format commands that fail (default: 0)")
+    parser.add_argument("--latency", metavar="KEY=SECONDS", nargs="+", default=[],
+                        help=f"Override simulated latencies, e.g. reboot=20 ({', '.join(REALISTIC_LATENCY)})")
+    parser.add_argument("--inline-output", action="store_true",
+                        help="Keep command output in the logs instead of the blob store, to compare log size")
+    parser.add_argument("--blob-codec", choices=["zlib", "lzma"], default="zlib", help="Blob compression (default: zlib)")
+    parser.add_argument("--certificates", type=int, default=500, help="Certificates to verify (default: 500)")
+    parser.add_argument("--pdfs", type=int, default=50, help="Certificates to render to PDF (default: 50)")
+    parser.add_argument("--skip-pipeline", action="store_true", help="Only benchmark the certificate tools")
+    parser.add_argument("--skip-certificates", action="store_true", help="Only benchmark the wipe pipeline")
+    parser.add_argument("--output-dir", default="benchmark_results", help="Where to write the JSON results")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD_JSON", "NEW_JSON"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression by --compare (default: 0.10)")
+
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], "r") as f:
+            old = json.load(f)
+        with open(args.compare[1], "r") as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.threshold)
+        print(f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    latency = dict(REALISTIC_LATENCY)
+    for item in args.latency:
+        key, _, value = item.partition("=")
+        if key not in latency:
+            parser.error(f"unknown latency {key}; choose from {', '.join(latency)}")
+        latency[key] = float(value)
+
+    config = {
+        "devices": args.devices,
+        "concurrency": args.concurrency,
+        "time_scale": args.time_scale,
+        "failure_rate": args.failure_rate,
+        "latency": latency,
+        "inline_output": args.inline_output,
+        "blob_codec": args.blob_codec,
+        "certificates": args.certificates,
+        "pdfs": args.pdfs,
+    }
+    workdir = tempfile.mkdtemp(prefix="zerotrace_bench_")
+    results = {}
+    if not args.skip_pipeline:
+        print(f"Wiping {args.devices} simulated devices, {args.concurrency} at a time...")
+        results["pipeline"] = bench_pipeline(args.devices, args.concurrency, args.time_scale, args.failure_rate,
+                                             latency, os.path.join(workdir, "logs"),
+                                             inline_output=args.inline_output, blob_codec=args.blob_codec)
+    if not args.skip_certificates:
+        print(f"Verifying {args.certificates} certificates and rendering {args.pdfs} PDFs...")
+        results["certificates"] = bench_certificates(args.certificates, args.pdfs, os.path.join(workdir, "certs"))
+
+    output = {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "command": shlex.join(sys.argv),
+        "environment": environment(),
+        "config": config,
+        "results": results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, "w") as f:
+        json.dump(output, f, indent=2)
+    print_results(results)
+    print(f"Results written to {output_path}")
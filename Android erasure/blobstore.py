@@ -0,0 +1,103 @@
+"""
+Command Output Blob Store - compressed, content-addressed andnr.py command output
+Long stdout/stderr is written once under the SHA-256 of its text and the wipe
+log keeps only the reference; load_log() reads a log back with every output
+expanded.
+"""
+
+import hashlib
+import json
+import lzma
+import os
+import threading
+import zlib
+
+
+# Command output shorter than this stays inline in the log; a blob reference is about as long
+BLOB_INLINE_LIMIT = 96
+# Codec name -> (file suffix, compress, decompress)
+BLOB_CODECS = {
+    "zlib": (".z", lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (".xz", lzma.compress, lzma.decompress),
+}
+OUTPUT_FIELDS = ("stdout", "stderr")
+
+
+class BlobStore:
+    """Content-addressed, compressed store for command output, shared by every log that points into it.
+    
+    Blobs are named by the SHA-256 of the uncompressed text, so the banner or
+    getprop dump repeated on every device and every run is kept once.
+    """
+    
+    def __init__(self, root="command_blobs", codec="zlib"):
+        self.root = os.path.abspath(root)
+        self.codec = codec
+        self.known = set()
+        self.lock = threading.Lock()
+    
+    def path(self, digest, codec):
+        return os.path.join(self.root, digest[:2], digest[2:] + BLOB_CODECS[codec][0])
+    
+    def put(self, text):
+        """Store text once and return its reference, 'sha256:<hex>'"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            if digest in self.known:
+                return f"sha256:{digest}"
+        if not any(os.path.exists(self.path(digest, codec)) for codec in BLOB_CODECS):
+            path = self.path(digest, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique temporary name: another wiper may be writing the same blob right now
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(BLOB_CODECS[self.codec][1](data))
+            os.replace(tmp_path, path)
+        with self.lock:
+            self.known.add(digest)
+        return f"sha256:{digest}"
+    
+    def get(self, ref):
+        digest = ref.split(":", 1)[1]
+        for codec, (_, _, decompress) in BLOB_CODECS.items():
+            try:
+                with open(self.path(digest, codec), "rb") as f:
+                    return decompress(f.read()).decode("utf-8")
+            except FileNotFoundError:
+                continue
+        raise FileNotFoundError(f"Blob {ref} not found in {self.root}")
+    
+    def disk_usage(self):
+        """(blob count, bytes on disk)"""
+        count = size = 0
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                count += 1
+                size += os.path.getsize(os.path.join(folder, name))
+        return count, size
+
+
+def rehydrate(entry, blobs):
+    """Replace stdout_blob/stderr_blob references in a command or step entry with the text"""
+    for name in OUTPUT_FIELDS:
+        ref = entry.pop(f"{name}_blob", None)
+        if ref:
+            entry[name] = blobs.get(ref)
+    return entry
+
+
+def load_log(path, blob_dir=None):
+    """Read a wipe log with every command output expanded from the blob store it was written with"""
+    with open(path, encoding="utf-8") as f:
+        log = json.load(f)
+    blob_dir = blob_dir or (log.get("settings") or {}).get("blob_dir")
+    if not blob_dir:
+        return log
+    blobs = BlobStore(blob_dir)
+    for command in log.get("commands_executed") or []:
+        rehydrate(command, blobs)
+    for step in log.get("steps") or []:
+        if isinstance(step.get("details"), dict):
+            rehydrate(step["details"], blobs)
+    return log
@@ -53,14 +53,22 @@ mongoose.connect(MONGO_URI)
   .catch(err => console.error('❌ Could not connect to MongoDB', err));
 
 // --- SCHEMAS ---
+// A record is inserted as pending before anything is pinned or minted, and completed afterwards.
+// minted_unrecorded marks an NFT that exists on chain but whose record could not be completed.
+function isComplete() {
+  return this.status !== 'pending';
+}
+
 const certificateSchema = new mongoose.Schema({
   certificateId: { type: String, required: true, unique: true },
-  jsonCid: { type: String, required: true },
-  pdfCid: { type: String, required: true },
-  transactionId: { type: String, required: true },
+  jsonCid: { type: String, required: isComplete },
+  pdfCid: { type: String, required: isComplete },
+  transactionId: { type: String, required: isComplete },
   deviceModel: String,
   deviceImei: { type: String, required: true, index: true }, // IMEI for tracking
   deviceSerial: String,
+  idempotencyKey: { type: String, unique: true, sparse: true }, // Set by submission clients that retry
+  status: { type: String, enum: ['pending', 'complete', 'minted_unrecorded'], default: 'complete' },
   timestamp: { type: Date, default: Date.now },
 });
 
@@ -343,7 +351,25 @@ app.get('/api/certificates/:id', async (req, res) => {
     }
 });
 
+// Mongo's duplicate key error, raised when an Idempotency-Key is already claimed
+const DUPLICATE_KEY = 11000;
+
+// Answer for a key whose NFT was minted but not recorded: not retryable, an operator has to finish it
+function mintedUnrecorded(res, record) {
+  return res.status(422).json({
+    success: false,
+    message: `Certificate ${record.certificateId} was minted (transaction ${record.transactionId}) but its record could not be saved; it needs an operator.`,
+    certificateId: record.certificateId,
+    transactionId: record.transactionId,
+  });
+}
+
 app.post('/api/certificates/process', async (req, res) => {
+  // A retried submission carries the same Idempotency-Key; answer it with the first result instead of minting again
+  const idempotencyKey = req.get('Idempotency-Key');
+  let record = null;
+  let minted = null; // { jsonCid, pdfCid, transactionId } once the NFT exists
+  let recorded = false;
   try {
     const uniqueId = `CERT-${Date.now()}-${Math.random().toString(36).substring(2, 6).toUpperCase()}`;
     const { userEmail, ...certificatePayload } = req.body; // Extract email from request
@@ -355,6 +381,38 @@ app.post('/api/certificates/process', async (req, res) => {
       return res.status(400).json({ success: false, message: 'IMEI is required for device tracking.' });
     }
     
+    // Claim the key in the database before minting, so neither a failed save nor a restart can mint twice
+    try {
+      record = await Certificate.create({
+        certificateId: uniqueId,
+        deviceModel: certificateData.device_info.model,
+        deviceImei: imei,
+        deviceSerial: certificateData.device_info.serial,
+        idempotencyKey: idempotencyKey || undefined,
+        status: 'pending',
+      });
+    } catch (error) {
+      if (error.code !== DUPLICATE_KEY || !idempotencyKey) {
+        throw error;
+      }
+      const existing = await Certificate.findOne({ idempotencyKey });
+      if (existing && existing.status === 'complete') {
+        return res.status(200).json({
+          success: true,
+          replayed: true,
+          message: 'Certificate already processed.',
+          certificateId: existing.certificateId,
+          jsonCid: existing.jsonCid,
+          pdfCid: existing.pdfCid,
+          transactionId: existing.transactionId,
+        });
+      }
+      if (existing && existing.status === 'minted_unrecorded') {
+        return mintedUnrecorded(res, existing);
+      }
+      return res.status(409).json({ success: false, message: 'A request with this Idempotency-Key is still being processed.' });
+    }
+    
     const pdfBuffer = await generateCertificatePdf(certificateData);
     
     const jsonCid = await uploadJsonToIpfs(certificateData, `${uniqueId}.json`);
@@ -363,21 +421,15 @@ app.post('/api/certificates/process', async (req, res) => {
 
     // Enhanced minting with device data
     const transactionId = await mintNftWithDeviceData(jsonCid, imei, certificateData.device_info.model);
+    minted = { jsonCid, pdfCid, transactionId };
     console.log(`✅ NFT Minted with device tracking! Transaction ID: ${transactionId}`);
 
     // Update device tracking in MongoDB
     const deviceRecord = await updateDeviceTracking(imei, certificateData, uniqueId, transactionId);
 
-    const newRecord = new Certificate({
-      certificateId: uniqueId,
-      jsonCid: jsonCid,
-      pdfCid: pdfCid,
-      transactionId: transactionId,
-      deviceModel: certificateData.device_info.model,
-      deviceImei: imei,
-      deviceSerial: certificateData.device_info.serial,
-    });
-    await newRecord.save();
+    record.set({ jsonCid, pdfCid, transactionId, status: 'complete' });
+    await record.save();
+    recorded = true;
     console.log('✅ Certificate record saved successfully.');
     
     // Send email if provided
@@ -409,6 +461,19 @@ app.post('/api/certificates/process', async (req, res) => {
     });
   } catch (error) {
     console.error('Error processing certificate:', error.message);
+    if (record && !minted) {
+      // Nothing irreversible happened yet, so a retry may start over
+      await Certificate.deleteOne({ _id: record._id }).catch(err => console.error('Could not release pending certificate:', err.message));
+    } else if (record && !recorded) {
+      // Minted but not recorded: never mint again for this key, and tell retries to stop instead of 409ing forever
+      console.error(`❌ Certificate ${record.certificateId} was minted (transaction ${minted.transactionId}) but its record could not be saved`);
+      try {
+        await Certificate.updateOne({ _id: record._id }, { ...minted, status: 'minted_unrecorded' });
+      } catch (err) {
+        console.error(`❌ Could not mark certificate ${record.certificateId} as minted_unrecorded; it stays pending:`, err.message);
+      }
+      return mintedUnrecorded(res, { certificateId: record.certificateId, transactionId: minted.transactionId });
+    }
     res.status(500).json({ success: false, message: 'An internal server error occurred.' });
   }
 });
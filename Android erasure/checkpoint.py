@@ -0,0 +1,120 @@
+"""
+Wipe Checkpoints - how far each device's andnr.py wipe got
+One JSON file per serial, replaced atomically on every pipeline transition,
+so an interrupted wipe resumes where it stopped instead of starting over,
+and only under the authorization it was started with.
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+
+# Pipeline states in order; a checkpoint records the last one a device reached
+WIPE_STATES = ("connected", "bootloader", "unlocked", "wiped", "verified", "locked", "rebooted")
+
+# Hours after its last authorization that an interrupted wipe may still be resumed
+CHECKPOINT_MAX_AGE_HOURS = 24
+
+
+def checkpoint_path(checkpoint_dir, serial):
+    """Return the checkpoint file for a device serial"""
+    return os.path.join(checkpoint_dir, re.sub(r"[^A-Za-z0-9._-]", "_", serial) + ".checkpoint.json")
+
+
+class Checkpoint:
+    """Durable record of how far a device's wipe got, rewritten atomically on every transition"""
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, checkpoint_dir, serial, log_file, device_info, authorization=None, event_log=None):
+        return cls(checkpoint_path(checkpoint_dir, serial), {
+            "serial": serial,
+            "state": None,
+            "started_at": datetime.now().isoformat(),
+            "updated_at": None,
+            "log_file": log_file,
+            "event_log": event_log,
+            "device_info": device_info,
+            "authorization": authorization,
+            "wipe_plan": None,
+            "wipe_results": [],
+        })
+
+    @classmethod
+    def load(cls, checkpoint_dir, serial):
+        """Return the saved checkpoint for serial, or None if there is no usable one"""
+        path = checkpoint_path(checkpoint_dir, serial)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("state") not in WIPE_STATES:
+            return None
+        return cls(path, data)
+
+    @property
+    def state(self):
+        return self.data["state"]
+
+    def reached(self, state):
+        """True if the pipeline already got to state"""
+        return self.state is not None and WIPE_STATES.index(self.state) >= WIPE_STATES.index(state)
+
+    def wiped(self, partition, action):
+        return any(entry["partition"] == partition and entry["action"] == action
+                   for entry in self.data["wipe_results"])
+
+    def authorized_at(self):
+        """When the wipe was last authorized, or None if the checkpoint records no usable authorization"""
+        authorization = self.data.get("authorization") or {}
+        if authorization.get("decision") not in ("authorized", "confirmed"):
+            return None
+        try:
+            moment = datetime.fromisoformat(authorization["checked_at"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return moment if moment.tzinfo else moment.astimezone()
+
+    def expired(self, max_age_hours):
+        authorized_at = self.authorized_at()
+        return authorized_at is None or datetime.now().astimezone() - authorized_at > timedelta(hours=max_age_hours)
+
+    def refusal(self, operator, job_id, max_age_hours):
+        """Why this checkpoint may not be resumed by operator under job_id, or None if it may"""
+        authorization = self.data.get("authorization") or {}
+        if self.authorized_at() is None:
+            return "Checkpoint records no authorization for the interrupted wipe"
+        if self.expired(max_age_hours):
+            return (f"Checkpoint authorization from {authorization['checked_at']} is older than "
+                    f"{max_age_hours:g} hours")
+        if authorization.get("operator") != operator:
+            return f"Checkpoint was authorized for operator {authorization.get('operator')}, not {operator}"
+        if job_id and authorization.get("job_id") not in (None, job_id):
+            return f"Checkpoint belongs to job {authorization['job_id']}, not {job_id}"
+        return None
+
+    def save(self, **fields):
+        """Update fields and replace the file in one rename, so a crash leaves the old or new version"""
+        with self.lock:
+            self.data.update(fields, updated_at=datetime.now().isoformat())
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
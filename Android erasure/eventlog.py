@@ -0,0 +1,112 @@
+"""
+Wipe Event Log - append-only JSONL record of an andnr.py wipe run
+Steps and commands are appended as they happen and state snapshots as
+fields change, so a crash loses at most the last line. compact_event_log()
+turns the events back into the JSON report that andnr.py's save_log()
+writes.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+# Fields streamed as individual events rather than as part of the state snapshot
+STREAMED_FIELDS = ("steps", "commands_executed")
+
+
+def event_log_path(log_file, run_id=None):
+    """Return the JSONL event log that accompanies a JSON report, one per run when run_id is given"""
+    root, ext = os.path.splitext(log_file)
+    base = root if ext == ".json" else log_file
+    return f"{base}.{run_id}.events.jsonl" if run_id else f"{base}.events.jsonl"
+
+
+def dump_json(value, indent=None, prefix=""):
+    """Encode value the way every log writer here does, non-ASCII kept; continuation lines start with prefix"""
+    text = json.dumps(value, indent=indent, ensure_ascii=False)
+    return text.replace("\n", "\n" + prefix) if prefix else text
+
+
+class EventLog:
+    """Append-only JSONL sink for one wipe run, fsynced at step boundaries"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # Never truncate: an earlier run's events are all that is left of it if it crashed
+        self.file = open(path, "a", encoding="utf-8")
+        self.bytes_written = 0
+    
+    def append(self, event, data, sync=False):
+        line = dump_json({"event": event, "data": data})
+        with self.lock:
+            self.file.write(line + "\n")
+            self.bytes_written += len(line) + 1
+            if sync:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+    
+    def sync(self):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+    
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_events(path):
+    """Yield (event, data) pairs, ignoring a torn last line left by a crash"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            yield record["event"], record["data"]
+
+
+def compact_event_log(events_path, output_path):
+    """Rebuild the JSON report from an event log in one pass, without holding the streamed fields in memory"""
+    state = None
+    # Streamed entries are encoded as they are read and spooled to disk until the report is written
+    spools = {key: tempfile.TemporaryFile("w+", encoding="utf-8") for key in STREAMED_FIELDS}
+    counts = dict.fromkeys(STREAMED_FIELDS, 0)
+    fields = {"step": "steps", "command": "commands_executed"}
+    try:
+        for event, data in read_events(events_path):
+            if event == "state":
+                # The first snapshot holds every field, later ones only the fields that changed
+                if state is None:
+                    state = data
+                else:
+                    state.update(data)
+            elif event in fields:
+                key = fields[event]
+                spools[key].write(",\n    " if counts[key] else "[\n    ")
+                spools[key].write(dump_json(data, indent=2, prefix="    "))
+                counts[key] += 1
+        if state is None:
+            raise ValueError(f"No state snapshot in {events_path}")
+        
+        with open(output_path, "w", encoding="utf-8") as out:
+            out.write("{")
+            for index, key in enumerate(state):
+                out.write(",\n" if index else "\n")
+                out.write(f"  {json.dumps(key)}: ")
+                if key not in STREAMED_FIELDS:
+                    out.write(dump_json(state[key], indent=2, prefix="  "))
+                elif counts[key]:
+                    spools[key].seek(0)
+                    shutil.copyfileobj(spools[key], out)
+                    out.write("\n  ]")
+                else:
+                    out.write("[]")
+            out.write("\n}")
+    finally:
+        for spool in spools.values():
+            spool.close()
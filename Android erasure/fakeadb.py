@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Fake ADB Server - offline stand-in for the adb server socket protocol
+Serves a set of simulated devices on localhost so the wiper's adb-server
+transport can be exercised without real phones:
+
+    python3 fakeadb.py --port 5038 --devices 3
+    python3 andnr.py --transport adb-server --adb-server 127.0.0.1:5038 ...
+
+The same devices also answer fastboot. SimulatedTransport runs a whole wipe
+in-process against them, with per-operation latencies, injected failures and
+a configurable partition layout; benchmark.py is built on it.
+"""
+
+import argparse
+import hashlib
+import random
+import shlex
+import socketserver
+import struct
+import subprocess
+import threading
+import time
+
+# Partition layout reported by 'fastboot getvar all': name -> (type, size in bytes, logical)
+DEFAULT_PARTITIONS = {
+    "userdata": ("f2fs", 118340493312, False),
+    "metadata": ("ext4", 16 * 1024 ** 2, False),
+    "persist": ("ext4", 32 * 1024 ** 2, False),
+    "boot_a": ("raw", 96 * 1024 ** 2, False),
+    "boot_b": ("raw", 96 * 1024 ** 2, False),
+    "system_a": ("ext4", 4 * 1024 ** 3, True),
+    "system_b": ("ext4", 4 * 1024 ** 3, True),
+    "super": ("raw", 9 * 1024 ** 3, False),
+}
+
+# Seconds per simulated operation; every key defaults to 0 so the adb server stays instant
+LATENCY_KEYS = ("adb", "shell", "getvar", "command", "reboot", "confirm", "erase_per_gb", "format_per_gb")
+
+# Rough figures from a USB 3 bench with mid-range phones
+REALISTIC_LATENCY = {
+    "adb": 0.02,            # adb host round-trip (devices, get-state)
+    "shell": 0.15,          # one adb shell invocation
+    "getvar": 0.05,
+    "command": 0.05,        # any other fastboot command
+    "reboot": 8.0,          # until the device shows up in its new mode
+    "confirm": 3.0,         # operator pressing volume/power to accept unlock or lock
+    "erase_per_gb": 0.02,   # erase is a discard
+    "format_per_gb": 0.25,  # format writes a fresh filesystem
+}
+
+# A shipping build reports several hundred properties from a bare getprop
+REALISTIC_PROPERTY_COUNT = 700
+
+
+def filler_properties(count):
+    """Stable vendor/persist properties that pad getprop output to a realistic size"""
+    families = ("ro.vendor", "persist.vendor", "vendor.camera", "ro.boot", "dalvik.vm", "init.svc")
+    return {f"{families[index % len(families)]}.fake_property_{index}": f"value-{index % 13}"
+            for index in range(count)}
+
+
+# Bootloader command families a device accepts for unlock and lock
+UNLOCK_FAMILIES = ("flashing", "oem")
+
+
+def fake_imei(serial):
+    """A stable, Luhn-valid IMEI derived from the serial"""
+    body = "35" + str(int(hashlib.sha256(serial.encode()).hexdigest(), 16))[:12]
+    total = sum(int(char) if index % 2 == 0 else sum(divmod(int(char) * 2, 10))
+                for index, char in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def parcel_string(value):
+    """Format a String16 reply the way 'service call' prints a Parcel"""
+    codes = [ord(char) for char in value] + [0] * (2 - len(value) % 2)
+    words = ["00000000", f"{len(value):08x}"] + [f"{high:04x}{low:04x}" for low, high in zip(codes[::2], codes[1::2])]
+    lines = [f"  0x{offset * 4:08x}: " + " ".join(words[offset:offset + 4])
+             for offset in range(0, len(words), 4)]
+    return "Result: Parcel(\n" + "\n".join(lines) + ")\n"
+
+
+class FakeDevice:
+    """A simulated phone with a property table, an adb state and a fastboot bootloader"""
+
+    def __init__(self, serial, state="device", props=None, data_kb=115566888, imei=None,
+                 partitions=None, latency=None, failure_rate=0.0, unlock_families=UNLOCK_FAMILIES,
+                 unlocked=False, seed=None, filler_props=0):
+        self.serial = serial
+        self.state = state
+        self.data_kb = data_kb
+        self.imei = imei or fake_imei(serial)
+        self.partitions = dict(DEFAULT_PARTITIONS if partitions is None else partitions)
+        self.latency = dict.fromkeys(LATENCY_KEYS, 0.0)
+        self.latency.update(latency or {})
+        self.failure_rate = failure_rate
+        self.unlock_families = unlock_families
+        self.unlocked = unlocked
+        self.random = random.Random(seed if seed is not None else serial)
+        # Scales every latency; set by SimulatedTransport
+        self.time_scale = 1.0
+        # (state, monotonic deadline) of a reboot or key confirmation in progress
+        self.transition = None
+        self.lock_change = None
+        self.lock = threading.Lock()
+        self.erased = []
+        self.props = {
+            "ro.product.model": "Fake Phone",
+            "ro.product.manufacturer": "ZeroTrace",
+            "ro.build.version.release": "14",
+            "ro.serialno": serial,
+            "ro.product.name": "fake_phone",
+            "ro.build.id": "FAKE.240101.001",
+            "ro.build.version.incremental": "1",
+            "ro.hardware": "fake",
+            "ro.board.platform": "fake",
+            "ro.build.version.security_patch": "2024-01-05",
+            "ro.bootloader": "fake-1.0",
+            "ro.crypto.state": "encrypted",
+            "ro.crypto.type": "file",
+        }
+        self.props.update(filler_properties(filler_props))
+        self.props.update(props or {})
+
+    def run_shell(self, command):
+        """Interpret the small subset of shell the wiper sends; returns (stdout, stderr, exit code)"""
+        stdout, stderr, code = [], [], 0
+        for part in command.split(";"):
+            argv = shlex.split(part.split("2>")[0])
+            if not argv:
+                continue
+            if argv[0] == "getprop" and len(argv) == 1:
+                stdout.extend(f"[{key}]: [{value}]\n" for key, value in sorted(self.props.items()))
+            elif argv[0] == "getprop":
+                stdout.append(self.props.get(argv[1], "") + "\n")
+            elif argv[:3] == ["service", "call", "iphonesubinfo"]:
+                stdout.append(parcel_string(self.imei))
+            elif argv[0] == "echo":
+                stdout.append(" ".join(argv[1:]) + "\n")
+            elif argv[0] == "df":
+                used = self.data_kb // 10
+                stdout.append("Filesystem      1K-blocks    Used Available Use% Mounted on\n")
+                stdout.append(f"/dev/block/dm-5 {self.data_kb} {used} {self.data_kb - used}  10% /data\n")
+            else:
+                stderr.append(f"/system/bin/sh: {argv[0]}: inaccessible or not found\n")
+                code = 127
+        return "".join(stdout), "".join(stderr), code
+
+    def settle(self):
+        """Apply transitions whose time has come; call with self.lock held"""
+        now = time.monotonic()
+        if self.transition and now >= self.transition[1]:
+            self.state, self.transition = self.transition[0], None
+        if self.lock_change and now >= self.lock_change[1]:
+            self.unlocked, self.lock_change = self.lock_change[0], None
+
+    def mode(self):
+        """Current state; 'rebooting' while the device is between modes"""
+        with self.lock:
+            self.settle()
+            return "rebooting" if self.transition else self.state
+
+    def reboot(self, target="device"):
+        with self.lock:
+            delay = self.latency["reboot"] * self.time_scale
+            if delay <= 0:
+                self.state = target
+            else:
+                self.transition = (target, time.monotonic() + delay)
+
+    def change_lock(self, unlocked):
+        # The bootloader reports the new state once the operator has confirmed on the device
+        with self.lock:
+            self.lock_change = (unlocked, time.monotonic() + self.latency["confirm"] * self.time_scale)
+            self.settle()
+
+    def getvar_all(self):
+        lines = []
+        for name, (fs_type, size, logical) in sorted(self.partitions.items()):
+            lines.append(f"(bootloader) partition-type:{name}:{fs_type}")
+            lines.append(f"(bootloader) partition-size:{name}:0x{size:x}")
+            lines.append(f"(bootloader) is-logical:{name}:{'yes' if logical else 'no'}")
+        slotted = sorted({name[:-2] for name in self.partitions if name[-2:] in ("_a", "_b")})
+        lines.extend(f"(bootloader) has-slot:{name}:yes" for name in slotted)
+        lines.append(f"(bootloader) slot-count:{2 if slotted else 0}")
+        if slotted:
+            lines.append("(bootloader) current-slot:a")
+        lines.append(f"(bootloader) unlocked:{'yes' if self.unlocked else 'no'}")
+        lines.append("all: Done!!")
+        return "\n".join(lines) + "\n"
+
+    def run_fastboot(self, args, input=None):
+        """Interpret one fastboot command; returns (stdout, stderr, exit code, seconds it takes)"""
+        cost = self.latency["command"]
+        with self.lock:
+            self.settle()
+            unlocked = self.unlocked
+        if args[:2] == ["getvar", "unlocked"]:
+            return "", f"unlocked: {'yes' if unlocked else 'no'}\nFinished. Total time: 0.001s\n", 0, self.latency["getvar"]
+        if args[:2] == ["getvar", "all"]:
+            return "", self.getvar_all() + "Finished. Total time: 0.050s\n", 0, self.latency["getvar"]
+        if args[:1] in (["flashing"], ["oem"]) and args[1:2] in (["unlock"], ["lock"]):
+            if args[0] not in self.unlock_families:
+                return "", "FAILED (remote: 'unknown command')\n", 1, cost
+            self.change_lock(args[1] == "unlock")
+            return "", "OKAY [  0.040s]\nFinished. Total time: 0.040s\n", 0, cost
+        if args[:1] in (["erase"], ["format"]) and len(args) > 1:
+            return self.wipe(args[0], args[-1])
+        if args[:1] == ["reboot"]:
+            self.reboot("bootloader" if args[1:2] == ["bootloader"] else "device")
+            return "", "Rebooting\nFinished. Total time: 0.001s\n", 0, cost
+        return "", f"fastboot: usage: unknown command {' '.join(args)}\n", 1, cost
+
+    def wipe(self, action, partition):
+        if partition not in self.partitions:
+            return "", f"FAILED (remote: 'Partition {partition} not found')\n", 1, self.latency["command"]
+        fs_type, size, logical = self.partitions[partition]
+        if not self.unlocked:
+            return "", f"FAILED (remote: '{action.capitalize()} is not allowed in Lock State')\n", 1, self.latency["command"]
+        if logical:
+            return "", f"FAILED (remote: 'cannot {action} logical partition {partition} from the bootloader')\n", 1, \
+                self.latency["command"]
+        cost = self.latency["command"] + self.latency[f"{action}_per_gb"] * size / 1024 ** 3
+        with self.lock:
+            failed = self.random.random() < self.failure_rate
+        if failed:
+            return "", f"FAILED (remote: 'failed to {action} partition')\n", 1, cost
+        with self.lock:
+            self.erased.append((action, partition))
+        return "", f"{action.capitalize()}ing '{partition}' OKAY [{cost:.3f}s]\nFinished. Total time: {cost:.3f}s\n", 0, cost
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    """Speaks the host side of the adb server protocol for one client connection"""
+
+    def handle(self):
+        try:
+            request = self.read_request()
+            if request.startswith("host:transport"):
+                device = self.select_device(request)
+                if device is None:
+                    return self.fail("device not found")
+                self.okay()
+                return self.handle_device_service(device, self.read_request())
+            return self.handle_host_service(request)
+        except ConnectionError:
+            return None
+
+    def read_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client closed connection")
+            data += chunk
+        return data
+
+    def read_request(self):
+        length = int(self.read_exact(4), 16)
+        return self.read_exact(length).decode("utf-8")
+
+    def okay(self, message=None):
+        self.request.sendall(b"OKAY")
+        if message is not None:
+            self.send_message(message)
+
+    def fail(self, message):
+        self.request.sendall(b"FAIL")
+        self.send_message(message)
+
+    def send_message(self, message):
+        payload = message.encode("utf-8")
+        self.request.sendall(b"%04x" % len(payload) + payload)
+
+    def select_device(self, request):
+        devices = self.server.adb_visible_devices()
+        if request == "host:transport-any":
+            return devices[0] if len(devices) == 1 else None
+        serial = request[len("host:transport:"):]
+        return next((device for device in devices if device.serial == serial), None)
+
+    def handle_host_service(self, request):
+        if request == "host:version":
+            return self.okay("0029")
+        if request == "host:devices":
+            return self.okay("".join(f"{device.serial}\t{device.state}\n"
+                                     for device in self.server.adb_visible_devices()))
+        if request.endswith(":get-state"):
+            devices = self.server.adb_visible_devices()
+            if request.startswith("host-serial:"):
+                serial = request[len("host-serial:"):-len(":get-state")]
+                devices = [device for device in devices if device.serial == serial]
+            if len(devices) != 1:
+                return self.fail("device not found" if not devices else "more than one device")
+            return self.okay(devices[0].state)
+        return self.fail(f"unknown host service {request}")
+
+    def handle_device_service(self, device, request):
+        if request.startswith("shell,v2,raw:"):
+            stdout, stderr, code = device.run_shell(request[len("shell,v2,raw:"):])
+            self.okay()
+            for packet_id, data in ((1, stdout.encode()), (2, stderr.encode()), (3, bytes([code]))):
+                if data:
+                    self.request.sendall(struct.pack("<BI", packet_id, len(data)) + data)
+            return None
+        if request.startswith("shell:"):
+            stdout, stderr, _ = device.run_shell(request[len("shell:"):])
+            self.okay()
+            self.request.sendall((stdout + stderr).encode())
+            return None
+        if request.startswith("reboot:"):
+            self.okay()
+            target = request[len("reboot:"):]
+            device.reboot("bootloader" if target in ("bootloader", "fastboot") else "device")
+            return None
+        return self.fail(f"unknown device service {request}")
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """Threaded fake adb server; port 0 picks a free port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, devices, host="127.0.0.1", port=0):
+        super().__init__((host, port), FakeAdbHandler)
+        self.devices = {device.serial: device for device in devices}
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def adb_visible_devices(self):
+        # Devices sitting in the bootloader are only visible to fastboot
+        return [device for device in self.devices.values() if device.mode() not in ("bootloader", "rebooting")]
+
+    def start(self):
+        """Serve in a background thread and return self"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class SimulatedTransport:
+    """In-process adb and fastboot for a set of FakeDevices, with latencies scaled by time_scale"""
+
+    name = "simulated"
+
+    def __init__(self, devices, time_scale=1.0, host_latency=0.0):
+        self.devices = {device.serial: device for device in devices}
+        self.time_scale = time_scale
+        # Seconds for commands the host answers alone, such as 'adb devices'
+        self.host_latency = host_latency
+        for device in devices:
+            device.time_scale = time_scale
+
+    def run(self, argv, input=None, timeout=120):
+        tool = argv[0].replace("\\", "/").rsplit("/", 1)[-1].split(".")[0]
+        args = list(argv[1:])
+        serial = None
+        if args[:1] == ["-s"]:
+            serial, args = args[1], args[2:]
+        if tool == "fastboot":
+            stdout, stderr, code, cost = self.fastboot(serial, args, input)
+        else:
+            stdout, stderr, code, cost = self.adb(serial, args)
+        delay = cost * self.time_scale
+        if delay > timeout:
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired(argv, timeout)
+        if delay > 0:
+            time.sleep(delay)
+        return subprocess.CompletedProcess(argv, code, stdout, stderr)
+
+    def select(self, serial, modes):
+        devices = [device for device in self.devices.values()
+                   if (serial is None or device.serial == serial) and device.mode() in modes]
+        return devices[0] if len(devices) == 1 else None
+
+    def adb(self, serial, args):
+        if args[:1] == ["devices"]:
+            lines = [f"{device.serial}\t{device.mode()}" for device in self.devices.values()
+                     if device.mode() not in ("bootloader", "rebooting")]
+            return "List of devices attached\n" + "".join(f"{line}\n" for line in lines) + "\n", "", 0, \
+                self.host_latency
+        device = self.select(serial, ("device", "recovery", "sideload"))
+        if device is None:
+            return "", f"error: device '{serial}' not found\n", 1, self.host_latency
+        cost = device.latency["adb"]
+        if args[:1] == ["get-state"]:
+            return device.mode() + "\n", "", 0, cost
+        if args[:1] == ["shell"]:
+            stdout, stderr, code = device.run_shell(" ".join(args[1:]))
+            return stdout, stderr, code, device.latency["shell"]
+        if args[:1] == ["reboot"]:
+            device.reboot("bootloader" if args[1:2] in (["bootloader"], ["fastboot"]) else "device")
+            return "", "", 0, cost
+        return "", f"adb: unknown command {' '.join(args)}\n", 1, cost
+
+    def fastboot(self, serial, args, input=None):
+        if args[:1] == ["devices"]:
+            return "".join(f"{device.serial}\tfastboot\n" for device in self.devices.values()
+                           if device.mode() == "bootloader"), "", 0, self.host_latency
+        device = self.select(serial, ("bootloader",))
+        if device is None:
+            # Real fastboot would block until the device appears; failing lets the caller's polling decide
+            return "", "< waiting for any device >\n", 1, self.host_latency
+        return device.run_fastboot(args, input)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake ADB server for offline testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=5038, help="Port to listen on (default: 5038)")
+    parser.add_argument("--devices", type=int, default=1, help="Number of simulated devices")
+
+    args = parser.parse_args()
+
+    devices = [FakeDevice(f"FAKE{index:04d}") for index in range(args.devices)]
+    server = FakeAdbServer(devices, args.host, args.port)
+    print(f"Fake adb server listening on {server.address} with {len(devices)} devices")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Fake CertiWipe Server - offline stand-in for certiwipe-server's
+POST /api/certificates/process, for exercising submit_certificates.py
+without MongoDB, Pinata or a chain:
+
+    python3 fakecertserver.py --port 3001 --latency 0.5 --fail-rate 0.1 --drop-rate 0.05
+    python3 submit_certificates.py wipe_logs/*.json --server http://127.0.0.1:3001
+
+It validates the IMEI and honours Idempotency-Key the same way server.js
+does. --drop-rate closes the connection after minting without replying,
+which is the failure a retry must not turn into a second mint.
+--unrecorded-rate mints but fails to save the record, which server.js marks
+minted_unrecorded and answers, then and on every retry, with HTTP 422.
+GET /api/stats reports mints, replays and connections.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROCESS_PATH = "/api/certificates/process"
+
+
+def minted_unrecorded(record):
+    """server.js's reply for a key that was minted but never recorded"""
+    return 422, {"success": False,
+                 "message": f"Certificate {record['certificateId']} was minted (transaction "
+                            f"{record['transactionId']}) but its record could not be saved; it needs an operator.",
+                 "certificateId": record["certificateId"], "transactionId": record["transactionId"]}
+
+
+class FakeCertHandler(BaseHTTPRequestHandler):
+    """Keep-alive HTTP/1.1 handler for the certificate endpoints"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/stats":
+            return self.send_json(200, self.server.snapshot())
+        return self.send_json(404, {"success": False, "message": "Not found."})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != PROCESS_PATH:
+            return self.send_json(404, {"success": False, "message": "Not found."})
+        try:
+            certificate = json.loads(body)
+        except ValueError:
+            return self.send_json(400, {"success": False, "message": "Body is not JSON."})
+        status, reply = self.server.process(certificate, self.headers.get("Idempotency-Key"))
+        if reply is None:
+            # Simulated lost response: the work is done but the client never hears about it
+            self.close_connection = True
+            return None
+        return self.send_json(status, reply)
+
+
+class FakeCertServer(ThreadingHTTPServer):
+    """Threaded fake certiwipe-server; port 0 picks a free port"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_rate=0.0, drop_rate=0.0,
+                 unrecorded_rate=0.0, seed=None, verbose=False):
+        super().__init__((host, port), FakeCertHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.unrecorded_rate = unrecorded_rate
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.records = {}
+        self.unrecorded = {}
+        self.in_flight = set()
+        self.stats = {"connections": 0, "requests": 0, "minted": 0, "replayed": 0,
+                      "conflicts": 0, "failed": 0, "dropped": 0, "unrecorded": 0, "rejected": 0}
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, certificates=len(self.records))
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def process(self, certificate, key):
+        """Returns (status, reply); reply None means drop the connection without answering"""
+        self.count("requests")
+        with self.lock:
+            if key and key in self.records:
+                self.stats["replayed"] += 1
+                return 200, dict(self.records[key], replayed=True,
+                                 message="Certificate already processed.")
+            if key and key in self.unrecorded:
+                self.stats["unrecorded"] += 1
+                return minted_unrecorded(self.unrecorded[key])
+            if key and key in self.in_flight:
+                self.stats["conflicts"] += 1
+                return 409, {"success": False,
+                             "message": "A request with this Idempotency-Key is still being processed."}
+            if key:
+                self.in_flight.add(key)
+        try:
+            if not (certificate.get("device_info") or {}).get("imei"):
+                self.count("rejected")
+                return 400, {"success": False, "message": "IMEI is required for device tracking."}
+            # PDF rendering, two pins and a mint, in one sleep
+            time.sleep(self.latency)
+            if self.roll(self.fail_rate):
+                self.count("failed")
+                return 500, {"success": False, "message": "An internal server error occurred."}
+            with self.lock:
+                self.stats["minted"] += 1
+                number = self.stats["minted"]
+                record = {
+                    "success": True,
+                    "message": "Certificate created and processed successfully!",
+                    "certificateId": f"CERT-FAKE-{number:06d}",
+                    "jsonCid": f"bafyfakejson{number:06d}",
+                    "pdfCid": f"bafyfakepdf{number:06d}",
+                    "transactionId": f"0x{number:064x}",
+                }
+                if self.random.random() < self.unrecorded_rate:
+                    self.stats["unrecorded"] += 1
+                    self.unrecorded[key or record["certificateId"]] = record
+                    return minted_unrecorded(record)
+                self.records[key or record["certificateId"]] = record
+            if self.roll(self.drop_rate):
+                self.count("dropped")
+                return 201, None
+            return 201, record
+        finally:
+            if key:
+                with self.lock:
+                    self.in_flight.discard(key)
+
+    def start(self):
+        """Serve in a background thread and return self"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake certiwipe-server for offline testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=3001, help="Port to listen on (default: 3001)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds spent processing each certificate")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Fraction of minted certificates whose response is never sent")
+    parser.add_argument("--unrecorded-rate", type=float, default=0.0,
+                        help="Fraction of minted certificates whose record fails to save (HTTP 422)")
+    parser.add_argument("--seed", type=int, help="Seed for the failure injection")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+
+    args = parser.parse_args()
+
+    server = FakeCertServer(args.host, args.port, args.latency, args.fail_rate, args.drop_rate,
+                            args.unrecorded_rate, args.seed, args.verbose)
+    print(f"Fake certiwipe-server listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(server.snapshot()))
+        server.server_close()
@@ -0,0 +1,16 @@
+"""
+IMEI Check - Luhn validation shared by andnr.py, manifest.py and wipelog_store.py
+"""
+
+
+def valid_imei(value):
+    """True for a 15-digit IMEI with a correct Luhn check digit"""
+    if not value or len(value) != 15 or not value.isdigit():
+        return False
+    total = 0
+    for index, digit in enumerate(int(char) for char in value):
+        if index % 2:
+            digit *= 2
+            digit -= 9 if digit > 9 else 0
+        total += digit
+    return total % 10 == 0
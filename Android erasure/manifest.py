@@ -0,0 +1,159 @@
+"""
+Job Manifests - signed authorization for unattended andnr.py wipes
+A manifest names the operator, an expiry and the devices, by serial, IMEI
+or both, that may be wiped without a prompt. sign_manifest() signs one with
+an EC key; JobManifest.load() refuses any whose signature does not verify.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from imei import valid_imei
+
+
+class ManifestError(Exception):
+    pass
+
+
+def manifest_payload(document):
+    """The bytes a job manifest signature covers: the document without its signature, as canonical JSON"""
+    payload = {key: value for key, value in document.items() if key != "signature"}
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def parse_expiry(value):
+    """ISO 8601 timestamp as an aware datetime; one without an offset is taken as local time"""
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ManifestError(f"expires_at {value!r} is not an ISO 8601 timestamp")
+    return moment if moment.tzinfo else moment.astimezone()
+
+
+def sign_manifest(path, key_path):
+    """Sign a job manifest in place with an EC private key; returns the key fingerprint"""
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    
+    with open(key_path, "rb") as f:
+        private_key = serialization.load_pem_private_key(f.read(), password=None)
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    JobManifest.check_fields(document)
+    document["signature"] = private_key.sign(manifest_payload(document), ec.ECDSA(hashes.SHA256())).hex()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    der = private_key.public_key().public_bytes(serialization.Encoding.DER,
+                                                serialization.PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(der).hexdigest()
+
+
+class JobManifest:
+    """Signed list of devices an operator may wipe without being prompted.
+    
+    {"job_id": ..., "operator": ..., "expires_at": ISO 8601,
+     "devices": [{"serial": ..., "imei": ...}, ...], "signature": hex DER ECDSA}
+    
+    The signature covers every other field as canonical JSON, so certificates and
+    manifests are checked the same way. A device entry needs a serial, an IMEI or
+    both, and every value it gives must match the connected device.
+    """
+    
+    def __init__(self, document, path=None, key_fingerprint=None, sha256=None):
+        self.check_fields(document)
+        self.document = document
+        self.path = path
+        self.key_fingerprint = key_fingerprint
+        self.sha256 = sha256
+        self.job_id = document["job_id"]
+        self.operator = document["operator"]
+        self.expires_at = parse_expiry(document["expires_at"])
+        self.by_serial = {}
+        self.by_imei = {}
+        for entry in document["devices"]:
+            if entry.get("serial"):
+                self.by_serial[entry["serial"]] = entry
+            if entry.get("imei"):
+                self.by_imei[entry["imei"]] = entry
+    
+    @staticmethod
+    def check_fields(document):
+        missing = [field for field in ("job_id", "operator", "expires_at", "devices") if not document.get(field)]
+        if missing:
+            raise ManifestError(f"manifest is missing {', '.join(missing)}")
+        parse_expiry(document["expires_at"])
+        for entry in document["devices"]:
+            if not (entry.get("serial") or entry.get("imei")):
+                raise ManifestError(f"manifest device entry {entry} names neither a serial nor an IMEI")
+            if entry.get("imei") and not valid_imei(entry["imei"]):
+                raise ManifestError(f"manifest lists invalid IMEI {entry['imei']}")
+    
+    @classmethod
+    def load(cls, path, public_key_path):
+        """Read a manifest and check its signature; raises ManifestError if it cannot be trusted"""
+        try:
+            from cryptography.exceptions import InvalidSignature
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import ec
+        except ImportError:
+            raise ManifestError("checking a job manifest signature needs the cryptography package")
+        
+        with open(path, "rb") as f:
+            raw = f.read()
+        with open(public_key_path, "rb") as f:
+            public_key = serialization.load_pem_public_key(f.read())
+        try:
+            document = json.loads(raw)
+            signature = bytes.fromhex(document.get("signature") or "")
+        except ValueError:
+            raise ManifestError(f"{path} is not a signed job manifest")
+        if not signature:
+            raise ManifestError(f"{path} is not signed")
+        try:
+            public_key.verify(signature, manifest_payload(document), ec.ECDSA(hashes.SHA256()))
+        except InvalidSignature:
+            raise ManifestError(f"{path} signature is INVALID for {public_key_path}")
+        der = public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+        return cls(document, path, hashlib.sha256(der).hexdigest(), hashlib.sha256(raw).hexdigest())
+    
+    def match(self, serial, imei):
+        """Check one device against the manifest; returns (authorized, reason)"""
+        entry = self.by_serial.get(serial) or self.by_imei.get(imei)
+        if entry is None:
+            return False, f"Device {serial} (IMEI {imei}) is not listed in job {self.job_id}"
+        if entry.get("serial") and entry["serial"] != serial:
+            return False, f"IMEI {imei} is listed for serial {entry['serial']}, not {serial}"
+        if entry.get("imei") and entry["imei"] != imei:
+            return False, f"Serial {serial} is listed with IMEI {entry['imei']}, device reports {imei}"
+        return True, f"Device {serial} is listed in job {self.job_id}"
+    
+    def authorize(self, device_info, operator, serial=None):
+        """Decide whether a device may be wiped now; returns the decision record for the log"""
+        serial = device_info.get("serial") if device_info.get("serial") not in (None, "unknown") else serial
+        imei = device_info.get("imei") if valid_imei(device_info.get("imei")) else None
+        now = datetime.now().astimezone()
+        if now >= self.expires_at:
+            authorized, reason = False, f"Job {self.job_id} expired at {self.expires_at.isoformat()}"
+        elif operator != self.operator:
+            authorized, reason = False, f"Job {self.job_id} is issued to {self.operator}, not {operator}"
+        else:
+            authorized, reason = self.match(serial, imei)
+        return {
+            "mode": "manifest",
+            "decision": "authorized" if authorized else "denied",
+            "reason": reason,
+            "checked_at": now.isoformat(),
+            "operator": operator,
+            "serial": serial,
+            "imei": imei,
+            "job_id": self.job_id,
+            "manifest": self.path,
+            "manifest_sha256": self.sha256,
+            "key_fingerprint": self.key_fingerprint,
+            "issued_to": self.operator,
+            "expires_at": self.expires_at.isoformat(),
+        }
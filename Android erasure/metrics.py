@@ -0,0 +1,186 @@
+"""
+Wipe Metrics - command and stage latencies of andnr.py runs
+Latencies are kept as Prometheus summaries labelled by command type and
+device model, and exported as text for the node_exporter textfile collector
+or scraped from MetricsServer while a run is in progress.
+"""
+
+import os
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list, q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def command_kind(argv):
+    """'fastboot erase', 'adb shell' and so on, without the serial and partition"""
+    args = list(argv[1:])
+    if args[:1] == ["-s"]:
+        args = args[2:]
+    tool = os.path.basename(argv[0]).split(".")[0]
+    return " ".join([tool] + args[:2 if args[:1] == ["getvar"] else 1])
+
+
+def latency_summary(values):
+    """Count, p50/p95/p99 and max of a list of durations in seconds"""
+    summary = {"count": len(values)}
+    for q in (50, 95, 99):
+        value = percentile(values, q)
+        summary[f"p{q}_seconds"] = round(value, 4) if value is not None else None
+    summary["max_seconds"] = round(max(values), 4) if values else None
+    return summary
+
+
+def prometheus_labels(labels):
+    """Render (name, value) label pairs as {name="value",...} with Prometheus escaping"""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metrics:
+    """Command and stage latencies shared by every wiper in a run, exported as Prometheus text"""
+    
+    QUANTILES = (0.5, 0.95, 0.99)
+    HELP = {
+        "command_duration_seconds": "Wall time of adb/fastboot commands by command type and device model",
+        "stage_duration_seconds": "Wall time of wipe pipeline stages by device model",
+        "commands_total": "adb/fastboot commands run, by outcome",
+        "devices_total": "Devices that finished the pipeline, by result",
+        "log_write_seconds": "Time spent writing a device's final JSON log",
+    }
+    
+    def __init__(self, namespace="zerotrace", window=1024):
+        self.namespace = namespace
+        # Quantiles cover the most recent window samples of each series; count and sum cover all
+        self.window = window
+        self.summaries = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+    
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.summaries.get(key)
+            if series is None:
+                series = self.summaries[key] = {"samples": deque(maxlen=self.window), "count": 0, "sum": 0.0}
+            series["samples"].append(seconds)
+            series["count"] += 1
+            series["sum"] += seconds
+    
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def samples(self, name, *labels):
+        """Recent samples of a summary grouped by the given label names"""
+        groups = {}
+        with self.lock:
+            for (series_name, series_labels), series in self.summaries.items():
+                if series_name == name:
+                    values = dict(series_labels)
+                    group = tuple(values.get(label, "unknown") for label in labels)
+                    groups.setdefault(group, []).extend(series["samples"])
+        return groups
+    
+    def quantiles(self, name, *labels):
+        """latency_summary() of a summary, nested by the values of the given labels"""
+        nested = {}
+        for group, values in sorted(self.samples(name, *labels).items()):
+            level = nested
+            for value in group[:-1]:
+                level = level.setdefault(value, {})
+            level[group[-1]] = latency_summary(values)
+        return nested
+    
+    def render(self):
+        """The Prometheus text exposition format (version 0.0.4)"""
+        with self.lock:
+            summaries = {key: (list(series["samples"]), series["count"], series["sum"])
+                         for key, series in self.summaries.items()}
+            counters = dict(self.counters)
+        # Quantiles cannot be added up afterwards, so each summary also gets a model="all" series
+        for (name, labels), (samples, count, total) in list(summaries.items()):
+            values = dict(labels)
+            if "model" in values:
+                key = (name, tuple(sorted({**values, "model": "all"}.items())))
+                merged = summaries.setdefault(key, ([], 0, 0.0))
+                summaries[key] = (merged[0] + samples, merged[1] + count, merged[2] + total)
+        lines = []
+        for name in sorted({name for name, _ in summaries}):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} summary")
+            for (series_name, labels), (samples, count, total) in sorted(summaries.items()):
+                if series_name != name:
+                    continue
+                for q in self.QUANTILES:
+                    value = percentile(samples, q * 100)
+                    lines.append(f"{metric}{prometheus_labels(labels + (('quantile', q),))} {value!r}")
+                lines.append(f"{metric}_sum{prometheus_labels(labels)} {total!r}")
+                lines.append(f"{metric}_count{prometheus_labels(labels)} {count}")
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {metric} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{prometheus_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path):
+        """Atomically write the metrics, e.g. for node_exporter's textfile collector"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics"""
+    
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Prometheus scrape endpoint for a running wipe, on localhost unless told otherwise"""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, metrics, port=9464, host="127.0.0.1"):
+        super().__init__((host, port), MetricsHandler)
+        self.metrics = metrics
+    
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
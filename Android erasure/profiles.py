@@ -0,0 +1,179 @@
+"""
+Device Profiles - what worked on each phone model in earlier andnr.py wipes
+Learned from finished wipe logs and kept in one JSON file per station:
+which unlock and lock commands succeeded, the partition layout and wipe
+plan, how long each stage and command took. andnr.py uses them to try the
+right variant first, skip probing and size its waits and timeouts.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+# Stage durations kept per profile, most recent last
+PROFILE_SAMPLES = 50
+# A learned wait is only trusted after this many runs of the model
+PROFILE_MIN_SAMPLES = 3
+# Learned waits allow the slowest recent run scaled by this, plus the margin in seconds
+PROFILE_TIMEOUT_FACTOR = 2.0
+PROFILE_TIMEOUT_MARGIN = 15
+# Fields of device_info that identify a profile
+PROFILE_FIELDS = ("manufacturer", "model", "bootloader_version")
+
+
+def profile_key(device_info):
+    """'manufacturer/model/bootloader_version', or None while the model is unknown"""
+    values = [device_info.get(field) or "unknown" for field in PROFILE_FIELDS]
+    if values[1] == "unknown":
+        return None
+    return "/".join(values)
+
+
+def wipe_log_files(paths):
+    """Expand files and directories into wipe log JSON paths"""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(str(found) for found in Path(path).glob("wipe_log*.json"))
+        else:
+            yield path
+
+
+class DeviceProfiles:
+    """What worked on each manufacturer/model/bootloader, learned from past wipe logs, in one JSON file"""
+    
+    def __init__(self, path="device_profiles.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {"profiles": {}, "ingested": {}}
+    
+    @property
+    def profiles(self):
+        return self.data["profiles"]
+    
+    def lookup(self, device_info):
+        """The profile for exactly this model and bootloader version, if one has been learned"""
+        key = profile_key(device_info)
+        return self.profiles.get(key) if key else None
+    
+    def related(self, device_info):
+        """Profiles of the same manufacturer and model, on any bootloader version"""
+        return [profile for profile in self.profiles.values()
+                if all(profile.get(field) == device_info.get(field) for field in PROFILE_FIELDS[:2])]
+    
+    def method_order(self, methods, device_info, field):
+        """methods reordered so variants that worked on this model before come first"""
+        wins = {}
+        for profile in self.related(device_info):
+            for method, count in profile.get(field, {}).items():
+                wins[method] = wins.get(method, 0) + count
+        # sorted() is stable, so untried variants keep their built-in order
+        return sorted(methods, key=lambda method: -wins.get(method[0], 0))
+    
+    def stage_timeout(self, device_info, stage, ceiling):
+        """Seconds to wait in stage for this model, or None when too few runs are known"""
+        profile = self.lookup(device_info)
+        samples = (profile or {}).get("stage_seconds", {}).get(stage, [])
+        if len(samples) < PROFILE_MIN_SAMPLES:
+            return None
+        return min(ceiling, round(max(samples) * PROFILE_TIMEOUT_FACTOR + PROFILE_TIMEOUT_MARGIN, 1))
+    
+    def wipe_plan(self, device_info):
+        profile = self.lookup(device_info)
+        return profile.get("wipe_plan") if profile else None
+    
+    def learn(self, log):
+        """Fold one finished wipe log into its profile; returns the profile key or None"""
+        info = log.get("device_info") or {}
+        key = profile_key(info)
+        if not key or log.get("result") not in ("success", "failed"):
+            return None
+        with self.lock:
+            profile = self.profiles.setdefault(key, {
+                **{field: info.get(field) or "unknown" for field in PROFILE_FIELDS},
+                "wipes": 0,
+                "successful_wipes": 0,
+                "unlock_methods": {},
+                "lock_methods": {},
+                "command_seconds": {},
+                "partitions": [],
+                "wipe_plan": None,
+                "stage_seconds": {},
+            })
+            profile["wipes"] += 1
+            profile["updated_at"] = datetime.now().isoformat()
+            for field in ("unlock_method", "lock_method"):
+                method = info.get(field)
+                if method:
+                    counts = profile[f"{field}s"]
+                    counts[method] = counts.get(method, 0) + 1
+            layout = log.get("partition_layout")
+            if layout and layout.get("partitions"):
+                profile["partitions"] = sorted(layout["partitions"])
+            if log["result"] == "success":
+                profile["successful_wipes"] += 1
+                # Only plans built from a probed layout are cached; sizes differ between storage variants
+                if layout and log.get("wipe_plan"):
+                    profile["wipe_plan"] = [{name: value for name, value in entry.items() if name != "size_bytes"}
+                                            for entry in log["wipe_plan"]]
+                for stage, seconds in (log.get("stage_durations") or {}).items():
+                    samples = profile["stage_seconds"].setdefault(stage, [])
+                    samples.append(seconds)
+                    del samples[:-PROFILE_SAMPLES]
+            for command in log.get("commands_executed") or []:
+                if command.get("completed") and command.get("timeout_key") and "duration_seconds" in command:
+                    samples = profile.setdefault("command_seconds", {}).setdefault(command["timeout_key"], [])
+                    samples.append(command["duration_seconds"])
+                    del samples[:-PROFILE_SAMPLES]
+            self.save_locked()
+        return key
+    
+    def learn_files(self, paths):
+        """Learn from wipe log files, skipping any already ingested unchanged; returns (learned, skipped)"""
+        learned = skipped = 0
+        for path in wipe_log_files(paths):
+            try:
+                stamp = self.file_stamp(path)
+                if self.data["ingested"].get(os.path.abspath(path)) == stamp:
+                    skipped += 1
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    log = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                skipped += 1
+                continue
+            if not self.learn(log):
+                skipped += 1
+                continue
+            self.mark_ingested(path)
+            learned += 1
+        self.save()
+        return learned, skipped
+    
+    @staticmethod
+    def file_stamp(path):
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+    
+    def mark_ingested(self, path):
+        """Remember a log as learned, so ingesting it again does not count it twice"""
+        with self.lock:
+            self.data["ingested"][os.path.abspath(path)] = self.file_stamp(path)
+    
+    def save(self):
+        with self.lock:
+            self.save_locked()
+    
+    def save_locked(self):
+        """Replace the file in one rename; the caller holds the lock"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
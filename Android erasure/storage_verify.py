@@ -0,0 +1,151 @@
+"""
+Storage Verification - post-wipe check of a device or image by sampling blocks
+Reads a random sample of blocks, sized so that a target with more than a
+given fraction of unwiped blocks fails with the requested confidence, and
+reports which blocks were read and what they held. Blocks come from a local
+image or block device, or from a device partition over adb.
+"""
+
+import base64
+import hashlib
+import math
+import os
+import random
+import shlex
+import time
+
+
+# Byte values an erased block may read back as: discarded flash returns zeros or ones
+WIPED_FILL_BYTES = {0x00: "zeros", 0xFF: "ones"}
+
+
+def verification_sample_size(confidence, max_unwiped_fraction, total_blocks):
+    """Blocks to sample so that, if at least max_unwiped_fraction of them still hold data,
+    at least one is hit with the given confidence: (1 - f)^n <= 1 - confidence"""
+    if total_blocks <= 0:
+        return 0
+    if max_unwiped_fraction >= 1:
+        return 1
+    needed = math.ceil(math.log(1 - confidence) / math.log(1 - max_unwiped_fraction))
+    return min(max(needed, 1), total_blocks)
+
+
+def block_pattern(block):
+    """Classify a block as 'zeros', 'ones' (wiped) or 'data'"""
+    if not block:
+        return "data"
+    fill = WIPED_FILL_BYTES.get(block[0])
+    if fill and block == bytes([block[0]]) * len(block):
+        return fill
+    return "data"
+
+
+class LocalBlockSource:
+    """Random block reads from a disk image or block device on this machine"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+    
+    def size(self):
+        with open(self.path, "rb") as f:
+            return f.seek(0, os.SEEK_END)
+    
+    def read_blocks(self, blocks, block_size):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            for block in blocks:
+                yield block, os.pread(fd, block_size, block * block_size)
+        finally:
+            os.close(fd)
+
+
+class AdbBlockSource:
+    """Random block reads from a device partition over 'adb shell'.
+    
+    Needs a shell that can open the block device (adb root, or a recovery
+    with root adb). Blocks are fetched in batches, base64 encoded, so each
+    batch costs one adb round-trip instead of one per block.
+    """
+    
+    def __init__(self, wiper, device_path, batch=64):
+        self.wiper = wiper
+        self.device_path = device_path
+        self.batch = batch
+        self.name = f"adb:{device_path}"
+    
+    def size(self):
+        result = self.wiper.probe(self.wiper.adb("shell", f"blockdev --getsize64 {shlex.quote(self.device_path)}"))
+        if not result or result.returncode != 0 or not result.stdout.strip().isdigit():
+            raise OSError(f"Cannot read the size of {self.device_path} over adb")
+        return int(result.stdout.strip())
+    
+    def read_blocks(self, blocks, block_size):
+        path = shlex.quote(self.device_path)
+        for start in range(0, len(blocks), self.batch):
+            chunk = blocks[start:start + self.batch]
+            script = "; ".join(f"dd if={path} bs={block_size} skip={block} count=1 2>/dev/null | base64 -w 0; echo"
+                               for block in chunk)
+            result = self.wiper.probe(self.wiper.adb("shell", script), timeout=120)
+            if not result or result.returncode != 0:
+                raise OSError(f"Reading blocks of {self.device_path} over adb failed")
+            lines = result.stdout.split("\n")
+            for block, line in zip(chunk, lines):
+                yield block, base64.b64decode(line.strip())
+
+
+def verify_storage(source, block_size=4096, confidence=0.99, max_unwiped_fraction=0.001, seed=None):
+    """Sample random blocks and check they read back wiped, stopping at the first that does not"""
+    started = time.monotonic()
+    total_blocks = source.size() // block_size
+    planned = verification_sample_size(confidence, max_unwiped_fraction, total_blocks)
+    seed = random.SystemRandom().getrandbits(64) if seed is None else seed
+    # Sorted so the reads sweep the device in one direction; the set itself is random
+    blocks = sorted(random.Random(seed).sample(range(total_blocks), planned))
+    
+    samples = []
+    patterns = {}
+    digest = hashlib.sha256()
+    first_unwiped = None
+    for block, data in source.read_blocks(blocks, block_size):
+        block_hash = hashlib.sha256(data).hexdigest()
+        pattern = block_pattern(data) if len(data) == block_size else "data"
+        samples.append([block, block_hash])
+        digest.update(f"{block}:{block_hash}\n".encode())
+        patterns[pattern] = patterns.get(pattern, 0) + 1
+        if pattern == "data":
+            first_unwiped = {"block": block, "offset": block * block_size, "sha256": block_hash}
+            break
+    
+    # Nothing sampled, or fewer blocks than planned, proves nothing about the target
+    if first_unwiped:
+        failure = f"Unwiped data at offset {first_unwiped['offset']}"
+    elif not total_blocks:
+        failure = f"{source.name} holds no whole {block_size}-byte block to sample"
+    elif len(samples) < planned:
+        failure = f"Only {len(samples)} of {planned} sampled blocks could be read"
+    else:
+        failure = None
+    
+    bytes_read = len(samples) * block_size
+    return {
+        "method": "random_block_sampling",
+        "target": source.name,
+        "result": "failed" if failure else "passed",
+        "failure": failure,
+        "block_size": block_size,
+        "total_blocks": total_blocks,
+        "confidence": confidence,
+        "max_unwiped_fraction": max_unwiped_fraction,
+        "seed": seed,
+        "samples_planned": planned,
+        "samples_read": len(samples),
+        "bytes_read": bytes_read,
+        "fraction_read": round(bytes_read / (total_blocks * block_size), 6) if total_blocks else 0,
+        "patterns": patterns,
+        "first_unwiped_block": first_unwiped,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        # Ordered (block, sha256) pairs; samples_sha256 commits to the whole list
+        "samples_sha256": digest.hexdigest(),
+        "samples": samples,
+    }
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Certificate Submission Client - pushes andnr.py wipe logs to certiwipe-server
+Each successful wipe log is converted to the certificate schema expected by
+POST /api/certificates/process and written to a spool directory first, so an
+offline station keeps its certificates until the server can be reached:
+
+    python3 submit_certificates.py wipe_logs/*.json --server http://localhost:3000
+    python3 submit_certificates.py wipe_logs/*.json --offline        # spool only
+    python3 submit_certificates.py --server http://localhost:3000    # drain the spool
+
+Submissions run concurrently over a bounded pool of keep-alive connections.
+Every certificate carries an Idempotency-Key derived from its content, so a
+retry, or a second drain of the same spool, never mints it twice.
+fakecertserver.py serves the same endpoint for offline testing.
+"""
+
+import argparse
+import glob
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlsplit
+
+PROCESS_PATH = "/api/certificates/process"
+DEFAULT_SERVER = "http://localhost:3000"
+
+# Partition actions andnr.py performs, as they appear on the certificate
+WIPE_METHOD = "Fastboot partition erase/format"
+WIPE_COMPLIANCE = "NIST SP 800-88 Clear"
+
+# Statuses worth retrying: overload, a concurrent duplicate still processing, and server errors
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+SPOOL_STATES = ("pending", "submitted", "rejected")
+
+
+class PermanentError(Exception):
+    """The server refused the certificate; retrying will not help"""
+
+
+def log_end_time(log):
+    summary = log.get("summary") or {}
+    return summary.get("end_time") or log.get("timestamp")
+
+
+def certificate_from_log(log, imei=None):
+    """Convert an AndroidDataWiper.log_data dict into the server's certificate schema"""
+    if log.get("result") != "success":
+        raise ValueError(f"wipe result is '{log.get('result')}', only successful wipes are certified")
+    results = log.get("wipe_results") or []
+    if not any(result.get("status") == "success" for result in results):
+        raise ValueError("log has no successful partition wipes")
+
+    device = log.get("device_info") or {}
+    imei = imei or device.get("imei")
+    if not imei or imei == "unknown":
+        raise ValueError("IMEI is required; re-run andnr.py with --imei or pass --imei here")
+
+    summary = log.get("summary") or {}
+    verification = log.get("verification") or {}
+    failed = [f"{result['action']} {result['partition']}" for result in results if result.get("status") == "failed"]
+    return {
+        "device_info": {
+            "model": device.get("model", "unknown"),
+            "manufacturer": device.get("manufacturer", "unknown"),
+            "serial": device.get("serial") if device.get("serial", "unknown") != "unknown" else device.get("device_id"),
+            "size_bytes": device.get("storage_bytes") or 0,
+            "imei": imei,
+            "android_version": device.get("android_version", "unknown"),
+            "security_patch": device.get("security_patch", "unknown"),
+            "encryption_state": device.get("encryption_state", "unknown"),
+        },
+        "wipe_details": {
+            "method": WIPE_METHOD,
+            "compliance": WIPE_COMPLIANCE,
+            # fastboot erase/format write each partition once
+            "passes": 1,
+            "start_time": summary.get("start_time") or log.get("timestamp"),
+            "end_time": log_end_time(log),
+            "duration_seconds": round(summary.get("duration_seconds") or 0, 3),
+            "status": "completed_with_errors" if failed else "completed",
+            "notes": f"Failed: {', '.join(failed)}" if failed else "",
+            # HPA/DCO are ATA features; flash storage behind fastboot has neither
+            "hpa_removed": False,
+            "dco_detected": False,
+            "partitions": [
+                {key: result.get(key) for key in ("partition", "action", "status", "duration_seconds")}
+                for result in results
+            ],
+            "bootloader_status": device.get("bootloader_status", "unknown"),
+        },
+        "verification": {
+            "method": verification.get("method", "none"),
+            "result": verification.get("result", "not_verified"),
+            "samples_sha256": verification.get("samples_sha256"),
+        },
+        "station": {
+            "hostname": (log.get("system_info") or {}).get("hostname"),
+            "tool": log.get("tool"),
+            "log_timestamp": log.get("timestamp"),
+        },
+    }
+
+
+def idempotency_key(certificate):
+    """SHA-256 of the canonical certificate, so resubmitting the same log reuses its key"""
+    payload = json.dumps(certificate, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class Spool:
+    """Directory queue of certificates: pending/ until the server accepts or rejects them"""
+
+    def __init__(self, path):
+        self.path = path
+        for state in SPOOL_STATES:
+            os.makedirs(os.path.join(path, state), exist_ok=True)
+
+    def entry_path(self, state, key):
+        return os.path.join(self.path, state, f"{key}.json")
+
+    def state_of(self, key):
+        return next((state for state in SPOOL_STATES if os.path.exists(self.entry_path(state, key))), None)
+
+    def write(self, state, key, entry):
+        # Write-then-rename so a crash never leaves a truncated entry behind
+        path = self.entry_path(state, key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def enqueue(self, source, certificate, email=None):
+        """Add a certificate unless it is already spooled; returns (key, existing state or None)"""
+        key = idempotency_key(certificate)
+        state = self.state_of(key)
+        if state:
+            return key, state
+        self.write("pending", key, {
+            "idempotency_key": key,
+            "source": source,
+            "spooled_at": datetime.now().isoformat(),
+            "user_email": email,
+            "certificate": certificate,
+        })
+        return key, None
+
+    def pending(self):
+        for path in sorted(glob.glob(os.path.join(self.path, "pending", "*.json"))):
+            with open(path, "r") as f:
+                yield json.load(f)
+
+    def finish(self, entry, state, **fields):
+        """Move an entry out of pending/ with the server's answer attached"""
+        entry = dict(entry, **fields, finished_at=datetime.now().isoformat())
+        self.write(state, entry["idempotency_key"], entry)
+        os.remove(self.entry_path("pending", entry["idempotency_key"]))
+
+
+class SubmissionClient:
+    """Thread-safe JSON client for certiwipe-server that reuses keep-alive connections"""
+
+    def __init__(self, server=DEFAULT_SERVER, pool_size=8, timeout=120, retries=5, backoff=1.0):
+        parts = urlsplit(server if "://" in server else f"http://{server}")
+        self.connection_class = (http.client.HTTPSConnection if parts.scheme == "https"
+                                 else http.client.HTTPConnection)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.idle = queue.LifoQueue(maxsize=pool_size)
+        self.lock = threading.Lock()
+        self.stats = {"connections_opened": 0, "requests": 0, "retries": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            self.count("connections_opened")
+            return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def release(self, connection):
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def post_once(self, path, body, headers):
+        """One POST; returns (status, decoded JSON or None)"""
+        connection = self.acquire()
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (ConnectionError, http.client.HTTPException, OSError):
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self.release(connection)
+        self.count("requests")
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, {"message": data[:200].decode("utf-8", "replace")}
+
+    def submit(self, entry):
+        """POST one spooled certificate with retries; returns the server's JSON reply"""
+        body = dict(entry["certificate"])
+        if entry.get("user_email"):
+            body["userEmail"] = entry["user_email"]
+        body = json.dumps(body).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Idempotency-Key": entry["idempotency_key"]}
+
+        for attempt in range(self.retries + 1):
+            try:
+                status, reply = self.post_once(PROCESS_PATH, body, headers)
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                status, reply = None, {"message": str(e)}
+            if status is not None and 200 <= status < 300:
+                return reply
+            message = (reply or {}).get("message") or f"HTTP {status}"
+            if status is not None and status not in RETRYABLE_STATUSES:
+                raise PermanentError(f"HTTP {status}: {message}")
+            if attempt == self.retries:
+                raise ConnectionError(f"Gave up after {attempt + 1} attempts: {message}")
+            self.count("retries")
+            # Exponential backoff with full jitter, so stations do not retry in lockstep
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class CertificateSubmitter:
+    """Spools wipe logs as certificates and drains the spool to the server"""
+
+    def __init__(self, spool_dir="cert_spool", server=DEFAULT_SERVER, in_flight=4,
+                 retries=5, timeout=120, backoff=1.0, email=None, verbose=False):
+        self.spool = Spool(spool_dir)
+        self.server = server
+        self.in_flight = in_flight
+        self.email = email
+        self.verbose = verbose
+        self.client = SubmissionClient(server, pool_size=in_flight, timeout=timeout,
+                                       retries=retries, backoff=backoff)
+
+    def add_logs(self, log_paths, imei=None):
+        """Convert and spool every log; returns {"spooled", "already", "invalid"} counts"""
+        counts = {"spooled": 0, "already": 0, "invalid": 0}
+        for path in log_paths:
+            try:
+                with open(path, "r") as f:
+                    log = json.load(f)
+                certificate = certificate_from_log(log, imei)
+            except (OSError, ValueError) as e:
+                counts["invalid"] += 1
+                print(f"{path}: skipped: {e}")
+                continue
+            key, existing = self.spool.enqueue(os.path.abspath(path), certificate, self.email)
+            counts["already" if existing else "spooled"] += 1
+            if self.verbose:
+                print(f"{path}: {f'already {existing}' if existing else 'spooled'} ({key[:12]})")
+        return counts
+
+    def submit_entry(self, entry):
+        try:
+            reply = self.client.submit(entry)
+        except PermanentError as e:
+            self.spool.finish(entry, "rejected", error=str(e))
+            return entry, "rejected", str(e)
+        except ConnectionError as e:
+            # Left in pending/ for the next drain
+            return entry, "pending", str(e)
+        self.spool.finish(entry, "submitted", response=reply)
+        replayed = " (already processed)" if reply and reply.get("replayed") else ""
+        return entry, "submitted", f"{(reply or {}).get('certificateId')}{replayed}"
+
+    def drain(self):
+        """Submit every pending certificate with at most in_flight requests outstanding"""
+        entries = list(self.spool.pending())
+        counts = {"submitted": 0, "rejected": 0, "pending": 0}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.in_flight) as pool:
+            futures = [pool.submit(self.submit_entry, entry) for entry in entries]
+            for future in as_completed(futures):
+                entry, state, detail = future.result()
+                counts[state] += 1
+                print(f"{os.path.basename(entry['source'])}: {state}: {detail}")
+        elapsed = time.perf_counter() - start
+        self.client.close()
+        return {
+            **counts,
+            "total": len(entries),
+            "elapsed_seconds": round(elapsed, 3),
+            "certificates_per_second": round(counts["submitted"] / elapsed, 2) if elapsed > 0 and entries else None,
+            **self.client.stats,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submit andnr.py wipe logs to certiwipe-server")
+    parser.add_argument("logs", nargs="*", help="wipe_log.json files (or globs) to certify")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help=f"certiwipe-server base URL (default: {DEFAULT_SERVER})")
+    parser.add_argument("--spool-dir", default="cert_spool", help="Where certificates wait until the server accepts them")
+    parser.add_argument("--offline", action="store_true", help="Only spool the logs; submit them on a later run")
+    parser.add_argument("--in-flight", type=int, default=4, help="Maximum concurrent submissions (default: 4)")
+    parser.add_argument("--retries", type=int, default=5, help="Retries per certificate on network or 5xx errors (default: 5)")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Base retry delay in seconds, doubled per attempt (default: 1)")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Seconds to wait for one response; the server mints on-chain before replying (default: 120)")
+    parser.add_argument("--imei", help="IMEI to use for a log that does not record one (single log only)")
+    parser.add_argument("--email", help="Ask the server to email each certificate PDF to this address")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print every spooled log")
+
+    args = parser.parse_args()
+
+    log_paths = [path for pattern in args.logs for path in (sorted(glob.glob(pattern)) or [pattern])]
+    if args.imei and len(log_paths) != 1:
+        parser.error("--imei applies to exactly one log file")
+
+    submitter = CertificateSubmitter(spool_dir=args.spool_dir, server=args.server, in_flight=args.in_flight,
+                                     retries=args.retries, timeout=args.timeout, backoff=args.backoff,
+                                     email=args.email, verbose=args.verbose)
+    if log_paths:
+        counts = submitter.add_logs(log_paths, args.imei)
+        print(f"Spooled {counts['spooled']} new certificates ({counts['already']} already spooled, "
+              f"{counts['invalid']} logs skipped)")
+    if args.offline:
+        print(f"Offline: certificates kept in {args.spool_dir}/pending")
+        sys.exit(0)
+
+    summary = submitter.drain()
+    print(f"Submitted {summary['submitted']}/{summary['total']} certificates: {summary['rejected']} rejected, "
+          f"{summary['pending']} left in {args.spool_dir}/pending")
+    print(f"Throughput: {summary['certificates_per_second']} certificates/s over "
+          f"{summary['connections_opened']} connections ({summary['retries']} retries)")
+    sys.exit(0 if not summary["pending"] and not summary["rejected"] else 1)
@@ -0,0 +1,165 @@
+"""
+End-to-end wipes of simulated phones: the whole pipeline runs against fakeadb
+devices, through the in-process transport and through the fake adb server
+"""
+
+import builtins
+import json
+import os
+import subprocess
+
+import pytest
+
+import andnr
+from andnr import AdbServerTransport, AndroidDataWiper, FleetWiper
+from checkpoint import Checkpoint
+from fakeadb import FakeAdbServer, FakeDevice, SimulatedTransport, fake_imei
+
+ANSWERS = ("ERASE EVERYTHING", "yes")
+
+
+@pytest.fixture
+def confirm(monkeypatch):
+    """Answer the interactive confirmation prompts; counts how often they were asked"""
+    asked = []
+
+    def answer(prompt=""):
+        reply = ANSWERS[len(asked) % len(ANSWERS)]
+        asked.append(prompt)
+        return reply
+    monkeypatch.setattr(builtins, "input", answer)
+    return asked
+
+
+def make_wiper(tmp_path, transport, serial="DEV1"):
+    return AndroidDataWiper(log_file=str(tmp_path / f"{serial}.json"), serial=serial, adb_path="adb",
+                            fastboot_path="fastboot", transport=transport, countdown=0,
+                            checkpoint_dir=str(tmp_path / "checkpoints"))
+
+
+def load_report(tmp_path, serial="DEV1"):
+    with open(tmp_path / f"{serial}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def assert_wiped(tmp_path, device, report, kept=()):
+    assert report["result"] == "success"
+    assert report["device_info"]["imei"] == fake_imei(device.serial)
+    statuses = {result["partition"]: result["status"] for result in report["wipe_results"]}
+    assert statuses["userdata"] == "success"
+    assert "failed" not in statuses.values()
+    assert ("erase", "userdata") in device.erased
+    assert device.mode() == "device"
+    # A finished wipe keeps neither its checkpoint nor its raw event log
+    assert Checkpoint.load(str(tmp_path / "checkpoints"), device.serial) is None
+    assert report["settings"]["event_log"] is None
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".events.jsonl")] == list(kept)
+
+
+def test_simulated_wipe_end_to_end(tmp_path, confirm):
+    device = FakeDevice("DEV1")
+    wiper = make_wiper(tmp_path, SimulatedTransport([device], time_scale=0.0))
+    assert wiper.main() is True
+    assert confirm
+    assert_wiped(tmp_path, device, load_report(tmp_path))
+
+
+def test_wipe_through_adb_server(tmp_path, confirm):
+    device = FakeDevice("DEV1")
+    # fastboot has no server; its calls fall back to the simulated transport over the same device
+    fallback = SimulatedTransport([device], time_scale=0.0)
+    server = FakeAdbServer([device]).start()
+    try:
+        host, port = server.address.rsplit(":", 1)
+        wiper = make_wiper(tmp_path, AdbServerTransport(host, int(port), fallback=fallback))
+        assert wiper.main() is True
+    finally:
+        server.stop()
+    report = load_report(tmp_path)
+    assert report["settings"]["transport"] == "adb-server"
+    assert_wiped(tmp_path, device, report)
+
+
+def interrupt(wiper, saved):
+    """Unplug the device during the wipe; saved=True flushes the report the way the CLI does on Ctrl+C"""
+    def unplugged():
+        raise KeyboardInterrupt
+    wiper.wipe_partitions = unplugged
+    with pytest.raises(KeyboardInterrupt):
+        wiper.main()
+    if saved:
+        wiper.log_step("main", "interrupted", "Operation cancelled by user")
+        wiper.log_data["result"] = "cancelled"
+        wiper.generate_summary()
+        wiper.save_log()
+
+
+@pytest.mark.parametrize("saved", [False, True], ids=["crashed", "cancelled"])
+def test_interrupted_wipe_resumes(tmp_path, confirm, saved):
+    device = FakeDevice("DEV1")
+    transport = SimulatedTransport([device], time_scale=0.0)
+    interrupt(make_wiper(tmp_path, transport), saved)
+    checkpoint = Checkpoint.load(str(tmp_path / "checkpoints"), "DEV1")
+    assert checkpoint is not None and checkpoint.state == "unlocked"
+    assert device.erased == []
+
+    prompts = len(confirm)
+    resumed = make_wiper(tmp_path, transport)
+    assert resumed.main() is True
+    # Resuming is authorized again like a new wipe
+    assert len(confirm) > prompts
+    report = load_report(tmp_path)
+    assert report["resumed_from"]["state"] == "unlocked"
+    skipped = {step["step"] for step in report["steps"] if step["status"] == "skipped"}
+    assert {"bootloader", "unlocked"} <= skipped
+
+    # Both runs keep a report; the resumed one points at the interrupted one's
+    previous = report["resumed_from"]["previous_log"]
+    assert os.path.dirname(previous) == str(tmp_path) and previous != str(tmp_path / "DEV1.json")
+    with open(previous, encoding="utf-8") as f:
+        interrupted = json.load(f)
+    assert interrupted["result"] == ("cancelled" if saved else "in_progress")
+    assert "resumed_from" not in interrupted
+    assert not interrupted.get("wipe_results")
+    # A crashed run's events are kept as well, since nothing compacted them
+    events = report["resumed_from"]["previous_event_log"]
+    assert os.path.exists(events) != saved
+    assert_wiped(tmp_path, device, report, kept=[] if saved else [os.path.basename(events)])
+
+
+def test_declined_resume_keeps_device_untouched(tmp_path, confirm, monkeypatch):
+    device = FakeDevice("DEV1")
+    transport = SimulatedTransport([device], time_scale=0.0)
+    interrupt(make_wiper(tmp_path, transport), saved=True)
+
+    monkeypatch.setattr(builtins, "input", lambda prompt="": "no")
+    assert make_wiper(tmp_path, transport).main() is False
+    assert load_report(tmp_path)["result"] == "cancelled"
+    assert device.erased == []
+
+
+class HungServerTransport(SimulatedTransport):
+    """'devices' never answers, as when the adb server is wedged; everything else works"""
+
+    def __init__(self, devices, error):
+        super().__init__(devices, time_scale=0.0)
+        self.error = error
+
+    def run(self, argv, input=None, timeout=120):
+        if argv[1:] == ["devices"]:
+            raise self.error(argv, timeout) if self.error is subprocess.TimeoutExpired else self.error("adb died")
+        return super().run(argv, input=input, timeout=timeout)
+
+
+@pytest.mark.parametrize("error", [subprocess.TimeoutExpired, OSError])
+def test_fleet_survives_hung_device_listing(tmp_path, monkeypatch, capsys, error):
+    monkeypatch.setitem(andnr._binary_cache, "adb", "adb")
+    monkeypatch.setitem(andnr._binary_cache, "fastboot", "fastboot")
+    fleet = FleetWiper(log_dir=str(tmp_path / "logs"), countdown=0,
+                       transport=HungServerTransport([FakeDevice("DEV1")], error),
+                       checkpoint_dir=str(tmp_path / "checkpoints"))
+    assert fleet.discover_devices() == []
+    assert fleet.main() is False
+    output = capsys.readouterr().out
+    assert "Could not list devices with adb" in output
+    assert "No authorized devices found." in output
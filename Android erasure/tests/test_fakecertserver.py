@@ -0,0 +1,110 @@
+"""
+Idempotency-Key handling of the certificate endpoint, against fakecertserver:
+however often a certificate is sent, it is minted once
+"""
+
+import json
+import threading
+
+import pytest
+
+from fakecertserver import FakeCertServer
+from submit_certificates import CertificateSubmitter, PermanentError, SubmissionClient, idempotency_key
+
+CERTIFICATE = {"certificate_id": "CERT-TEST-000001",
+               "device_info": {"model": "Fake Phone", "serial": "DEV1", "imei": "350000000000001"}}
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**options):
+        servers.append(FakeCertServer(seed=1, **options).start())
+        return servers[-1]
+    yield start
+    for running in servers:
+        running.stop()
+
+
+def entry(certificate=CERTIFICATE):
+    return {"idempotency_key": idempotency_key(certificate), "certificate": certificate}
+
+
+def client(server, **options):
+    return SubmissionClient(server.address, retries=options.pop("retries", 3), backoff=0, **options)
+
+
+def test_replayed_key_returns_the_first_result(server):
+    fake = server()
+    first = client(fake).submit(entry())
+    second = client(fake).submit(entry())
+    assert not first.get("replayed") and second["replayed"]
+    assert second["certificateId"] == first["certificateId"]
+    stats = fake.snapshot()
+    assert (stats["minted"], stats["replayed"], stats["certificates"]) == (1, 1, 1)
+
+
+def test_lost_response_is_not_minted_again(server):
+    # Every mint loses its response; the retry must get the stored result back
+    fake = server(drop_rate=1.0)
+    reply = client(fake).submit(entry())
+    assert reply["replayed"]
+    stats = fake.snapshot()
+    assert (stats["minted"], stats["dropped"], stats["replayed"]) == (1, 1, 1)
+
+
+def test_concurrent_duplicates_mint_once(server):
+    fake = server(latency=0.3)
+    replies = []
+
+    def submit():
+        replies.append(client(fake, retries=10).submit(entry()))
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({reply["certificateId"] for reply in replies}) == 1
+    stats = fake.snapshot()
+    assert stats["minted"] == 1
+    assert stats["conflicts"] >= 1
+
+
+def test_failed_request_does_not_claim_the_key(server):
+    fake = server(fail_rate=1.0)
+    with pytest.raises(ConnectionError):
+        client(fake, retries=1).submit(entry())
+    fake.fail_rate = 0.0
+    reply = client(fake).submit(entry())
+    assert not reply.get("replayed")
+    assert fake.snapshot()["minted"] == 1
+
+
+def test_minted_but_unrecorded_is_rejected_not_retried(server, tmp_path, capsys):
+    # The NFT exists but the server lost its record: retrying can only 409 or mint again, so stop
+    fake = server(unrecorded_rate=1.0)
+    submitter = CertificateSubmitter(spool_dir=str(tmp_path / "spool"), server=fake.address, backoff=0)
+    submitter.spool.enqueue(str(tmp_path / "DEV1.json"), CERTIFICATE)
+    summary = submitter.drain()
+    assert (summary["submitted"], summary["pending"], summary["rejected"], summary["retries"]) == (0, 0, 1, 0)
+    with open(submitter.spool.entry_path("rejected", idempotency_key(CERTIFICATE))) as f:
+        assert "HTTP 422" in json.load(f)["error"]
+    fake.unrecorded_rate = 0.0
+    with pytest.raises(PermanentError, match="needs an operator"):
+        client(fake).submit(entry())
+    stats = fake.snapshot()
+    assert (stats["minted"], stats["unrecorded"]) == (1, 2)
+
+
+def test_second_spool_of_the_same_log_is_replayed(server, tmp_path, capsys):
+    fake = server()
+    for station in ("a", "b"):
+        submitter = CertificateSubmitter(spool_dir=str(tmp_path / station), server=fake.address, backoff=0)
+        submitter.spool.enqueue(str(tmp_path / "DEV1.json"), CERTIFICATE)
+        summary = submitter.drain()
+        assert (summary["submitted"], summary["pending"], summary["rejected"]) == (1, 0, 0)
+    assert "(already processed)" in capsys.readouterr().out
+    with open(submitter.spool.entry_path("submitted", idempotency_key(CERTIFICATE))) as f:
+        assert json.load(f)["response"]["replayed"]
+    assert fake.snapshot()["minted"] == 1
@@ -0,0 +1,114 @@
+"""
+Post-wipe verification by random block sampling, against disk images
+"""
+
+import os
+
+import pytest
+
+from storage_verify import LocalBlockSource, verification_sample_size, verify_storage
+
+BLOCK = 4096
+
+
+def make_image(path, blocks, dirty=(), fill=b"\x00"):
+    """Sparse image of the given size; dirty block indexes hold data"""
+    with open(path, "wb") as f:
+        if fill == b"\x00":
+            f.truncate(blocks * BLOCK)
+        else:
+            f.write(fill * (blocks * BLOCK))
+        for block in dirty:
+            f.seek(block * BLOCK)
+            f.write(os.urandom(BLOCK))
+    return str(path)
+
+
+def test_sample_size_meets_confidence():
+    n = verification_sample_size(0.99, 0.001, 10 ** 9)
+    assert (1 - 0.001) ** n <= 0.01 < (1 - 0.001) ** (n - 1)
+    assert verification_sample_size(0.99, 0.001, 100) == 100
+    assert verification_sample_size(0.99, 0.001, 0) == 0
+
+
+@pytest.mark.parametrize("fill", [b"\x00", b"\xff"])
+def test_wiped_image_passes(tmp_path, fill):
+    image = make_image(tmp_path / "wiped.img", 4096, fill=fill)
+    report = verify_storage(LocalBlockSource(image), BLOCK, 0.99, 0.01, seed=1)
+    assert report["result"] == "passed"
+    assert report["failure"] is None
+    assert report["samples_read"] == report["samples_planned"] == verification_sample_size(0.99, 0.01, 4096)
+    assert len(report["samples"]) == report["samples_read"]
+
+
+def test_unwiped_blocks_are_found(tmp_path):
+    # A tenth of the image still holds data, far above the 1% the sample is sized for
+    image = make_image(tmp_path / "dirty.img", 4096, dirty=range(0, 4096, 10))
+    report = verify_storage(LocalBlockSource(image), BLOCK, 0.999, 0.01, seed=7)
+    assert report["result"] == "failed"
+    assert report["first_unwiped_block"]["block"] % 10 == 0
+    assert report["failure"] == f"Unwiped data at offset {report['first_unwiped_block']['offset']}"
+    # Reading stops at the first unwiped block
+    assert report["samples_read"] < report["samples_planned"]
+
+
+def test_same_seed_samples_same_blocks(tmp_path):
+    image = make_image(tmp_path / "wiped.img", 2048)
+    first = verify_storage(LocalBlockSource(image), BLOCK, seed=42)
+    second = verify_storage(LocalBlockSource(image), BLOCK, seed=42)
+    assert first["samples_sha256"] == second["samples_sha256"]
+
+
+@pytest.mark.parametrize("size", [0, BLOCK - 1])
+def test_image_without_whole_blocks_fails(tmp_path, size):
+    path = tmp_path / "empty.img"
+    path.write_bytes(b"\x00" * size)
+    report = verify_storage(LocalBlockSource(str(path)), BLOCK, seed=1)
+    assert report["total_blocks"] == 0
+    assert report["samples_read"] == 0
+    assert report["result"] == "failed"
+    assert "no whole" in report["failure"]
+
+
+def test_short_read_fails(tmp_path):
+    class TruncatedSource(LocalBlockSource):
+        def read_blocks(self, blocks, block_size):
+            return super().read_blocks(blocks[:len(blocks) // 2], block_size)
+
+    image = make_image(tmp_path / "wiped.img", 4096)
+    report = verify_storage(TruncatedSource(image), BLOCK, 0.99, 0.01, seed=3)
+    assert report["result"] == "failed"
+    assert report["failure"].startswith("Only ")
+
+
+@pytest.fixture
+def loop_device(tmp_path):
+    """A loop device over an image with a few unwiped blocks; needs root and losetup"""
+    import shutil
+    import subprocess
+
+    if os.geteuid() != 0 or not shutil.which("losetup"):
+        pytest.skip("needs root and losetup")
+    image = make_image(tmp_path / "loop.img", 4096, dirty=range(0, 4096, 8))
+    result = subprocess.run(["losetup", "--find", "--show", image], capture_output=True, text=True)
+    if result.returncode != 0:
+        pytest.skip(f"losetup failed: {result.stderr.strip()}")
+    device = result.stdout.strip()
+    yield device, image
+    subprocess.run(["losetup", "--detach", device], check=False)
+
+
+def test_loop_device(loop_device):
+    device, image = loop_device
+    report = verify_storage(LocalBlockSource(device), BLOCK, 0.999, 0.01, seed=5)
+    assert report["total_blocks"] == 4096
+    assert report["result"] == "failed"
+    assert report["first_unwiped_block"]["block"] % 8 == 0
+    # Wipe the backing image through the device, then the same sample passes
+    with open(device, "r+b") as f:
+        for block in range(0, 4096, 8):
+            f.seek(block * BLOCK)
+            f.write(b"\x00" * BLOCK)
+        f.flush()
+        os.fsync(f.fileno())
+    assert verify_storage(LocalBlockSource(device), BLOCK, 0.999, 0.01, seed=5)["result"] == "passed"
@@ -0,0 +1,108 @@
+"""
+Incremental ingest into the wipe log store: malformed logs, deleted files
+"""
+
+import json
+import os
+
+import pytest
+
+from fakeadb import fake_imei
+from wipelog_store import WipeLogStore, extract
+
+
+def wipe_log(serial, result="success", **overrides):
+    log = {
+        "timestamp": "2026-01-05T10:00:00",
+        "device_info": {"serial": serial, "imei": fake_imei(serial), "model": "Fake Phone", "manufacturer": "Fake"},
+        "result": result,
+        "errors": [],
+        "warnings": [],
+        "wipe_results": [{"partition": "userdata", "action": "erase", "status": "success",
+                          "size_bytes": 1024, "duration_seconds": 0.5}],
+        "stage_durations": {"wiped": 0.5},
+        "summary": {"start_time": "2026-01-05T10:00:00", "end_time": "2026-01-05T10:01:00",
+                    "duration_seconds": 60.0, "commands_executed": 12, "timed_out_commands": 0},
+    }
+    log.update(overrides)
+    return log
+
+
+def write(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(content if isinstance(content, str) else json.dumps(content))
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WipeLogStore(str(tmp_path / "wipes.sqlite3"))
+    yield store
+    store.close()
+
+
+def wipe_count(store):
+    return store.db.execute("SELECT COUNT(*) FROM wipes").fetchone()[0]
+
+
+@pytest.mark.parametrize("content", [
+    "[1, 2, 3]",
+    "\"just a string\"",
+    wipe_log("DEVX", device_info=["not", "a", "dict"]),
+    wipe_log("DEVX", summary="finished"),
+    wipe_log("DEVX", wipe_results={"userdata": "success"}),
+    wipe_log("DEVX", wipe_results=["userdata"]),
+    wipe_log("DEVX", wipe_results=[{"status": "success"}]),
+    wipe_log("DEVX", stage_durations={"wiped": "slow"}),
+    wipe_log("DEVX", result={"status": "success"}),
+    wipe_log("DEVX", device_info={"serial": ["DEVX"], "imei": 359760857203935}),
+])
+def test_malformed_logs_are_invalid(tmp_path, store, content):
+    path = write(str(tmp_path), "wipe_log_bad.json", content)
+    assert extract(path)[1] is None
+    counts = store.ingest([str(tmp_path)], jobs=1)
+    assert counts["invalid"] == 1
+    assert counts["ingested"] == 0
+    assert wipe_count(store) == 0
+
+
+def test_ingest_is_incremental(tmp_path, store):
+    for index in range(3):
+        write(str(tmp_path), f"wipe_log_DEV{index}.json", wipe_log(f"DEV{index}"))
+    assert store.ingest([str(tmp_path)], jobs=1)["ingested"] == 3
+    counts = store.ingest([str(tmp_path)], jobs=1)
+    assert (counts["ingested"], counts["unchanged"]) == (0, 3)
+    assert store.summary()["totalDevices"] == 3
+
+
+def test_deleted_files_are_pruned(tmp_path, store):
+    first = write(str(tmp_path), "wipe_log_DEV1.json", wipe_log("DEV1"))
+    write(str(tmp_path), "wipe_log_DEV2.json", wipe_log("DEV2"))
+    store.ingest([str(tmp_path)], jobs=1)
+    os.remove(first)
+    counts = store.ingest([str(tmp_path)], jobs=1)
+    assert counts["pruned"] == 1
+    assert wipe_count(store) == 1
+    assert store.summary()["totalDevices"] == 1
+    assert store.db.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 1
+
+
+def test_pruned_copy_keeps_the_wipe(tmp_path, store):
+    log = wipe_log("DEV1")
+    original = write(str(tmp_path), "wipe_log_DEV1.json", log)
+    copy = write(str(tmp_path), "wipe_log_DEV1_copy.json", log)
+    assert store.ingest([str(tmp_path)], jobs=1)["duplicate"] == 1
+    os.remove(original)
+    store.ingest([str(tmp_path)], jobs=1)
+    assert [row[0] for row in store.db.execute("SELECT path FROM wipes")] == [os.path.abspath(copy)]
+
+
+def test_log_that_turns_invalid_is_dropped(tmp_path, store):
+    path = write(str(tmp_path), "wipe_log_DEV1.json", wipe_log("DEV1"))
+    store.ingest([str(tmp_path)], jobs=1)
+    write(str(tmp_path), "wipe_log_DEV1.json", "{\"truncated\": ")
+    os.utime(path, ns=(1, 1))
+    counts = store.ingest([str(tmp_path)], jobs=1)
+    assert counts["invalid"] == 1
+    assert wipe_count(store) == 0
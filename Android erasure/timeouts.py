@@ -0,0 +1,82 @@
+"""
+Command Timeouts - per-command deadlines for andnr.py learned from history
+Each adb/fastboot command gets a deadline from how long the same command
+took before on the same model, in this run and in the device profiles,
+instead of one flat timeout for everything.
+"""
+
+import re
+import threading
+from collections import deque
+
+from metrics import command_kind, percentile
+
+
+# Command deadline when nothing is known yet about a command on a model
+DEFAULT_COMMAND_TIMEOUT = 120
+# Learned deadlines: the p99 of known durations times the factor, plus the margin in seconds
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_FACTOR = 1.5
+TIMEOUT_MARGIN = 10
+TIMEOUT_MIN_SAMPLES = 5
+MIN_COMMAND_TIMEOUT = 10
+MAX_COMMAND_TIMEOUT = 1800
+# Commands whose duration depends on the partition they touch
+PARTITION_COMMANDS = ("fastboot erase", "fastboot format")
+
+
+def timeout_key(argv):
+    """command_kind(), plus the partition (without slot suffix) for erase and format"""
+    kind = command_kind(argv)
+    if kind in PARTITION_COMMANDS and len(argv) > 2:
+        return f"{kind} {re.sub(r'_[ab]$', '', argv[-1])}"
+    return kind
+
+
+class TimeoutPolicy:
+    """Per-command deadlines learned from how long each command takes on each model.
+    
+    Durations come from this run and, through the profile registry, from
+    earlier ones. A command times out at a high percentile of what it has
+    taken before plus a margin, so a hung getprop fails in seconds while a
+    slow format is given longer than the flat default. Every learned
+    deadline that expires doubles the next one for that command and model.
+    """
+    
+    def __init__(self, profiles=None, default=DEFAULT_COMMAND_TIMEOUT, adaptive=True, window=200):
+        self.profiles = profiles
+        self.default = default
+        self.adaptive = adaptive
+        self.window = window
+        self.samples = {}
+        self.expired = {}
+        self.lock = threading.Lock()
+    
+    def deadline(self, key, device_info):
+        """(timeout in seconds, 'learned' or 'default') for a command on this device"""
+        if not self.adaptive:
+            return self.default, "default"
+        series = (key, device_info.get("model") or "unknown")
+        with self.lock:
+            samples = list(self.samples.get(series, ()))
+            expired = self.expired.get(series, 0)
+        if self.profiles:
+            for profile in self.profiles.related(device_info):
+                samples.extend(profile.get("command_seconds", {}).get(key, []))
+        if len(samples) < TIMEOUT_MIN_SAMPLES:
+            return self.default, "default"
+        seconds = (percentile(samples, TIMEOUT_PERCENTILE) * TIMEOUT_FACTOR + TIMEOUT_MARGIN) * 2 ** expired
+        return round(min(MAX_COMMAND_TIMEOUT, max(MIN_COMMAND_TIMEOUT, seconds)), 1), "learned"
+    
+    def observe(self, key, device_info, seconds, timed_out=False, source="default"):
+        series = (key, device_info.get("model") or "unknown")
+        with self.lock:
+            if timed_out:
+                # A timed-out run only says the command takes longer than its deadline
+                if source == "learned":
+                    self.expired[series] = self.expired.get(series, 0) + 1
+                return
+            samples = self.samples.get(series)
+            if samples is None:
+                samples = self.samples[series] = deque(maxlen=self.window)
+            samples.append(seconds)
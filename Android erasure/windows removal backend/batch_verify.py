@@ -0,0 +1,25 @@
+# batch_verify.py
+#
+# Verifies the ECDSA signatures of many JSON certificates in one run and
+# writes a machine-readable pass/fail report.
+#
+# Certificates can come from a directory (every *.json file), a glob pattern,
+# or a JSONL file with one certificate per line. Each public key is parsed
+# once per worker process and cached by its SHA-256 fingerprint, and the
+# verification work is spread across a process pool. The implementation
+# lives in certcore.batch; `python -m certcore batch-verify` is the same
+# command.
+#
+# Prerequisites:
+# pip install cryptography
+#
+# Usage:
+# python batch_verify.py <dir|glob|file.jsonl> <public_key_pem_path> [more_key_paths...]
+#                        [--workers N] [--report report.json]
+
+import sys
+
+from certcore.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main(["batch-verify"] + sys.argv[1:]))
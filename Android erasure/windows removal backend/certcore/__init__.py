@@ -0,0 +1,39 @@
+# certcore
+#
+# Shared core for the certificate tools: canonicalization, key loading and
+# signature verification, including Merkle-form certificates and field-level
+# inclusion proofs (certcore.merkle). PDF rendering (certcore.pdf), IPFS upload
+# (certcore.ipfs), batch verification (certcore.batch), the Python overwrite
+# engine (certcore.clear) and media verification (certcore.media, numpy) live
+# in their own modules so their heavy dependencies are only imported when used.
+#
+# The helpers below are re-exported from certcore.signing on first access, so
+# `import certcore` and subcommands that never verify a signature do not load
+# cryptography.
+#
+# Usage:
+# python -m certcore <subcommand> ...    (subcommands are listed in certcore/cli.py)
+
+__all__ = [
+    "canonicalize",
+    "key_fingerprint",
+    "load_pem_keys",
+    "load_public_key",
+    "verify_proof_bundle",
+    "verify_signature",
+    "verify_with_keys",
+]
+
+
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from . import signing
+
+    value = getattr(signing, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
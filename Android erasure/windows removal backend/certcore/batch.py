@@ -0,0 +1,107 @@
+# certcore/batch.py
+#
+# Batch signature verification: certificates from a directory (every *.json
+# file), a glob pattern, or a JSONL file with one certificate per line, spread
+# across a process pool. Each worker parses the public keys once.
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from .cache import hit_summary
+from .signing import load_pem_keys, verification_cache, verify_with_keys
+
+
+def iter_sources(source):
+    """Yields (source_id, kind, value) for every certificate in a dir, glob or JSONL file."""
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.json")))
+    elif source.endswith(".jsonl") and os.path.isfile(source):
+        with open(source, "r") as f:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    yield f"{source}:{line_no}", "text", line
+        return
+    else:
+        paths = sorted(glob.glob(source))
+    for path in paths:
+        yield path, "path", path
+
+
+def read_certificate(kind, value):
+    if kind == "path":
+        with open(value, "r") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+def verify_one(item):
+    """Worker entry point: loads one certificate and verifies it."""
+    source_id, kind, value = item
+    try:
+        data = read_certificate(kind, value)
+    except Exception as e:
+        return {"source": source_id, "certificate_id": None, "valid": False,
+                "status": f"Could not read certificate: {e}", "key_fingerprint": None}
+
+    if not isinstance(data, dict):
+        return {"source": source_id, "certificate_id": None, "valid": False,
+                "status": "Certificate is not a JSON object.", "key_fingerprint": None}
+
+    is_valid, status, fingerprint = verify_with_keys(data)
+    return {"source": source_id, "certificate_id": data.get("certificate_id"), "valid": is_valid,
+            "status": status, "key_fingerprint": fingerprint}
+
+
+def init_worker(pem_blobs):
+    load_pem_keys(pem_blobs)
+
+
+def read_pem_blobs(key_paths):
+    pem_blobs = []
+    for path in key_paths:
+        with open(path, "rb") as f:
+            pem_blobs.append(f.read())
+    return pem_blobs
+
+
+def verify_batch(source, key_paths, workers=None, chunksize=64):
+    """Verifies every certificate in source and returns the report dict."""
+    pem_blobs = read_pem_blobs(key_paths)
+    fingerprints = load_pem_keys(pem_blobs)
+
+    items = list(iter_sources(source))
+    workers = workers or os.cpu_count() or 1
+    results_cache = verification_cache()
+    counters_before = results_cache.counters() if results_cache else {}
+    start = time.perf_counter()
+    if workers == 1 or len(items) < chunksize:
+        results = [verify_one(item) for item in items]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(pem_blobs,)) as pool:
+            results = list(pool.map(verify_one, items, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    passed = sum(1 for result in results if result["valid"])
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "source": source,
+        "key_fingerprints": fingerprints,
+        "workers": workers,
+        "total": len(results),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "elapsed_seconds": round(elapsed, 3),
+        "certificates_per_second": round(len(results) / elapsed, 1) if elapsed > 0 else None,
+        "cache": hit_summary(counters_before, results_cache.counters()) if results_cache else None,
+        "results": results,
+    }
+
+
+def write_report(report, report_path):
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=4)
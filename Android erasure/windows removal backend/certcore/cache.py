@@ -0,0 +1,203 @@
+# certcore/cache.py
+#
+# Persistent cache of signature verification results, so a certificate that
+# is converted, uploaded and re-audited is only checked with ECDSA once.
+#
+# Results are keyed by (SHA-256 of the signed payload, signature, key
+# fingerprint) in a SQLite file, bounded to max_entries by evicting the
+# least recently used rows. Revoking a key drops its results and stops it
+# from being cached again; the authoritative list of revoked keys is
+# certcore.revocation, which is checked even with the cache off. Hit and miss
+# counters are kept in the file, so the hit rate covers every tool that
+# shares it.
+#
+# The cache is on by default at ~/.cache/zerotrace/verify_cache.sqlite3;
+# CERTCORE_CACHE=<path> moves it and CERTCORE_CACHE=off disables it. Anyone
+# who can write that file can make a signature check pass, so keep it
+# private to the operator account.
+
+import os
+import sqlite3
+import time
+from multiprocessing.util import Finalize
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "zerotrace", "verify_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 100_000
+# Writes are buffered and committed together once this many are pending
+FLUSH_EVERY = 64
+# Eviction runs once per this many inserts rather than on every one
+EVICT_EVERY = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    payload_sha256 TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    key_fingerprint TEXT NOT NULL,
+    valid INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (payload_sha256, signature, key_fingerprint)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS revoked_keys (
+    key_fingerprint TEXT PRIMARY KEY,
+    revoked_at REAL NOT NULL,
+    reason TEXT
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class VerificationCache:
+    """SQLite-backed LRU of verification results; one instance per process."""
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Worker processes share the file; WAL lets readers and one writer overlap
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.revoked = {row[0] for row in self.db.execute("SELECT key_fingerprint FROM revoked_keys")}
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        # Not yet committed: new results by key, last_used updates, and counter increments
+        self.pending = {}
+        self.touched = {}
+        self.pending_counts = {"hits": 0, "misses": 0}
+        # Also runs in pool workers, which exit without calling atexit handlers
+        Finalize(self, self.flush, exitpriority=10)
+
+    def _pending_writes(self):
+        return len(self.pending) + len(self.touched)
+
+    def lookup(self, payload_sha256, signature, key_fingerprint):
+        """Returns (is_valid, status) for a cached result, or None on a miss."""
+        key = (payload_sha256, signature, key_fingerprint)
+        row = self.pending.get(key)
+        if row is None:
+            row = self.db.execute(
+                "SELECT valid, status FROM results WHERE payload_sha256 = ? AND signature = ? AND key_fingerprint = ?",
+                key).fetchone()
+        if row is None:
+            self.misses += 1
+            self.pending_counts["misses"] += 1
+            return None
+        self.hits += 1
+        self.pending_counts["hits"] += 1
+        self.touched[key] = time.time()
+        if self._pending_writes() >= FLUSH_EVERY:
+            self.flush()
+        return bool(row[0]), row[1]
+
+    def store(self, payload_sha256, signature, key_fingerprint, is_valid, status):
+        if key_fingerprint in self.revoked:
+            return
+        self.pending[(payload_sha256, signature, key_fingerprint)] = (int(is_valid), status)
+        if self._pending_writes() >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Commits buffered results, LRU timestamps and counters in one transaction."""
+        if not (self.pending or self.touched or any(self.pending_counts.values())):
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                [(*key, valid, status, now, now)
+                                 for key, (valid, status) in self.pending.items()
+                                 if key[2] not in self.revoked])
+            self.db.executemany("UPDATE results SET last_used = ? WHERE payload_sha256 = ? AND signature = ? "
+                                "AND key_fingerprint = ?",
+                                [(used, *key) for key, used in self.touched.items()])
+            self.db.executemany("INSERT INTO counters (name, value) VALUES (?, ?) "
+                                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                                [(name, count) for name, count in self.pending_counts.items() if count])
+        previous = self.inserts
+        self.inserts += len(self.pending)
+        self.pending = {}
+        self.touched = {}
+        self.pending_counts = {"hits": 0, "misses": 0}
+        if self.inserts // EVICT_EVERY != previous // EVICT_EVERY:
+            self.evict()
+
+    def evict(self):
+        """Drops the least recently used rows beyond max_entries; returns how many went."""
+        with self.db:
+            cursor = self.db.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_entries,))
+        return cursor.rowcount
+
+    def is_revoked(self, key_fingerprint):
+        return key_fingerprint in self.revoked
+
+    def revoke(self, key_fingerprint, reason=None):
+        """Forgets every result for a key and refuses to trust it from now on; returns rows dropped."""
+        self.flush()
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO revoked_keys VALUES (?, ?, ?)",
+                            (key_fingerprint, time.time(), reason))
+            cursor = self.db.execute("DELETE FROM results WHERE key_fingerprint = ?", (key_fingerprint,))
+        self.revoked.add(key_fingerprint)
+        return cursor.rowcount
+
+    def clear(self):
+        self.pending = {}
+        self.touched = {}
+        self.pending_counts = {"hits": 0, "misses": 0}
+        with self.db:
+            self.db.execute("DELETE FROM results")
+            self.db.execute("DELETE FROM counters")
+
+    def counters(self):
+        self.flush()
+        return dict(self.db.execute("SELECT name, value FROM counters"))
+
+    def stats(self):
+        """Entry count plus session and lifetime hit rates."""
+        lifetime = self.counters()  # flushes first
+        lifetime_lookups = lifetime.get("hits", 0) + lifetime.get("misses", 0)
+        session_lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0],
+            "max_entries": self.max_entries,
+            "revoked_keys": len(self.revoked),
+            "session_hits": self.hits,
+            "session_lookups": session_lookups,
+            "session_hit_rate": round(self.hits / session_lookups, 4) if session_lookups else None,
+            "lifetime_hits": lifetime.get("hits", 0),
+            "lifetime_lookups": lifetime_lookups,
+            "lifetime_hit_rate": round(lifetime.get("hits", 0) / lifetime_lookups, 4) if lifetime_lookups else None,
+        }
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+def hit_summary(before, after):
+    """Hits and lookups between two counters() snapshots, so work done in worker processes is included."""
+    hits = after.get("hits", 0) - before.get("hits", 0)
+    lookups = hits + after.get("misses", 0) - before.get("misses", 0)
+    return {"hits": hits, "lookups": lookups, "hit_rate": round(hits / lookups, 4) if lookups else None}
+
+
+def open_default_cache():
+    """The cache selected by CERTCORE_CACHE, or None when it is disabled or unusable."""
+    setting = os.environ.get("CERTCORE_CACHE", DEFAULT_PATH)
+    if setting.lower() in ("", "0", "off", "none"):
+        return None
+    try:
+        return VerificationCache(setting)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,291 @@
+# certcore/canonical.py
+#
+# Streaming canonical JSON. The canonical bytes are fed into SHA-256 in
+# 64 KiB pieces as they are produced, so the full payload string is never
+# built and the certificate is never copied or mutated.
+#
+# Two canonical forms are supported:
+#
+#   legacy  What the Python tools have always signed and verified:
+#           json.dumps(cert without "signature", sort_keys=True,
+#           separators=(',', ':')), ASCII-escaped. The signature is DER and
+#           covers SHA256(payload).
+#
+#   rust    What WipeCertificate::sign in src/certificate.rs signs: the
+#           serde_json::to_string output, i.e. fields in document order,
+#           "signature": "" included, UTF-8 unescaped. sign() hashes the
+#           payload and SigningKey::sign hashes again, so the signature covers
+#           SHA256(SHA256(payload)). It is hex of the raw 64-byte r || s.
+
+import decimal
+import hashlib
+import json
+import math
+import time
+import tracemalloc
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+LEGACY = "legacy"
+RUST = "rust"
+# Bytes buffered before each hasher.update call
+CHUNK_SIZE = 64 * 1024
+
+
+def _legacy_float(value):
+    if value != value:
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+def _rust_float(value):
+    # serde_json prints floats with ryu. The digits are the shortest that round-trip, as in repr, but
+    # the layout differs: ryu writes plain decimals while the decimal point falls within 5 places before
+    # and 16 after the first digit (0.000015, 1000000000000000.0), and d.ddde<exp> beyond that (1e16,
+    # 1.5e-6), with no "+" or zero padding in the exponent.
+    if not value:
+        return "-0.0" if math.copysign(1.0, value) < 0 else "0.0"
+    sign, digits, exponent = decimal.Decimal(float.__repr__(value)).normalize().as_tuple()
+    digits = "".join(map(str, digits))
+    # Position of the decimal point counted from the first digit
+    point = len(digits) + exponent
+    if exponent >= 0 and point <= 16:
+        text = digits + "0" * exponent + ".0"
+    elif 0 < point <= 16:
+        text = f"{digits[:point]}.{digits[point:]}"
+    elif -5 < point <= 0:
+        text = "0." + "0" * -point + digits
+    else:
+        text = digits[0] + (f".{digits[1:]}" if len(digits) > 1 else "") + f"e{point - 1}"
+    return "-" + text if sign else text
+
+
+def _is_flat(value):
+    """True if a dict holds no lists at any depth, so encoding it whole stays small."""
+    return all(not isinstance(item, list) and (not isinstance(item, dict) or _is_flat(item))
+               for item in value.values())
+
+
+class _Emitter:
+    """Buffers canonical text and hands it to a sink in CHUNK_SIZE pieces.
+
+    Lists are the only thing that grows without bound in a certificate, so
+    they are emitted in batches of LIST_BATCH elements; everything else is
+    handed to the C-accelerated json encoder in one piece.
+    """
+
+    LIST_BATCH = 64
+
+    def __init__(self, sink, mode):
+        self.sink = sink
+        self.parts = []
+        self.size = 0
+        self.rust = mode == RUST
+        self.sort_keys = not self.rust
+        self.encode_str = encode_basestring if self.rust else encode_basestring_ascii
+        self.encode_float = _rust_float if self.rust else _legacy_float
+        self.encode_fast = json.JSONEncoder(sort_keys=self.sort_keys, ensure_ascii=not self.rust,
+                                            separators=(',', ':')).encode
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.sink("".join(self.parts).encode("utf-8"))
+            self.parts = []
+            self.size = 0
+
+    def emit(self, value):
+        if isinstance(value, dict):
+            if _is_flat(value):
+                self.emit_fast(value)
+            else:
+                self.emit_object(value.items())
+        elif isinstance(value, (list, tuple)):
+            self.emit_list(value)
+        else:
+            self.emit_scalar(value)
+
+    def emit_fast(self, value):
+        text = self.encode_fast(value)
+        # Every float json writes with an exponent (1e+21, 1.5e-05) is laid out
+        # differently by serde, so such values take the exact path instead
+        if self.rust and ("e+" in text or "e-" in text):
+            if isinstance(value, dict):
+                self.emit_object(value.items())
+            else:
+                self.emit_list(value, fast=False)
+            return
+        self.write(text)
+
+    def emit_scalar(self, value):
+        if isinstance(value, str):
+            self.write(self.encode_str(value))
+        elif value is None:
+            self.write("null")
+        elif value is True:
+            self.write("true")
+        elif value is False:
+            self.write("false")
+        elif isinstance(value, int):
+            self.write(int.__repr__(value))
+        elif isinstance(value, float):
+            self.write(self.encode_float(value))
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def emit_list(self, items, fast=True):
+        self.write("[")
+        for start in range(0, len(items), self.LIST_BATCH if fast else 1):
+            if start:
+                self.write(",")
+            if fast:
+                batch = list(items[start:start + self.LIST_BATCH])
+                text = self.encode_fast(batch)
+                if not self.rust or not ("e+" in text or "e-" in text):
+                    self.write(text[1:-1])
+                    continue
+                self.emit_list_items(batch)
+            else:
+                self.emit(items[start])
+        self.write("]")
+
+    def emit_list_items(self, items):
+        for index, item in enumerate(items):
+            if index:
+                self.write(",")
+            if isinstance(item, list):
+                self.emit_list(item, fast=False)
+            else:
+                self.emit(item)
+
+    def emit_object(self, items):
+        self.write("{")
+        for index, (key, item) in enumerate(sorted(items) if self.sort_keys else items):
+            if index:
+                self.write(",")
+            self.write(self.encode_str(str(key)))
+            self.write(":")
+            self.emit(item)
+        self.write("}")
+
+
+def _top_level_items(certificate_data, mode):
+    # Only the top level differs from the stored document, so it is rewritten lazily
+    for key, value in certificate_data.items():
+        if key == "signature":
+            if mode == RUST:
+                yield key, ""
+            continue
+        yield key, value
+
+
+def stream_canonical(certificate_data, sink, mode=LEGACY):
+    """Feeds the canonical payload of a certificate to sink(bytes) in chunks."""
+    emitter = _Emitter(sink, mode)
+    emitter.emit(dict(_top_level_items(certificate_data, mode)))
+    emitter.flush()
+
+
+def canonical_bytes(certificate_data, mode=LEGACY):
+    """The whole canonical payload; for tests and small documents."""
+    parts = []
+    stream_canonical(certificate_data, parts.append, mode)
+    return b"".join(parts)
+
+
+def payload_digest(certificate_data, mode=LEGACY):
+    """SHA-256 of the canonical payload, computed without materializing it."""
+    hasher = hashlib.sha256()
+    stream_canonical(certificate_data, hasher.update, mode)
+    return hasher.digest()
+
+
+def signing_digest(certificate_data, mode=LEGACY):
+    """The digest the ECDSA signature covers in the given mode."""
+    digest = payload_digest(certificate_data, mode)
+    return hashlib.sha256(digest).digest() if mode == RUST else digest
+
+
+def detect_mode(certificate_data):
+    """Rust signatures are raw r || s (128 hex chars); DER ones are 140-144."""
+    signature = certificate_data.get("signature") or ""
+    return RUST if len(signature) == 128 else LEGACY
+
+
+def signature_der(signature, mode):
+    """Signature bytes as DER, converting Rust's raw r || s form."""
+    if mode != RUST:
+        return signature
+    if len(signature) != 64:
+        raise ValueError("Raw ECDSA signature must be 64 bytes (r || s).")
+    # Imported here so canonicalization alone does not need cryptography
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+    return encode_dss_signature(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+
+
+def _synthetic_certificate(size_mb):
+    # Shaped like a certificate that embeds andnr.py command logs
+    line = "(bootloader) partition-size:userdata:0x3a2f7e000 " * 4
+    commands = []
+    while len(commands) * len(line) < size_mb * 1024 * 1024:
+        commands.append({"command": f"fastboot -s SERIAL erase userdata_{len(commands)}",
+                         "returncode": 0, "stdout": line, "stderr": "Finished. Total time: 0.051sé"})
+    return {
+        "certificate_id": "CERT-BENCH",
+        "device_info": {"model": "Pixel 6", "serial": "BENCH0001", "size_bytes": 137438953472,
+                        "imei": "350000000000000"},
+        "wipe_details": {"method": "fastboot", "passes": 1, "duration_seconds": 812.5,
+                         "commands_executed": commands},
+        "verification": {"method": "random_block_sampling", "result": "passed"},
+        "signature": "",
+    }
+
+
+def benchmark(size_mb=8, repeat=3):
+    """Compares peak memory and time of the old verify path with the streaming, prehashed one."""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public_key = private_key.public_key()
+    data = _synthetic_certificate(size_mb)
+    payload = json.dumps({k: v for k, v in data.items() if k != "signature"},
+                         sort_keys=True, separators=(',', ':')).encode('utf-8')
+    data["signature"] = private_key.sign(payload, ec.ECDSA(hashes.SHA256())).hex()
+    payload_size = len(payload)
+    del payload
+
+    def old_path():
+        copy = data.copy()
+        signature = bytes.fromhex(copy.pop("signature"))
+        body = json.dumps(copy, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        public_key.verify(signature, body, ec.ECDSA(hashes.SHA256()))
+
+    def streaming_path():
+        digest = signing_digest(data, LEGACY)
+        public_key.verify(bytes.fromhex(data["signature"]), digest, ec.ECDSA(Prehashed(hashes.SHA256())))
+
+    results = {"payload_bytes": payload_size}
+    for name, func in (("json_dumps", old_path), ("streaming", streaming_path)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        # Separate run for memory: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {"best_seconds": round(min(timings), 4), "peak_bytes": peak}
+    results["identical_payload"] = canonical_bytes(data, LEGACY) == json.dumps(
+        {k: v for k, v in data.items() if k != "signature"}, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return results
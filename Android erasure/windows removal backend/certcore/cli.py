@@ -0,0 +1,522 @@
+# certcore/cli.py
+#
+# One entry point for every certificate tool. Each subcommand imports its
+# backend (fpdf, ipfshttpclient, the process pool machinery) only when it
+# runs, so `verify` does not pay for PDF or IPFS imports. The `startup`
+# subcommand measures the cold-start cost of each subcommand in a fresh
+# interpreter.
+#
+# Usage:
+# python -m certcore verify <json_path> <public_key_pem_path>
+# python -m certcore batch-verify <dir|glob|file.jsonl> <public_key_pem_path>... [--workers N] [--report report.json]
+# python -m certcore pdf <json_path> <public_key_pem_path> <output_pdf_path>
+# python -m certcore bulk-pdf <dir|glob|file.jsonl> <public_key_pem_path> <output_dir> [--merge merged.pdf] [--workers N] [--logo logo.png]
+# python -m certcore upload <json_path> <public_key_pem_path> [--api /ip4/127.0.0.1/tcp/5001]
+# python -m certcore upload-batch <dir|glob|file.jsonl> <public_key_pem_path>... [--api URL] [--in-flight N]
+#                                 [--workers N] [--index cid_index.json] [--map cid_map.json] [--report report.json]
+# python -m certcore merkle-sign <json_path> <signing_key_pem_path> <output_json_path>
+# python -m certcore merkle-prove <json_path> <field_path>... [--out proof.json]
+# python -m certcore merkle-verify <proof_json_path> <public_key_pem_path>
+# python -m certcore clear <device_or_image> [--method ClearZeros|ClearRandom] [--passes N] [--direct]
+#                         [--workers N] [--chunk-mb 4] [--no-verify] [--media-verify] [--output cert.json]
+#                         [--key signing_key.pem]
+# python -m certcore verify-media <device_or_image> [--method ClearZeros|ClearRandom] [--regions 64] [--workers N]
+#                                 [--alpha 0.001] [--report media_report.json] [--json]
+# python -m certcore canonical-bench [--size-mb 8] [--repeat 3] [--json]
+# python -m certcore startup [--runs N] [--json]
+# python -m certcore cache stats [--json] | revoke <public_key_pem_path|fingerprint> [--reason TEXT] | clear
+#
+# Verification results are cached on disk (see certcore/cache.py). Put
+# --cache PATH or --no-cache before the subcommand to move or bypass it.
+# Revoked keys are listed separately (certcore/revocation.py) and always
+# checked; --revocations PATH moves that list.
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Subcommand -> module holding its implementation
+BACKENDS = {
+    "verify": "certcore.signing",
+    "batch-verify": "certcore.batch",
+    "pdf": "certcore.pdf",
+    "bulk-pdf": "certcore.pdf",
+    "upload": "certcore.ipfs",
+    "upload-batch": "certcore.upload_service",
+    "merkle-sign": "certcore.merkle",
+    "merkle-prove": "certcore.merkle",
+    "merkle-verify": "certcore.signing",
+    "canonical-bench": "certcore.canonical",
+    "clear": "certcore.clear",
+    "verify-media": "certcore.media",
+    "cache": "certcore.cache",
+}
+
+# Import name -> pip package, for the missing-dependency message
+PACKAGES = {"fpdf": "fpdf2"}
+
+
+def load_backend(command):
+    """Imports the backend module of a subcommand on first use."""
+    try:
+        return importlib.import_module(BACKENDS[command])
+    except ModuleNotFoundError as e:
+        sys.exit(f"Error: '{command}' needs the {e.name} package (pip install {PACKAGES.get(e.name, e.name)})")
+
+
+def cmd_verify(args):
+    signing = load_backend("verify")
+    try:
+        with open(args.json_path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Error reading JSON file: {e}")
+        return 1
+    is_valid, status_text = signing.verify_signature(args.key_path, data)
+    print(status_text)
+    return 0 if is_valid else 1
+
+
+def cmd_batch_verify(args):
+    batch = load_backend("batch-verify")
+    try:
+        report = batch.verify_batch(args.source, args.keys, workers=args.workers)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    batch.write_report(report, args.report)
+    print(f"Verified {report['total']} certificates: {report['passed']} passed, {report['failed']} failed")
+    print(f"Throughput: {report['certificates_per_second']} certificates/s with {report['workers']} workers")
+    print_cache_summary(report["cache"])
+    print(f"Report written to {args.report}")
+    return 0 if report["failed"] == 0 else 1
+
+
+def print_cache_summary(summary):
+    if summary and summary["lookups"]:
+        print(f"Verification cache: {summary['hits']}/{summary['lookups']} hits ({summary['hit_rate']:.1%})")
+
+
+def cmd_pdf(args):
+    pdf = load_backend("pdf")
+    pdf.create_certificate(args.json_path, args.key_path, args.pdf_path)
+    return 0
+
+
+def cmd_bulk_pdf(args):
+    pdf = load_backend("bulk-pdf")
+    summary = pdf.bulk_create(args.source, args.key_path, args.output_dir, merge_path=args.merge,
+                              workers=args.workers, logo_path=args.logo)
+    for error in summary["errors"]:
+        print(f"Error rendering {error['source']}: {error['error']}")
+    print(f"Rendered {summary['rendered']}/{summary['total']} certificates "
+          f"({summary['invalid']} with INVALID signatures)")
+    if summary["duplicate_ids"]:
+        print(f"{summary['duplicate_ids']} certificates reuse an earlier certificate_id; "
+              f"their PDFs carry the source name as well")
+    print(f"Throughput: {summary['certificates_per_second']} certificates/s with {summary['workers']} workers")
+    print_cache_summary(summary["cache"])
+    return 0 if not summary["errors"] else 1
+
+
+def cmd_upload(args):
+    ipfs = load_backend("upload")
+    print(f"Verifying signature for {args.json_path}...")
+    success, message, cid = ipfs.upload_certificate(args.json_path, args.key_path,
+                                                    client=ipfs.connect(args.api) if args.api else None)
+    print(message)
+    if not success:
+        print("Aborting upload. Only valid certificates should be uploaded.")
+        return 1
+    print(f"Successfully uploaded to IPFS. CID: {cid}")
+    print("You can view the file at: " + ipfs.GATEWAY_URL + cid)
+    return 0
+
+
+def cmd_upload_batch(args):
+    service = load_backend("upload-batch")
+    try:
+        summary = service.upload_batch(args.source, args.keys, api=args.api, in_flight=args.in_flight,
+                                       workers=args.workers, index_path=args.index, mapping_path=args.map)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=4)
+    for result in summary["results"]:
+        if result["action"] in ("rejected", "failed"):
+            print(f"{result['action'].upper()}: {result['source']}: {result.get('error') or result['status']}")
+    print(f"{summary['total']} certificates: {summary['uploaded']} uploaded, {summary['skipped']} already in IPFS, "
+          f"{summary['rejected']} rejected, {summary['failed']} failed")
+    if summary["distinct_uploads"]:
+        print(f"Uploads: {summary['uploads_per_second']} files/s over {summary['connections_opened']} connections "
+              f"({summary['in_flight']} in flight)")
+    else:
+        print("Uploads: nothing uploaded")
+    print_cache_summary(summary["cache"])
+    print(f"CID mapping written to {summary['mapping_path']}")
+    return 0 if not summary["failed"] else 1
+
+
+def cmd_merkle_sign(args):
+    merkle = load_backend("merkle-sign")
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+    try:
+        with open(args.json_path, 'r') as f:
+            data = json.load(f)
+        with open(args.key_path, 'rb') as f:
+            private_key = load_pem_private_key(f.read(), password=None)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    signed = merkle.sign_certificate(data, private_key)
+    with open(args.output_path, 'w') as f:
+        json.dump(signed, f, indent=4)
+    print(f"Signed Merkle root {signed['merkle']['root']} over {signed['merkle']['leaf_count']} fields")
+    print(f"Written to {args.output_path}")
+    return 0
+
+
+def cmd_merkle_prove(args):
+    merkle = load_backend("merkle-prove")
+    try:
+        with open(args.json_path, 'r') as f:
+            data = json.load(f)
+        bundle = merkle.prove(data, args.paths)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    if 'merkle' not in data:
+        print("Warning: certificate is not in Merkle form, so the proofs carry no signature.")
+    with open(args.out, 'w') as f:
+        json.dump(bundle, f, indent=4)
+    print(f"{len(bundle['proofs'])} inclusion proofs written to {args.out}")
+    return 0
+
+
+def cmd_merkle_verify(args):
+    signing = load_backend("merkle-verify")
+    try:
+        with open(args.proof_path, 'r') as f:
+            bundle = json.load(f)
+        fingerprint, _ = signing.load_public_key(args.key_path)
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    is_valid, status_text, fields = signing.verify_proof_bundle(bundle, [fingerprint])
+    print(status_text)
+    for path, value in fields.items():
+        print(f"  {path} = {json.dumps(value)}")
+    return 0 if is_valid else 1
+
+
+def cmd_clear(args):
+    clear = load_backend("clear")
+    private_key = None
+    if args.key:
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+        with open(args.key, 'rb') as f:
+            private_key = load_pem_private_key(f.read(), password=None)
+
+    def progress(stats):
+        label = "Verify" if stats["pass"] == "verify" else f"Pass {stats['pass']}/{args.passes}"
+        print(f"{label}: {stats['bytes'] / 1e6:.1f} MB in {stats['seconds']} s ({stats['mb_per_second']} MB/s)")
+
+    try:
+        result = clear.run_clear(args.target, args.method, args.passes, chunk_size=int(args.chunk_mb * 1024 * 1024),
+                                 workers=args.workers, direct=args.direct, verify=not args.no_verify,
+                                 progress=progress)
+        if args.media_verify and result["wipe_details"]["status"] == "Success":
+            # Statistical read-back in place of the keystream comparison, with its throughput
+            report = load_backend("verify-media").verify_media(args.target, args.method)
+            print_media_summary(report)
+            result["verification"] = report["verification"]
+            result["media_verification"] = report
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    certificate = clear.build_certificate(result, private_key)
+    with open(args.output, 'w') as f:
+        json.dump(certificate, f, indent=4)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(result, f, indent=4)
+    details = result["wipe_details"]
+    print(f"{details['status']}: {details['notes']}")
+    print(f"Verification: {result['verification']['result']}")
+    print(f"Certificate written to {args.output}" + ("" if private_key else " (unsigned)"))
+    return 0 if details["status"] == "Success" and result["verification"].get("passed", True) else 1
+
+
+def print_media_summary(report):
+    verification = report["verification"]
+    print(f"Verify ({report['workers']} workers): {verification['bytes_verified'] / 1e6:.1f} MB in "
+          f"{verification['duration_seconds']} s ({verification['throughput_mb_per_second']} MB/s)")
+    for region in report["regions"]:
+        if not region["passed"]:
+            offsets = region.get("nonzero_block_offsets", region.get("zero_block_offsets"))
+            print(f"  region {region['region']} at offset {region['offset']}: "
+                  + (f"p = {region['p_value']:.3g}, " if "p_value" in region else "")
+                  + f"suspect blocks at {offsets}")
+
+
+def cmd_verify_media(args):
+    media = load_backend("verify-media")
+    try:
+        report = media.verify_media(args.target, args.method, regions=args.regions, workers=args.workers,
+                                    chunk_size=int(args.chunk_mb * 1024 * 1024), alpha=args.alpha,
+                                    use_mmap=not args.no_mmap)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=4)
+    if args.json:
+        print(json.dumps(report["verification"], indent=4))
+    else:
+        print_media_summary(report)
+        print(f"{report['verification']['method']}: {report['verification']['result']}")
+    return 0 if report["verification"]["passed"] else 1
+
+
+def cmd_canonical_bench(args):
+    canonical = load_backend("canonical-bench")
+    results = canonical.benchmark(args.size_mb, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return 0
+    print(f"Payload: {results['payload_bytes'] / 1e6:.1f} MB, byte-identical: {results['identical_payload']}")
+    for name in ("json_dumps", "streaming"):
+        result = results[name]
+        print(f"{name:<12} {result['best_seconds']:>8.3f} s  peak {result['peak_bytes'] / 1e6:>8.2f} MB")
+    return 0
+
+
+def cmd_cache(args):
+    cache = load_backend("cache")
+    results = cache.open_default_cache()
+    if args.action == "revoke":
+        signing = load_backend("verify")
+        fingerprint = args.key
+        if os.path.isfile(args.key):
+            fingerprint, _ = signing.load_public_key(args.key)
+        revocations = signing.revocation_list()
+        try:
+            added = revocations.revoke(fingerprint, args.reason)
+        except (OSError, signing.revocation.RevocationError) as e:
+            print(f"Error: could not update {revocations.path}: {e}")
+            return 1
+        print(f"Revoked key {fingerprint} in {revocations.path}" if added
+              else f"Key {fingerprint} was already revoked in {revocations.path}")
+        if results is not None:
+            dropped = results.revoke(fingerprint, args.reason)
+            print(f"Dropped {dropped} cached results")
+        return 0
+
+    if results is None:
+        print("Verification cache is disabled.")
+        return 1
+    if args.action == "clear":
+        results.clear()
+        print(f"Cleared {results.path}")
+    else:
+        stats = results.stats()
+        if args.json:
+            print(json.dumps(stats, indent=4))
+            return 0
+        rate = stats["lifetime_hit_rate"]
+        print(f"Cache: {stats['path']}")
+        print(f"Entries: {stats['entries']}/{stats['max_entries']}, revoked keys: {stats['revoked_keys']}")
+        print(f"Hit rate: {stats['lifetime_hits']}/{stats['lifetime_lookups']}"
+              + (f" ({rate:.1%})" if rate is not None else ""))
+    return 0
+
+
+def measure_startup(runs=5):
+    """Times a fresh interpreter importing the CLI plus each subcommand's backend; returns ms per subcommand."""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+    scripts = {"interpreter": "pass", "cli": "import certcore.cli"}
+    for command in BACKENDS:
+        scripts[command] = f"import certcore.cli as c; c.load_backend({command!r})"
+
+    results = {}
+    for name, script in scripts.items():
+        timings = []
+        error = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", script], env=env,
+                                  capture_output=True, text=True)
+            timings.append((time.perf_counter() - start) * 1000)
+            if proc.returncode != 0:
+                error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+                break
+        results[name] = {
+            "min_ms": round(min(timings), 1),
+            "median_ms": round(statistics.median(timings), 1),
+            "runs": len(timings),
+            "error": error,
+        }
+    return results
+
+
+def cmd_startup(args):
+    results = measure_startup(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return 0
+    baseline = results["interpreter"]["median_ms"]
+    print(f"{'subcommand':<14} {'median ms':>10} {'min ms':>8} {'over python':>12}")
+    for name, result in results.items():
+        if result["error"]:
+            print(f"{name:<14} {'-':>10} {'-':>8}  unavailable: {result['error']}")
+            continue
+        print(f"{name:<14} {result['median_ms']:>10} {result['min_ms']:>8} "
+              f"{round(result['median_ms'] - baseline, 1):>12}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="certcore", description="Certificate verification, rendering and upload tools.")
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument("--cache", metavar="PATH", help="Verification cache file (default: $CERTCORE_CACHE "
+                             "or ~/.cache/zerotrace/verify_cache.sqlite3)")
+    cache_group.add_argument("--no-cache", action="store_true", help="Verify every signature from scratch")
+    parser.add_argument("--revocations", metavar="PATH", help="Revoked key list (default: $CERTCORE_REVOCATIONS "
+                        "or ~/.config/zerotrace/revoked_keys.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("verify", help="Verify the signature of one certificate")
+    p.add_argument("json_path")
+    p.add_argument("key_path", help="Public key PEM file")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("batch-verify", help="Verify many certificates and write a JSON report")
+    p.add_argument("source", help="Directory of *.json files, a glob pattern, or a .jsonl file")
+    p.add_argument("keys", nargs="+", help="Public key PEM file(s) to verify against")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.add_argument("--report", default="verification_report.json", help="Where to write the JSON report")
+    p.set_defaults(func=cmd_batch_verify)
+
+    p = sub.add_parser("pdf", help="Verify one certificate and render it to PDF")
+    p.add_argument("json_path")
+    p.add_argument("key_path", help="Public key PEM file")
+    p.add_argument("pdf_path")
+    p.set_defaults(func=cmd_pdf)
+
+    p = sub.add_parser("bulk-pdf", help="Render many certificates to PDF in one run")
+    p.add_argument("source", help="Directory of *.json files, a glob pattern, or a .jsonl file")
+    p.add_argument("key_path", help="Public key PEM file")
+    p.add_argument("output_dir")
+    p.add_argument("--merge", help="Write all certificates into this single multi-page PDF instead")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.add_argument("--logo", help="Logo image drawn in every page header")
+    p.set_defaults(func=cmd_bulk_pdf)
+
+    p = sub.add_parser("upload", help="Verify a certificate and upload it to IPFS")
+    p.add_argument("json_path")
+    p.add_argument("key_path", help="Public key PEM file")
+    p.add_argument("--api", help="IPFS API multiaddr (default: the local daemon)")
+    p.set_defaults(func=cmd_upload)
+
+    p = sub.add_parser("upload-batch", help="Verify many certificates and upload the valid ones to IPFS")
+    p.add_argument("source", help="Directory of *.json files, a glob pattern, or a .jsonl file")
+    p.add_argument("keys", nargs="+", help="Public key PEM file(s) to verify against")
+    p.add_argument("--api", default="http://127.0.0.1:5001", help="IPFS HTTP API URL or multiaddr")
+    p.add_argument("--in-flight", type=int, default=8, help="Maximum concurrent uploads (default: 8)")
+    p.add_argument("--workers", type=int, help="Verification processes (default: CPU count)")
+    p.add_argument("--index", default="cid_index.json", help="Content hash -> CID index used to skip re-uploads")
+    p.add_argument("--map", default="cid_map.json", help="Where to write the certificate_id -> CID mapping")
+    p.add_argument("--report", help="Also write a JSON report of every certificate")
+    p.set_defaults(func=cmd_upload_batch)
+
+    p = sub.add_parser("merkle-sign", help="Convert a certificate to Merkle form and sign its root")
+    p.add_argument("json_path")
+    p.add_argument("key_path", help="EC private key PEM file")
+    p.add_argument("output_path")
+    p.set_defaults(func=cmd_merkle_sign)
+
+    p = sub.add_parser("merkle-prove", help="Extract inclusion proofs for individual fields")
+    p.add_argument("json_path")
+    p.add_argument("paths", nargs="+", help="JSON Pointer paths, e.g. /device_info/serial or /wipe_results/3")
+    p.add_argument("--out", default="proof.json", help="Where to write the proof bundle")
+    p.set_defaults(func=cmd_merkle_prove)
+
+    p = sub.add_parser("merkle-verify", help="Verify a proof bundle against its signed Merkle root")
+    p.add_argument("proof_path")
+    p.add_argument("key_path", help="Public key PEM file")
+    p.set_defaults(func=cmd_merkle_verify)
+
+    p = sub.add_parser("clear", help="Overwrite a block device or image file (NIST 800-88 Clear) and certify it")
+    p.add_argument("target", help="Block device or image file; everything on it is destroyed")
+    p.add_argument("--method", choices=("ClearZeros", "ClearRandom"), default="ClearZeros",
+                   help="Pattern written on every pass (default: ClearZeros)")
+    p.add_argument("--passes", type=int, default=1, help="Overwrite passes (default: 1)")
+    p.add_argument("--direct", action="store_true", help="Bypass the page cache with O_DIRECT")
+    p.add_argument("--workers", type=int, default=4, help="Threads writing at once (default: 4)")
+    p.add_argument("--chunk-mb", type=float, default=4, help="Bytes per write in MiB (default: 4)")
+    p.add_argument("--no-verify", action="store_true", help="Skip reading the last pass back")
+    p.add_argument("--media-verify", action="store_true",
+                   help="Certify with the statistical full read-back of verify-media (needs numpy)")
+    p.add_argument("--output", default="cert.json", help="Where to write the certificate (default: cert.json)")
+    p.add_argument("--key", help="EC private key PEM file to sign the certificate with")
+    p.add_argument("--report", help="Also write the result with per-pass throughput as JSON")
+    p.set_defaults(func=cmd_clear)
+
+    p = sub.add_parser("verify-media", help="Check that overwritten media is all zero or statistically random")
+    p.add_argument("target", help="Block device or image file, opened read-only")
+    p.add_argument("--method", choices=("ClearZeros", "ClearRandom"), default="ClearZeros",
+                   help="Pattern the media was overwritten with (default: ClearZeros)")
+    p.add_argument("--regions", type=int, default=64, help="Independently tested regions (default: 64)")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.add_argument("--chunk-mb", type=float, default=16, help="Bytes per NumPy chunk in MiB (default: 16)")
+    p.add_argument("--alpha", type=float, default=0.001,
+                   help="Largest chance of failing truly random media, split between the whole-target "
+                        "and per-region tests (default: 0.001)")
+    p.add_argument("--no-mmap", action="store_true", help="Stream with preadv instead of memory-mapping")
+    p.add_argument("--report", help="Write the per-region results as JSON")
+    p.add_argument("--json", action="store_true", help="Print the certificate verification section as JSON")
+    p.set_defaults(func=cmd_verify_media)
+
+    p = sub.add_parser("canonical-bench", help="Compare the json.dumps and streaming verification paths")
+    p.add_argument("--size-mb", type=float, default=8, help="Size of the synthetic certificate (default: 8)")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per path (default: 3)")
+    p.add_argument("--json", action="store_true", help="Print the measurements as JSON")
+    p.set_defaults(func=cmd_canonical_bench)
+
+    p = sub.add_parser("startup", help="Measure cold-start time of every subcommand")
+    p.add_argument("--runs", type=int, default=5, help="Fresh interpreters per subcommand (default: 5)")
+    p.add_argument("--json", action="store_true", help="Print the measurements as JSON")
+    p.set_defaults(func=cmd_startup)
+
+    p = sub.add_parser("cache", help="Show verification cache statistics, revoke a key, or clear the cache")
+    p.add_argument("action", choices=("stats", "revoke", "clear"))
+    p.add_argument("key", nargs="?", help="Public key PEM file or hex fingerprint to revoke")
+    p.add_argument("--reason", help="Why the key is revoked (stored with the revocation)")
+    p.add_argument("--json", action="store_true", help="Print the statistics as JSON")
+    p.set_defaults(func=cmd_cache)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "cache" and args.action == "revoke" and not args.key:
+        parser.error("cache revoke needs a public key PEM file or fingerprint")
+    # Through the environment, so worker processes pick the same setting up
+    if args.no_cache:
+        os.environ["CERTCORE_CACHE"] = "off"
+    elif args.cache:
+        os.environ["CERTCORE_CACHE"] = args.cache
+    if args.revocations:
+        os.environ["CERTCORE_REVOCATIONS"] = args.revocations
+    return args.func(args)
@@ -0,0 +1,42 @@
+# certcore/ipfs.py
+#
+# Uploads verified certificates to IPFS. Only certificates whose signature
+# checks out are uploaded; the signed JSON itself is never modified.
+#
+# Prerequisites:
+# pip install ipfshttpclient cryptography
+
+import json
+
+import ipfshttpclient
+
+from .signing import verify_signature
+
+GATEWAY_URL = "https://ipfs.io/ipfs/"
+
+
+def connect(addr=None):
+    """Connects to the IPFS daemon (the local API by default)."""
+    if addr:
+        return ipfshttpclient.connect(addr)
+    return ipfshttpclient.connect()
+
+
+def upload_certificate(json_path, key_path, client=None):
+    """Verifies a certificate file and adds it to IPFS; returns (success, message, cid)."""
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        return False, f"Could not read JSON file at {json_path}. {e}", None
+
+    is_valid, status_text = verify_signature(key_path, data)
+    if not is_valid:
+        return False, f"Verification FAILED: {status_text}", None
+
+    try:
+        client = client or connect()
+        res = client.add(json_path)
+    except Exception as e:
+        return False, f"Failed to connect to or upload to IPFS daemon: {e}", None
+    return True, f"Verification PASSED: {status_text}", res['Hash']
@@ -0,0 +1,185 @@
+# certcore/merkle.py
+#
+# Merkle-structured canonical form. Every scalar field of a certificate (and
+# every empty object or list) becomes one leaf, addressed by its JSON Pointer
+# path, e.g. /device_info/serial or /wipe_results/3/status. The leaves are
+# sorted by path and hashed into a binary tree, and the signature covers
+# only the root. One field, or one wipe_results entry, can then be proven
+# with O(log n) sibling hashes, without the rest of the document.
+#
+# Hashing is domain separated in the style of RFC 6962: a leaf is
+# SHA256(0x00 || canonical JSON of [segments, value]) and an inner node is
+# SHA256(0x01 || left || right). An odd node at the end of a level moves up
+# unchanged. The segments are the path with list indexes as JSON numbers and
+# object keys as strings, so {"a": [1]} and {"a": {"0": 1}} hash differently
+# although both have the leaf /a/0. The version is 2 and no other is accepted:
+# version 1 hashed the pointer string and could not tell them apart.
+#
+# A certificate in this form carries a "merkle" object next to its
+# "signature"; both are left out of the leaves.
+
+import hashlib
+import json
+
+MERKLE_VERSION = 2
+EXCLUDED_FIELDS = ("signature", "merkle")
+
+
+def _pointer_token(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def json_pointer(segments):
+    return "".join(f"/{_pointer_token(segment)}" for segment in segments)
+
+
+def iter_leaves(value, segments=()):
+    """Yields (segments, value) for every scalar and empty container; list indexes are ints, keys strings."""
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            yield from iter_leaves(item, (*segments, str(key)))
+    elif isinstance(value, list) and value:
+        for index, item in enumerate(value):
+            yield from iter_leaves(item, (*segments, index))
+    else:
+        yield segments, value
+
+
+def certificate_leaves(certificate_data):
+    """(json_pointer, segments, value) leaves of a certificate, sorted by pointer, without signature and merkle."""
+    fields = {key: value for key, value in certificate_data.items() if key not in EXCLUDED_FIELDS}
+    return sorted(((json_pointer(segments), list(segments), value) for segments, value in iter_leaves(fields)),
+                  key=lambda leaf: leaf[0])
+
+
+def certificate_version(certificate_data):
+    """Merkle version a certificate was signed with; unsigned data gets the current one."""
+    version = (certificate_data.get("merkle") or {}).get("version", MERKLE_VERSION)
+    if version != MERKLE_VERSION:
+        raise ValueError(f"Unsupported Merkle version {version}.")
+    return version
+
+
+def leaf_hash(segments, value):
+    encoded = json.dumps([segments, value], sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(b"\x00" + encoded).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaf_hashes):
+    """Returns every level of the tree, leaves first and the root level last."""
+    if not leaf_hashes:
+        return [[hashlib.sha256(b"").digest()]]
+    levels = [list(leaf_hashes)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def _levels(leaves):
+    return build_levels([leaf_hash(segments, value) for _, segments, value in leaves])
+
+
+def merkle_root(certificate_data):
+    """Hex root over the certificate's field leaves, and the number of leaves."""
+    certificate_version(certificate_data)
+    leaves = certificate_leaves(certificate_data)
+    return _levels(leaves)[-1][0].hex(), len(leaves)
+
+
+def root_message(root_hex):
+    """The bytes the ECDSA signature covers: a domain tag naming the version, then the raw root."""
+    return f"zerotrace-merkle-v{MERKLE_VERSION}:".encode("ascii") + bytes.fromhex(root_hex)
+
+
+def describe(certificate_data):
+    """The "merkle" object stored in a Merkle-form certificate."""
+    root, leaf_count = merkle_root(certificate_data)
+    return {"version": MERKLE_VERSION, "hash": "sha256", "leaf_count": leaf_count, "root": root}
+
+
+def sign_certificate(certificate_data, private_key):
+    """Returns a copy of the certificate in Merkle form, signed with an EC private key."""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    signed = {key: value for key, value in certificate_data.items() if key not in EXCLUDED_FIELDS}
+    signed["merkle"] = describe(signed)
+    signature = private_key.sign(root_message(signed["merkle"]["root"]), ec.ECDSA(hashes.SHA256()))
+    signed["signature"] = signature.hex()
+    return signed
+
+
+def _audit_path(levels, index):
+    siblings = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            siblings.append(["L" if sibling < index else "R", level[sibling].hex()])
+        index //= 2
+    return siblings
+
+
+def prove(certificate_data, paths):
+    """Builds a proof bundle for the given paths; a path to an object or list covers every leaf below it."""
+    version = certificate_version(certificate_data)
+    leaves = certificate_leaves(certificate_data)
+    levels = _levels(leaves)
+
+    proofs = []
+    for wanted in paths:
+        matched = [(index, path, segments, value) for index, (path, segments, value) in enumerate(leaves)
+                   if path == wanted or path.startswith(wanted.rstrip("/") + "/")]
+        if not matched:
+            raise KeyError(f"No field at {wanted}")
+        for index, path, segments, value in matched:
+            proofs.append({"path": path, "segments": segments, "value": value, "index": index,
+                           "siblings": _audit_path(levels, index)})
+
+    return {
+        "certificate_id": certificate_data.get("certificate_id"),
+        "merkle": certificate_data.get("merkle") or {
+            "version": version, "hash": "sha256", "leaf_count": len(leaves),
+            "root": levels[-1][0].hex()},
+        "signature": certificate_data.get("signature"),
+        "proofs": proofs,
+    }
+
+
+def proof_root(proof):
+    """Recomputes the root hex implied by one inclusion proof."""
+    segments = proof.get("segments")
+    if not isinstance(segments, list) or json_pointer(segments) != proof["path"]:
+        raise ValueError(f"segments of {proof['path']} do not spell its path")
+    current = leaf_hash(segments, proof["value"])
+    for side, sibling_hex in proof["siblings"]:
+        sibling = bytes.fromhex(sibling_hex)
+        current = node_hash(sibling, current) if side == "L" else node_hash(current, sibling)
+    return current.hex()
+
+
+def verify_proofs(bundle):
+    """Checks every proof in a bundle against its root; returns (is_valid, status, {path: value})."""
+    root = (bundle.get("merkle") or {}).get("root")
+    if not root:
+        return False, "Proof bundle has no Merkle root.", {}
+    try:
+        certificate_version(bundle)
+    except ValueError as e:
+        return False, str(e), {}
+    fields = {}
+    for proof in bundle.get("proofs", []):
+        try:
+            if proof_root(proof) != root:
+                return False, f"Inclusion proof for {proof['path']} does not match the root.", {}
+        except (KeyError, TypeError, ValueError) as e:
+            return False, f"Malformed inclusion proof: {e}", {}
+        fields[proof["path"]] = proof["value"]
+    return True, f"{len(fields)} fields proven against the Merkle root", fields
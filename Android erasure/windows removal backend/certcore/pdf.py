@@ -0,0 +1,245 @@
+# certcore/pdf.py
+#
+# PDF rendering for certificates. Every field of the JSON is laid out on the
+# page. Bulk mode renders many certificates in one run across worker
+# processes, each of which parses the public key and logo once. Each PDF is
+# named after its certificate_id; a later source with an id already used in
+# the run gets its source name appended instead of overwriting the first.
+
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+
+from .batch import iter_sources, read_certificate, read_pem_blobs
+from .cache import hit_summary
+from .signing import load_pem_keys, verification_cache, verify_signature, verify_with_keys
+
+
+class PDF(FPDF):
+    # Logo bytes shared by every document rendered in this process
+    logo = None
+
+    def header(self):
+        if self.logo:
+            self.image(io.BytesIO(self.logo), 10, 8, 20)
+        self.set_font('Helvetica', 'B', 12)
+        self.cell(0, 10, 'Certificate of Data Destruction', 0, 1, 'C')
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Helvetica', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+
+def load_logo(logo_path):
+    """Reads the logo once per process so every document reuses the same bytes."""
+    if logo_path:
+        with open(logo_path, "rb") as f:
+            PDF.logo = f.read()
+
+
+def _pdf_text(value):
+    # The built-in PDF fonts only cover latin-1
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _field_rows(data, prefix=""):
+    """Flattens nested certificate fields, lists of lists included, into (label, value) rows."""
+    for key, value in data.items():
+        yield from _value_rows(f"{prefix}{key}", value)
+
+
+def _value_rows(label, value):
+    if isinstance(value, dict):
+        yield from _field_rows(value, f"{label}.")
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _value_rows(f"{label}[{index}]", item)
+    else:
+        yield label, value
+
+
+def render_certificate(pdf, data, is_valid, verification_status_text):
+    """Adds one certificate page, with every field of the JSON, to pdf."""
+    pdf.add_page()
+
+    # --- Signature Status Section ---
+    pdf.set_font('Helvetica', 'B', 14)
+    if is_valid:
+        pdf.set_text_color(0, 128, 0) # Green
+        pdf.cell(0, 10, "Certificate Status: VERIFIED", 0, 1, 'C')
+    else:
+        pdf.set_text_color(255, 0, 0) # Red
+        pdf.cell(0, 10, "Certificate Status: INVALID", 0, 1, 'C')
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font('Courier', '', 8)
+    pdf.cell(0, 5, _pdf_text(verification_status_text), 0, 1, 'C')
+    pdf.ln(10)
+
+    # --- Certificate Details ---
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 10, _pdf_text(f"Certificate ID: {data.get('certificate_id', 'N/A')}"), 0, 1, 'L')
+
+    for key, value in data.items():
+        if key in ('certificate_id', 'signature'):
+            continue
+        pdf.set_font('Helvetica', 'B', 11)
+        pdf.cell(0, 8, _pdf_text(key.replace('_', ' ').title()), 0, 1, 'L')
+        if isinstance(value, dict):
+            rows = _field_rows(value)
+        elif isinstance(value, list):
+            rows = _field_rows({key: value})
+        else:
+            rows = [(key, value)]
+        for label, item in rows:
+            pdf.set_font('Helvetica', 'B', 9)
+            pdf.cell(60, 6, _pdf_text(label), 0, 0, 'L')
+            pdf.set_font('Helvetica', '', 9)
+            pdf.multi_cell(0, 6, _pdf_text(item), new_x='LMARGIN', new_y='NEXT')
+        pdf.ln(2)
+
+    if data.get('signature'):
+        pdf.set_font('Helvetica', 'B', 11)
+        pdf.cell(0, 8, 'Signature', 0, 1, 'L')
+        pdf.set_font('Courier', '', 7)
+        pdf.multi_cell(0, 4, _pdf_text(data['signature']), new_x='LMARGIN', new_y='NEXT')
+
+
+def create_certificate(json_path, key_path, pdf_path):
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Error reading JSON file: {e}")
+        return
+
+    # Verify the signature first
+    is_valid, verification_status_text = verify_signature(key_path, data.copy()) # Pass a copy
+
+    pdf = PDF()
+    render_certificate(pdf, data, is_valid, verification_status_text)
+
+    try:
+        pdf.output(pdf_path)
+        print(f"Successfully created PDF certificate at {pdf_path}")
+    except Exception as e:
+        print(f"Error saving PDF: {e}")
+
+
+def _init_bulk_worker(pem_blobs, logo_path):
+    load_pem_keys(pem_blobs)
+    load_logo(logo_path)
+
+
+def _render_one(job):
+    """Worker entry point: verifies one certificate and writes its PDF under a name unique to the job."""
+    (source_id, kind, value), output_dir, index = job
+    pdf_path = os.path.join(output_dir, f".rendering-{index}.pdf")
+    try:
+        data = read_certificate(kind, value)
+        is_valid, status_text, _ = verify_with_keys(data)
+        name = data.get('certificate_id') or os.path.splitext(os.path.basename(source_id))[0]
+        pdf = PDF()
+        render_certificate(pdf, data, is_valid, status_text)
+        pdf.output(pdf_path)
+        return {"source": source_id, "pdf": pdf_path, "name": str(name), "valid": is_valid, "error": None}
+    except Exception as e:
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+        return {"source": source_id, "pdf": None, "valid": False, "error": str(e)}
+
+
+def _place_pdfs(results, output_dir):
+    """Moves rendered PDFs to <certificate_id>.pdf, in source order; returns how many ids were already taken."""
+    taken = set()
+    duplicates = 0
+    for result in results:
+        name = result.pop("name", None)
+        if not result["pdf"]:
+            continue
+        path = os.path.join(output_dir, f"{name}.pdf".replace(os.sep, '_'))
+        if path in taken:
+            duplicates += 1
+            suffix = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(result["source"]))
+            base = os.path.join(output_dir, f"{name}--{suffix}".replace(os.sep, '_'))
+            path, count = f"{base}.pdf", 1
+            while path in taken:
+                count += 1
+                path = f"{base}-{count}.pdf"
+            result["duplicate_id"] = True
+        taken.add(path)
+        os.replace(result["pdf"], path)
+        result["pdf"] = path
+    return duplicates
+
+
+def _verify_one(item):
+    source_id, kind, value = item
+    try:
+        data = read_certificate(kind, value)
+        is_valid, status_text, _ = verify_with_keys(data)
+        return source_id, data, is_valid, status_text
+    except Exception as e:
+        return source_id, None, False, str(e)
+
+
+def bulk_create(source, key_path, output_dir, merge_path=None, workers=None, logo_path=None):
+    """Renders every certificate in source; returns a summary dict with certificates/sec."""
+    pem_blobs = read_pem_blobs([key_path])
+    load_pem_keys(pem_blobs)
+    load_logo(logo_path)
+
+    items = list(iter_sources(source))
+    workers = workers or os.cpu_count() or 1
+    results_cache = verification_cache()
+    counters_before = results_cache.counters() if results_cache else {}
+    start = time.perf_counter()
+    duplicates = 0
+
+    if merge_path:
+        # One document: verify in parallel, then lay the pages out in order in this process
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_bulk_worker,
+                                     initargs=(pem_blobs, None)) as pool:
+                verified = list(pool.map(_verify_one, items, chunksize=32))
+        else:
+            verified = [_verify_one(item) for item in items]
+        pdf = PDF()
+        results = []
+        for source_id, data, is_valid, status_text in verified:
+            if data is None:
+                results.append({"source": source_id, "pdf": None, "valid": False, "error": status_text})
+                continue
+            render_certificate(pdf, data, is_valid, status_text)
+            results.append({"source": source_id, "pdf": merge_path, "valid": is_valid, "error": None})
+        pdf.output(merge_path)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = [(item, output_dir, index) for index, item in enumerate(items)]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_bulk_worker,
+                                     initargs=(pem_blobs, logo_path)) as pool:
+                results = list(pool.map(_render_one, jobs, chunksize=8))
+        else:
+            results = [_render_one(job) for job in jobs]
+        duplicates = _place_pdfs(results, output_dir)
+
+    elapsed = time.perf_counter() - start
+    rendered = sum(1 for result in results if result["pdf"])
+    return {
+        "total": len(results),
+        "rendered": rendered,
+        "invalid": sum(1 for result in results if result["pdf"] and not result["valid"]),
+        "errors": [result for result in results if result["error"]],
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "duplicate_ids": duplicates,
+        "certificates_per_second": round(rendered / elapsed, 1) if elapsed > 0 else None,
+        "cache": hit_summary(counters_before, results_cache.counters()) if results_cache else None,
+    }
@@ -0,0 +1,87 @@
+# certcore/revocation.py
+#
+# The list of revoked signing keys. It is kept apart from the verification
+# cache (certcore.cache), so turning the cache off with --no-cache or
+# CERTCORE_CACHE=off, or losing the cache file, never lets a revoked key
+# validate again. Every signature check consults it.
+#
+# The list is a small JSON file mapping key fingerprints to when and why they
+# were revoked: ~/.config/zerotrace/revoked_keys.json, or the path in
+# CERTCORE_REVOCATIONS. A missing file is an empty list. A file that exists
+# but cannot be read or parsed raises RevocationError, and verification
+# reports that instead of a result. The file is read again whenever it
+# changes, so a revocation reaches long-running batch workers as well.
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".config", "zerotrace", "revoked_keys.json")
+
+
+class RevocationError(Exception):
+    """The revocation list exists but could not be read."""
+
+
+def default_path():
+    return os.environ.get("CERTCORE_REVOCATIONS") or DEFAULT_PATH
+
+
+class RevocationList:
+    """Revoked key fingerprints from a JSON file, re-read whenever the file changes."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        # (mtime, size, inode) of the file last read, or None for no file
+        self.stamp = None
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise RevocationError(f"Cannot read {self.path}: {e}") from e
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            raise RevocationError(f"Cannot read {self.path}: {e}") from e
+        entries = document.get("revoked_keys") if isinstance(document, dict) else None
+        if not isinstance(entries, dict):
+            raise RevocationError(f"{self.path} has no revoked_keys object.")
+        return entries
+
+    def load(self):
+        """{fingerprint: {"revoked_at", "reason"}}, re-read if the file changed since the last call."""
+        stamp = self._stamp()
+        with self.lock:
+            if stamp != self.stamp:
+                self.entries = self._read() if stamp else {}
+                self.stamp = stamp
+            return self.entries
+
+    def is_revoked(self, fingerprint):
+        return fingerprint in self.load()
+
+    def revoke(self, fingerprint, reason=None):
+        """Adds a key and replaces the file in one rename; returns False if it was already revoked."""
+        entries = dict(self.load())
+        if fingerprint in entries:
+            return False
+        entries[fingerprint] = {"revoked_at": datetime.now(timezone.utc).isoformat(), "reason": reason}
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"revoked_keys": entries}, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return True
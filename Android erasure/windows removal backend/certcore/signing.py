@@ -0,0 +1,208 @@
+# certcore/signing.py
+#
+# Canonicalization and ECDSA signature verification shared by every
+# certificate tool. Public keys are parsed once per process and cached by
+# the SHA-256 fingerprint of their DER SubjectPublicKeyInfo. Certificates in
+# Merkle form (see certcore.merkle) are verified against their signed root.
+#
+# Verification is prehashed: the canonical payload is hashed as it is
+# produced (certcore.canonical) and only the digest reaches ECDSA. Both the
+# legacy Python form and certificates signed by the Rust engine are accepted.
+#
+# Results are remembered in a persistent cache (certcore.cache) keyed by the
+# digest, the signature and the key fingerprint, so a certificate seen by
+# one tool is not checked again by the next. Revoked keys never validate:
+# the revocation list (certcore.revocation) is checked on every call, with or
+# without the cache, and an unreadable list fails the check.
+
+import hashlib
+import json
+import os
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+from cryptography.hazmat.primitives.serialization import (
+    Encoding, PublicFormat, load_pem_public_key)
+
+from . import cache, canonical, merkle, revocation
+
+# Fingerprint -> parsed public key, and key file path -> fingerprint
+_KEYS_BY_FINGERPRINT = {}
+_FINGERPRINT_BY_PATH = {}
+# Process-wide verification cache, opened on first use; (pid, cache or None)
+_CACHE = None
+# Connections inherited from a forked parent; kept referenced so they are never closed here
+_INHERITED_CACHES = []
+# Process-wide revocation list, opened on first use
+_REVOCATIONS = None
+
+
+def canonicalize(certificate_data):
+    """Returns the signed payload: the certificate *without* its signature, as canonical JSON bytes."""
+    payload = {key: value for key, value in certificate_data.items() if key != 'signature'}
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def key_fingerprint(public_key):
+    """SHA-256 over the DER SubjectPublicKeyInfo, as hex."""
+    der = public_key.public_bytes(Encoding.DER, PublicFormat.SubjectPublicKeyInfo)
+    return hashlib.sha256(der).hexdigest()
+
+
+def load_pem_keys(pem_blobs):
+    """Parses PEM public keys into the process-wide cache, returns their fingerprints."""
+    fingerprints = []
+    for pem in pem_blobs:
+        public_key = load_pem_public_key(pem)
+        fingerprint = key_fingerprint(public_key)
+        _KEYS_BY_FINGERPRINT.setdefault(fingerprint, public_key)
+        fingerprints.append(fingerprint)
+    return fingerprints
+
+
+def load_public_key(public_key_path):
+    """Loads a PEM public key file once per process; returns (fingerprint, public_key)."""
+    fingerprint = _FINGERPRINT_BY_PATH.get(public_key_path)
+    if fingerprint is None:
+        with open(public_key_path, "rb") as f:
+            fingerprint = load_pem_keys([f.read()])[0]
+        _FINGERPRINT_BY_PATH[public_key_path] = fingerprint
+    return fingerprint, _KEYS_BY_FINGERPRINT[fingerprint]
+
+
+def cached_key(fingerprint):
+    return _KEYS_BY_FINGERPRINT.get(fingerprint)
+
+
+def cached_fingerprints():
+    return list(_KEYS_BY_FINGERPRINT)
+
+
+def verification_cache():
+    """The process-wide VerificationCache, or None when CERTCORE_CACHE disables it."""
+    global _CACHE
+    if _CACHE is not None and _CACHE[0] != os.getpid():
+        # A SQLite connection must not be used across fork; workers open their own
+        _INHERITED_CACHES.append(_CACHE[1])
+        _CACHE = None
+    if _CACHE is None:
+        _CACHE = (os.getpid(), cache.open_default_cache())
+    return _CACHE[1]
+
+
+def set_verification_cache(verification_cache):
+    """Replaces the process-wide cache; None turns caching off."""
+    global _CACHE
+    _CACHE = (os.getpid(), verification_cache)
+
+
+def revocation_list():
+    """The process-wide RevocationList at $CERTCORE_REVOCATIONS or the default path."""
+    global _REVOCATIONS
+    if _REVOCATIONS is None:
+        _REVOCATIONS = revocation.RevocationList(revocation.default_path())
+    return _REVOCATIONS
+
+
+def set_revocation_list(revocations):
+    global _REVOCATIONS
+    _REVOCATIONS = revocations
+
+
+def signed_digest(certificate_data):
+    """(digest the signature covers, signature mode) for a legacy, Rust or Merkle-form certificate."""
+    if 'merkle' not in certificate_data:
+        mode = canonical.detect_mode(certificate_data)
+        return canonical.signing_digest(certificate_data, mode), mode
+    root, _ = merkle.merkle_root(certificate_data)
+    if root != certificate_data['merkle'].get('root'):
+        raise ValueError("Merkle root does not match the certificate fields.")
+    return hashlib.sha256(merkle.root_message(root)).digest(), canonical.LEGACY
+
+
+def verify_with_keys(certificate_data, fingerprints=None):
+    """Verifies against the given cached keys (default: all); returns (is_valid, status, fingerprint)."""
+    if not certificate_data.get('signature'):
+        return False, "No signature found in certificate.", None
+    try:
+        digest, mode = signed_digest(certificate_data)
+    except (ValueError, TypeError) as e:
+        return False, str(e), None
+    return verify_digest(certificate_data['signature'], digest, fingerprints, mode)
+
+
+def verify_payload(signature_hex, payload, fingerprints=None):
+    """Checks a hex DER ECDSA signature over payload; returns (is_valid, status, fingerprint)."""
+    return verify_digest(signature_hex, hashlib.sha256(payload).digest(), fingerprints)
+
+
+def verify_digest(signature_hex, digest, fingerprints=None, mode=canonical.LEGACY):
+    """Checks a hex ECDSA signature over a SHA-256 digest; returns (is_valid, status, fingerprint)."""
+    if not signature_hex:
+        return False, "No signature found in certificate.", None
+
+    try:
+        signature = canonical.signature_der(bytes.fromhex(signature_hex), mode)
+    except ValueError:
+        return False, "Signature is not valid hex.", None
+
+    try:
+        revoked = revocation_list().load()
+    except revocation.RevocationError as e:
+        return False, f"Key revocation list is unavailable: {e}", None
+    results = verification_cache()
+    requested = fingerprints or list(_KEYS_BY_FINGERPRINT)
+    # Keys revoked in the cache before it had a separate list still count
+    candidates = [fingerprint for fingerprint in requested
+                  if fingerprint not in revoked and not (results is not None and results.is_revoked(fingerprint))]
+    if requested and not candidates:
+        return False, "Public key has been revoked.", None
+
+    digest_hex = digest.hex()
+    for fingerprint in candidates:
+        if results is not None:
+            cached = results.lookup(digest_hex, signature_hex, fingerprint)
+            if cached is not None:
+                if cached[0]:
+                    return True, cached[1], fingerprint
+                continue
+        try:
+            _KEYS_BY_FINGERPRINT[fingerprint].verify(signature, digest, ec.ECDSA(Prehashed(hashes.SHA256())))
+        except InvalidSignature:
+            if results is not None:
+                results.store(digest_hex, signature_hex, fingerprint, False, "Signature is INVALID")
+            continue
+        except Exception as e:
+            return False, f"An unexpected error occurred during verification: {e}", None
+        if results is not None:
+            results.store(digest_hex, signature_hex, fingerprint, True, "Signature is VALID")
+        return True, "Signature is VALID", fingerprint
+    return False, "Signature is INVALID", None
+
+
+def verify_signature(public_key_path, certificate_data):
+    """Verifies the ECDSA signature of the certificate."""
+    try:
+        fingerprint, _ = load_public_key(public_key_path)
+    except Exception as e:
+        return False, f"Could not load public key: {e}"
+
+    is_valid, status, _ = verify_with_keys(certificate_data, [fingerprint])
+    return is_valid, status
+
+
+def verify_proof_bundle(bundle, fingerprints=None):
+    """Checks the signed root of a Merkle proof bundle and every proof in it; returns (is_valid, status, fields)."""
+    root = (bundle.get('merkle') or {}).get('root')
+    if not root:
+        return False, "Proof bundle has no Merkle root.", {}
+    try:
+        merkle.certificate_version(bundle)
+    except ValueError as e:
+        return False, str(e), {}
+    is_valid, status, _ = verify_payload(bundle.get('signature'), merkle.root_message(root), fingerprints)
+    if not is_valid:
+        return False, status, {}
+    return merkle.verify_proofs(bundle)
@@ -0,0 +1,250 @@
+# certcore/upload_service.py
+#
+# Service mode for IPFS uploads: many certificates in one run. Signatures are
+# verified in a process pool, then the valid certificates are added to the
+# daemon concurrently over one pool of keep-alive HTTP connections, with at
+# most `in_flight` requests outstanding.
+#
+# A local CID index (content SHA-256 -> CID) makes re-runs cheap: content
+# that was already uploaded is never sent again. The certificate_id -> CID
+# links are written to a separate mapping file, so the signed JSON is never
+# touched.
+#
+# Only the standard library is needed to talk to the daemon's HTTP API
+# (/api/v0/add), so this works without ipfshttpclient. mock_ipfs.py serves
+# the same endpoint for offline testing.
+
+import hashlib
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from .batch import iter_sources, read_certificate, read_pem_blobs
+from .cache import hit_summary
+from .signing import load_pem_keys, verification_cache, verify_with_keys
+
+DEFAULT_API = "http://127.0.0.1:5001"
+
+
+def api_url(addr):
+    """Accepts an http(s) URL or an ipfshttpclient-style multiaddr (/ip4/HOST/tcp/PORT)."""
+    if not addr:
+        return DEFAULT_API
+    if addr.startswith("/"):
+        parts = addr.strip("/").split("/")
+        host = parts[1] if len(parts) > 1 else "127.0.0.1"
+        port = parts[3] if len(parts) > 3 else "5001"
+        scheme = "https" if "https" in parts else "http"
+        return f"{scheme}://{host}:{port}"
+    return addr.rstrip("/")
+
+
+class IpfsHttpApi:
+    """Thread-safe client for the IPFS HTTP API that reuses a pool of keep-alive connections."""
+
+    def __init__(self, url=DEFAULT_API, pool_size=8, timeout=60):
+        parts = urlsplit(api_url(url))
+        self.connection_class = (http.client.HTTPSConnection if parts.scheme == "https"
+                                 else http.client.HTTPConnection)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=pool_size)
+        self.connections_opened = 0
+        self.lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                self.connections_opened += 1
+            return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, connection):
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, path, body=b"", headers=None):
+        """POSTs to the API and returns the decoded JSON reply; retries once on a stale connection."""
+        for attempt in range(2):
+            connection = self._acquire()
+            try:
+                connection.request("POST", path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                data = response.read()
+            except (ConnectionError, http.client.HTTPException, OSError):
+                connection.close()
+                if attempt:
+                    raise
+                continue
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            if response.status != 200:
+                raise RuntimeError(f"IPFS API {path} returned {response.status}: {data[:200]!r}")
+            return json.loads(data.splitlines()[-1])
+
+    def add_bytes(self, content, filename):
+        """Adds one file to IPFS and returns its CID."""
+        boundary = uuid.uuid4().hex
+        body = b"".join([
+            f"--{boundary}\r\n".encode(),
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode(),
+            b"Content-Type: application/octet-stream\r\n\r\n",
+            content,
+            f"\r\n--{boundary}--\r\n".encode(),
+        ])
+        reply = self.request("/api/v0/add?pin=true", body,
+                             {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        return reply["Hash"]
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def load_json_file(path):
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def save_json_file(path, data):
+    # Write-then-rename so an interrupted run never leaves a truncated index
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def prepare_one(item):
+    """Worker entry point: reads and verifies one certificate; returns its upload job."""
+    source_id, kind, value = item
+    try:
+        if kind == "path":
+            with open(value, "rb") as f:
+                content = f.read()
+        else:
+            content = value.strip().encode("utf-8")
+        data = read_certificate("text", content.decode("utf-8"))
+    except Exception as e:
+        return {"source": source_id, "certificate_id": None, "valid": False,
+                "status": f"Could not read certificate: {e}"}
+    if not isinstance(data, dict):
+        return {"source": source_id, "certificate_id": None, "valid": False,
+                "status": "Certificate is not a JSON object."}
+
+    is_valid, status, _ = verify_with_keys(data)
+    return {"source": source_id, "certificate_id": data.get("certificate_id"), "valid": is_valid,
+            "status": status, "sha256": hashlib.sha256(content).hexdigest(),
+            "content": content if is_valid else None}
+
+
+def _init_worker(pem_blobs):
+    load_pem_keys(pem_blobs)
+
+
+def upload_batch(source, key_paths, api=DEFAULT_API, in_flight=8, workers=None,
+                 index_path="cid_index.json", mapping_path="cid_map.json", client=None):
+    """Verifies and uploads every certificate in source; returns a summary dict."""
+    pem_blobs = read_pem_blobs(key_paths)
+    load_pem_keys(pem_blobs)
+    items = list(iter_sources(source))
+    workers = workers or os.cpu_count() or 1
+    results_cache = verification_cache()
+    counters_before = results_cache.counters() if results_cache else {}
+
+    start = time.perf_counter()
+    if workers == 1 or len(items) < 64:
+        prepared = [prepare_one(item) for item in items]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(pem_blobs,)) as pool:
+            prepared = list(pool.map(prepare_one, items, chunksize=32))
+    verify_seconds = time.perf_counter() - start
+
+    index = load_json_file(index_path)
+    mapping = load_json_file(mapping_path)
+    client = client or IpfsHttpApi(api, pool_size=in_flight)
+
+    # One upload per distinct content hash that is not in the index yet
+    pending = {}
+    for result in prepared:
+        if not result["valid"]:
+            result["action"] = "rejected"
+        elif result["sha256"] in index or result["sha256"] in pending:
+            result["action"] = "skipped"
+        else:
+            result["action"] = "uploaded"
+            pending[result["sha256"]] = result
+
+    upload_start = time.perf_counter()
+    errors = {}
+    try:
+        with ThreadPoolExecutor(max_workers=in_flight) as pool:
+            futures = {
+                pool.submit(client.add_bytes, job["content"],
+                            f"{job['certificate_id'] or job['sha256']}.json"): digest
+                for digest, job in pending.items()
+            }
+            for future in as_completed(futures):
+                digest = futures[future]
+                try:
+                    index[digest] = future.result()
+                except Exception as e:
+                    errors[digest] = str(e)
+    finally:
+        save_json_file(index_path, index)
+    upload_seconds = time.perf_counter() - upload_start
+
+    now = datetime.now(timezone.utc).isoformat()
+    for result in prepared:
+        result.pop("content", None)
+        if result["action"] == "rejected":
+            continue
+        if result["sha256"] in errors:
+            result["action"] = "failed"
+            result["error"] = errors[result["sha256"]]
+            continue
+        result["cid"] = index[result["sha256"]]
+        if result["certificate_id"]:
+            entry = mapping.get(result["certificate_id"])
+            if not entry or entry.get("cid") != result["cid"]:
+                mapping[result["certificate_id"]] = {"cid": result["cid"], "sha256": result["sha256"],
+                                                     "recorded_at": now}
+    save_json_file(mapping_path, mapping)
+
+    counts = {action: sum(1 for result in prepared if result["action"] == action)
+              for action in ("uploaded", "skipped", "rejected", "failed")}
+    return {
+        "total": len(prepared),
+        **counts,
+        "distinct_uploads": len(pending) - len(errors),
+        "connections_opened": getattr(client, "connections_opened", None),
+        "workers": workers,
+        "in_flight": in_flight,
+        "verify_seconds": round(verify_seconds, 3),
+        "cache": hit_summary(counters_before, results_cache.counters()) if results_cache else None,
+        "upload_seconds": round(upload_seconds, 3),
+        # Nothing sent means no rate to report, not a missing one
+        "uploads_per_second": (round((len(pending) - len(errors)) / upload_seconds, 1)
+                               if upload_seconds > 0 and pending else 0.0),
+        "index_path": index_path,
+        "mapping_path": mapping_path,
+        "results": prepared,
+    }
@@ -0,0 +1,127 @@
+# mock_ipfs.py
+#
+# A local stand-in for the IPFS daemon's HTTP API, for testing the uploader
+# without a running node. It answers /api/v0/add with a CIDv1 (raw codec)
+# derived from the SHA-256 of the uploaded bytes, and /api/v0/version. Stored
+# files, request counts and TCP connections are kept so tests can check
+# deduplication and connection reuse.
+#
+# Usage:
+# python mock_ipfs.py [--port 5001] [--latency 0.05]
+
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def raw_cid(content):
+    """CIDv1, raw codec, sha2-256, base32 - what `ipfs add --raw-leaves --cid-version 1` gives a small file."""
+    digest = hashlib.sha256(content).digest()
+    return "b" + base64.b32encode(bytes([0x01, 0x55, 0x12, 0x20]) + digest).decode().lower().rstrip("=")
+
+
+def parse_multipart(body, content_type):
+    """Returns [(filename, bytes)] for each part of a multipart/form-data body."""
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    files = []
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        headers, _, content = part.partition(b"\r\n\r\n")
+        filename = "file"
+        for line in headers.decode("utf-8", "replace").split("\r\n"):
+            if "filename=" in line:
+                filename = line.split("filename=", 1)[1].strip('"')
+        files.append((filename, content[:-2] if content.endswith(b"\r\n") else content))
+    return files
+
+
+class MockIpfsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?", 1)[0]
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if path == "/api/v0/version":
+            return self.reply({"Version": "0.0.0-mock", "System": "mock"})
+        if path == "/api/v0/add":
+            lines = []
+            for filename, content in parse_multipart(body, self.headers.get("Content-Type", "")):
+                cid = raw_cid(content)
+                with self.server.lock:
+                    self.server.store[cid] = content
+                lines.append({"Name": filename, "Hash": cid, "Size": str(len(content))})
+            return self.reply(*lines)
+        self.send_error(404, f"unknown endpoint {path}")
+
+    def reply(self, *objects):
+        payload = "".join(json.dumps(obj) + "\n" for obj in objects).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockIpfsServer(ThreadingHTTPServer):
+    """Threaded mock IPFS API; port 0 picks a free port"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), MockIpfsHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.store = {}
+        self.requests = 0
+        self.connections = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread and return self"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mock IPFS HTTP API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=5001, help="Port to listen on (default: 5001)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    args = parser.parse_args()
+
+    server = MockIpfsServer(args.host, args.port, args.latency)
+    print(f"Mock IPFS API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+    finally:
+        print(f"{server.requests} requests over {server.connections} connections, {len(server.store)} objects stored")
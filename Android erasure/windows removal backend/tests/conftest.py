@@ -0,0 +1,9 @@
+# tests/conftest.py
+#
+# Makes certcore importable when pytest is run from this directory or the
+# repository root.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+# tests/test_canonical.py
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from certcore import canonical
+
+# What serde_json::to_string (ryu) prints for each f64
+RUST_FLOATS = [
+    (1e-5, "0.00001"),
+    (1.5e-5, "0.000015"),
+    (-1.5e-5, "-0.000015"),
+    (1e-4, "0.0001"),
+    (1e-6, "1e-6"),
+    (1.5e-6, "1.5e-6"),
+    (0.5, "0.5"),
+    (0.0, "0.0"),
+    (-0.0, "-0.0"),
+    (1.0, "1.0"),
+    (123.456, "123.456"),
+    (1e15, "1000000000000000.0"),
+    (1234567890123456.0, "1234567890123456.0"),
+    (1e16, "1e16"),
+    (1.2345678901234568e16, "1.2345678901234568e16"),
+    (1e21, "1e21"),
+    (-2.5e-300, "-2.5e-300"),
+    (5e-324, "5e-324"),
+    (1.7976931348623157e308, "1.7976931348623157e308"),
+]
+
+
+@pytest.mark.parametrize("value, expected", RUST_FLOATS)
+def test_rust_float_matches_ryu(value, expected):
+    assert canonical._rust_float(value) == expected
+    assert float(expected) == value
+
+
+@pytest.mark.parametrize("value, expected", RUST_FLOATS)
+def test_rust_payload_lays_floats_out_like_serde(value, expected):
+    # Flat objects and lists go through the json fast path first; it must not leak Python's layout
+    certificate = {"certificate_id": "CERT-TEST-000001", "values": {"x": value}, "list": [value, 1],
+                   "signature": "ab" * 64}
+    payload = canonical.canonical_bytes(certificate, canonical.RUST).decode()
+    assert payload == ('{"certificate_id":"CERT-TEST-000001",'
+                       f'"values":{{"x":{expected}}},"list":[{expected},1],"signature":""}}')
+
+
+def test_legacy_payload_keeps_python_floats():
+    certificate = {"b": 1.5e-5, "a": [1e16], "signature": "00"}
+    assert canonical.canonical_bytes(certificate) == json.dumps(
+        {"a": [1e16], "b": 1.5e-5}, sort_keys=True, separators=(",", ":")).encode()
+
+
+def test_package_import_does_not_load_cryptography():
+    # Run in a fresh interpreter: this one already imported cryptography above
+    code = ("import sys, certcore\n"
+            "assert 'cryptography' not in sys.modules\n"
+            "assert certcore.canonicalize.__module__ == 'certcore.signing'\n"
+            "assert 'cryptography' in sys.modules\n")
+    subprocess.run([sys.executable, "-c", code], check=True,
+                   cwd=os.path.dirname(os.path.dirname(canonical.__file__)))
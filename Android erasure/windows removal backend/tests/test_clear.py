@@ -0,0 +1,102 @@
+# tests/test_clear.py
+
+import os
+
+import pytest
+
+from certcore import clear
+
+CHUNK = 64 * 1024
+# Three whole chunks and a tail that is not a multiple of ALIGNMENT
+SIZE = 3 * CHUNK + 5000
+
+
+@pytest.fixture
+def image(tmp_path):
+    """A sparse image file that has never been written."""
+    path = tmp_path / "disk.img"
+    with open(path, "wb") as f:
+        f.truncate(SIZE)
+    return str(path)
+
+
+def corrupt_after_last_pass(monkeypatch, offset, data=b"\xa5" * 512):
+    """Make the overwrite leave a bad patch behind, as a failing sector would."""
+    overwrite_pass = clear.overwrite_pass
+
+    def overwrite_then_corrupt(target, *args, **kwargs):
+        result = overwrite_pass(target, *args, **kwargs)
+        os.pwrite(target.fd, data, offset)
+        os.fdatasync(target.fd)
+        return result
+    monkeypatch.setattr(clear, "overwrite_pass", overwrite_then_corrupt)
+
+
+@pytest.mark.parametrize("method", clear.METHODS)
+def test_clear_and_read_back(image, method):
+    result = clear.run_clear(image, method, passes=2, chunk_size=CHUNK, workers=3)
+    details = result["wipe_details"]
+    assert details["status"] == "Success", details["notes"]
+    assert [stats["bytes"] for stats in result["performance"]["passes"]] == [SIZE, SIZE]
+    assert result["performance"]["verify"]["bad_chunks"] == 0
+    # The read-back compares every byte with what was written; it is not a statistical test
+    assert result["verification"] == {"method": "Overwrite and Verify",
+                                      "result": {"ClearZeros": "Verified all-zero.",
+                                                 "ClearRandom": "Verified against the keystream."}[method]}
+    with open(image, "rb") as f:
+        content = f.read()
+    assert len(content) == SIZE
+    if method == "ClearZeros":
+        assert not any(content)
+    else:
+        assert content.count(0) < SIZE // 128
+
+
+@pytest.mark.parametrize("method", clear.METHODS)
+@pytest.mark.parametrize("offset", [CHUNK + 4096, SIZE - 100])
+def test_read_back_finds_corrupt_block(image, monkeypatch, method, offset):
+    corrupt_after_last_pass(monkeypatch, offset, b"\xa5" * min(512, SIZE - offset))
+    result = clear.run_clear(image, method, chunk_size=CHUNK, workers=2)
+    details = result["wipe_details"]
+    assert details["status"] == "Failed"
+    assert f"first at offset {offset - offset % CHUNK}" in details["notes"]
+    assert result["performance"]["verify"]["bad_chunks"] == 1
+    assert result["verification"]["result"] == "N/A"
+
+
+def test_unverified_clear_says_so(image, monkeypatch):
+    corrupt_after_last_pass(monkeypatch, 0)
+    result = clear.run_clear(image, chunk_size=CHUNK, verify=False)
+    assert result["wipe_details"]["status"] == "Success"
+    assert result["verification"] == {"method": "Overwrite", "result": "Not verified."}
+    assert result["performance"]["verify"] is None
+
+
+def test_direct_io_or_noted_fallback(image):
+    result = clear.run_clear(image, chunk_size=CHUNK, direct=True)
+    assert result["wipe_details"]["status"] == "Success"
+    # tmpfs refuses O_DIRECT; the certificate must say the page cache was used
+    assert result["performance"]["direct_io"] or "O_DIRECT unavailable" in result["wipe_details"]["notes"]
+
+
+@pytest.mark.parametrize("kwargs", [{"method": "ClearOnes"}, {"passes": 0}, {"chunk_size": CHUNK + 1}])
+def test_bad_arguments(image, kwargs):
+    with pytest.raises(ValueError):
+        clear.run_clear(image, **kwargs)
+
+
+def test_signed_certificate_verifies(image, tmp_path):
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    from certcore import revocation, signing
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    fingerprint = signing.load_pem_keys([private_key.public_key().public_bytes(
+        signing.Encoding.PEM, signing.PublicFormat.SubjectPublicKeyInfo)])[0]
+    certificate = clear.build_certificate(clear.run_clear(image, chunk_size=CHUNK), private_key)
+    assert certificate["device_info"] == {"path": image, "model": "Image file", "serial": "N/A", "size_bytes": SIZE}
+    signing.set_verification_cache(None)
+    signing.set_revocation_list(revocation.RevocationList(str(tmp_path / "revoked_keys.json")))
+    try:
+        assert signing.verify_with_keys(certificate, [fingerprint])[0]
+    finally:
+        signing.set_revocation_list(None)
@@ -0,0 +1,125 @@
+# tests/test_media.py
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from certcore import clear, media
+
+BLOCK = media.BLOCK_SIZE
+CHUNK = 256 * 1024
+# Sixteen chunks and a tail that is not a whole block
+SIZE = 16 * CHUNK + 1000
+
+
+@pytest.fixture
+def image(tmp_path):
+    """A sparse image file that has never been written."""
+    path = tmp_path / "disk.img"
+    with open(path, "wb") as f:
+        f.truncate(SIZE)
+    return str(path)
+
+
+def cleared(image, method):
+    result = clear.run_clear(image, method, chunk_size=CHUNK, workers=2)
+    assert result["wipe_details"]["status"] == "Success", result["wipe_details"]["notes"]
+    return image
+
+
+def verify(image, method, **kwargs):
+    kwargs.setdefault("workers", 1)
+    return media.verify_media(image, method, regions=4, chunk_size=CHUNK, **kwargs)
+
+
+def inject(image, offset, data):
+    with open(image, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+
+@pytest.mark.parametrize("method", media.METHODS)
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_cleared_image_passes(image, method, use_mmap):
+    report = verify(cleared(image, method), method, use_mmap=use_mmap)
+    verification = report["verification"]
+    assert verification["passed"], verification["result"]
+    assert verification["bytes_verified"] == SIZE
+    assert not verification["failed_regions"]
+    assert sum(region["length"] for region in report["regions"]) == SIZE
+
+
+def test_nonzero_block_after_clear_zeros(image):
+    offset = 5 * BLOCK
+    inject(cleared(image, "ClearZeros"), offset + 17, b"\x01")
+    report = verify(image, "ClearZeros")
+    assert not report["verification"]["passed"]
+    assert report["summary"]["nonzero_blocks"] == 1
+    assert report["verification"]["result"] == f"FAILED: 1 non-zero blocks, first at offset {offset}"
+    assert report["verification"]["failed_regions"] == [0]
+
+
+def test_nonzero_tail_after_clear_zeros(image):
+    # The partial block at the end is not a whole block, but it is still checked
+    inject(cleared(image, "ClearZeros"), SIZE - 1, b"\xff")
+    report = verify(image, "ClearZeros")
+    assert report["summary"]["nonzero_blocks"] == 1
+    assert report["regions"][-1]["nonzero_block_offsets"] == [SIZE - SIZE % BLOCK]
+
+
+def test_zero_block_after_clear_random(image):
+    # An unwritten block, as a skipped write or a remapped sector would leave
+    offset = 9 * CHUNK + 3 * BLOCK
+    inject(cleared(image, "ClearRandom"), offset, bytes(BLOCK))
+    report = verify(image, "ClearRandom")
+    assert not report["verification"]["passed"]
+    assert report["summary"]["zero_blocks"] == 1
+    failed = [region for region in report["regions"] if not region["passed"]]
+    assert [region["zero_block_offsets"] for region in failed] == [[offset]]
+
+
+def test_unwritten_image_fails_clear_random(image):
+    report = verify(image, "ClearRandom")
+    assert not report["verification"]["passed"]
+    assert report["summary"]["zero_blocks"] == SIZE // BLOCK
+    assert len(report["verification"]["failed_regions"]) == report["summary"]["regions"]
+
+
+def test_patterned_image_fails_clear_random(image):
+    # No zero block anywhere, but far from uniform bytes
+    inject(image, 0, (b"zerotrace " * (SIZE // 10 + 1))[:SIZE])
+    report = verify(image, "ClearRandom")
+    assert not report["verification"]["passed"]
+    assert report["summary"]["p_value"] < media.DEFAULT_ALPHA
+
+
+@pytest.mark.parametrize("p_value, passed", [(0.0051, True), (0.0049, False)])
+def test_alpha_is_split_between_global_and_region_tests(image, monkeypatch, p_value, passed):
+    # alpha 0.01 over 4 regions: the whole target is tested at 0.005 and each region at 0.00125,
+    # so the two kinds of test together reject random media at most 1% of the time
+    monkeypatch.setattr(media, "chi2_sf", lambda statistic, df=media.DEGREES_OF_FREEDOM: p_value)
+    report = verify(cleared(image, "ClearRandom"), "ClearRandom", alpha=0.01)
+    assert report["summary"]["regions"] == 4
+    assert all(region["passed"] for region in report["regions"])
+    assert report["verification"]["passed"] is passed
+
+
+def test_workers_agree(image):
+    inject(cleared(image, "ClearZeros"), 3 * CHUNK, b"\x01")
+    reports = [verify(image, "ClearZeros", workers=workers) for workers in (1, 3)]
+    assert reports[0]["summary"] == reports[1]["summary"]
+    assert [region["nonzero_block_offsets"] for region in reports[0]["regions"]] \
+        == [region["nonzero_block_offsets"] for region in reports[1]["regions"]]
+
+
+@pytest.mark.parametrize("kwargs", [{"method": "ClearOnes"}, {"chunk_size": BLOCK + 1}])
+def test_bad_arguments(image, kwargs):
+    with pytest.raises(ValueError):
+        media.verify_media(image, **kwargs)
+
+
+def test_empty_target(tmp_path):
+    path = tmp_path / "empty.img"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        media.verify_media(str(path))
@@ -0,0 +1,77 @@
+# tests/test_merkle.py
+
+import pytest
+
+from certcore import merkle
+
+CERTIFICATE = {
+    "certificate_id": "CERT-TEST-000001",
+    "device_info": {"model": "Fake Phone", "serial": "TEST0001", "imei": "359760857203935"},
+    "wipe_results": [{"partition": "userdata", "status": "success"}, {"partition": "metadata", "status": "success"}],
+    "notes": {},
+}
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+def test_list_index_and_object_key_do_not_collide():
+    as_list = {"a": [1]}
+    as_object = {"a": {"0": 1}}
+    assert [path for path, _, _ in merkle.certificate_leaves(as_list)] == ["/a/0"]
+    assert [path for path, _, _ in merkle.certificate_leaves(as_object)] == ["/a/0"]
+    assert merkle.merkle_root(as_list)[0] != merkle.merkle_root(as_object)[0]
+
+
+@pytest.mark.parametrize("version", [1, 7])
+def test_other_versions_are_rejected(version):
+    # Version 1 hashed pointer strings, so list indexes and object keys collided; nothing may verify under it
+    with pytest.raises(ValueError):
+        merkle.merkle_root(dict(CERTIFICATE, merkle={"version": version}))
+    bundle = dict(merkle.prove(CERTIFICATE, ["/device_info/serial"]))
+    bundle["merkle"] = dict(bundle["merkle"], version=version)
+    assert merkle.verify_proofs(bundle) == (False, f"Unsupported Merkle version {version}.", {})
+
+
+def test_proofs_verify_against_the_root():
+    bundle = merkle.prove(CERTIFICATE, ["/device_info/serial", "/wipe_results/1"])
+    is_valid, _, fields = merkle.verify_proofs(bundle)
+    assert is_valid
+    assert fields == {"/device_info/serial": "TEST0001", "/wipe_results/1/partition": "metadata",
+                      "/wipe_results/1/status": "success"}
+    assert bundle["merkle"]["root"] == merkle.merkle_root(CERTIFICATE)[0]
+
+
+def test_proof_with_retyped_segments_is_rejected():
+    bundle = merkle.prove(CERTIFICATE, ["/wipe_results/0/status"])
+    bundle["proofs"][0]["segments"] = ["wipe_results", "0", "status"]
+    assert not merkle.verify_proofs(bundle)[0]
+    bundle["proofs"][0]["segments"] = ["wipe_results", 1, "status"]
+    assert not merkle.verify_proofs(bundle)[0]
+
+
+def test_tampered_value_is_rejected():
+    bundle = merkle.prove(CERTIFICATE, ["/device_info/imei"])
+    bundle["proofs"][0]["value"] = "000000000000000"
+    assert not merkle.verify_proofs(bundle)[0]
+
+
+def test_signed_certificate_rejects_retyped_list(private_key):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
+
+    from certcore import signing
+
+    signed = merkle.sign_certificate(CERTIFICATE, private_key)
+    assert signed["merkle"]["version"] == merkle.MERKLE_VERSION
+    digest, _ = signing.signed_digest(signed)
+    private_key.public_key().verify(bytes.fromhex(signed["signature"]), digest, ec.ECDSA(Prehashed(hashes.SHA256())))
+
+    # Same JSON Pointer leaves, but wipe_results is now an object
+    retyped = dict(signed, wipe_results={str(index): entry for index, entry in enumerate(signed["wipe_results"])})
+    with pytest.raises(ValueError):
+        signing.signed_digest(retyped)
@@ -0,0 +1,112 @@
+# tests/test_pdf.py
+
+import json
+import os
+import re
+
+import pytest
+
+pytest.importorskip("fpdf")
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from certcore import pdf, signing
+
+CERTIFICATE = {
+    "certificate_id": "CERT-TEST-000001",
+    "device_info": {"model": "Fake Phone", "serial": "TEST0001"},
+    "wipe_results": [{"partition": "userdata", "status": "success", "passes": [1, 2]},
+                     {"partition": "metadata", "status": "success", "passes": []}],
+    "retries": [[0, 1], [2]],
+    "notes": "none",
+}
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # Through the environment, so worker processes stay off the operator's cache and revocation list too
+    monkeypatch.setenv("CERTCORE_CACHE", "off")
+    monkeypatch.setenv("CERTCORE_REVOCATIONS", str(tmp_path / "revoked_keys.json"))
+    signing.set_verification_cache(None)
+    signing.set_revocation_list(None)
+    yield
+    signing.set_revocation_list(None)
+
+
+@pytest.fixture
+def signed(tmp_path):
+    """(source dir, key path): three signed certificates, two sharing an id, and one tampered."""
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    key_path = tmp_path / "public.pem"
+    key_path.write_bytes(private_key.public_key().public_bytes(
+        signing.Encoding.PEM, signing.PublicFormat.SubjectPublicKeyInfo))
+    source = tmp_path / "certs"
+    source.mkdir()
+    for name, serial, certificate_id in (("a", "TEST0001", "CERT-TEST-000001"), ("b", "TEST0002", "CERT-TEST-000002"),
+                                         ("c", "TEST0003", "CERT-TEST-000001")):
+        data = dict(CERTIFICATE, certificate_id=certificate_id, device_info={"model": "Fake Phone", "serial": serial})
+        data["signature"] = private_key.sign(signing.canonicalize(data), ec.ECDSA(hashes.SHA256())).hex()
+        (source / f"{name}.json").write_text(json.dumps(data))
+    tampered = json.loads((source / "b.json").read_text())
+    tampered["notes"] = "edited"
+    (source / "d.json").write_text(json.dumps(tampered))
+    return str(source), str(key_path)
+
+
+def page_text(path):
+    """Uncompressed page content, for documents written with compression off."""
+    with open(path, "rb") as f:
+        return f.read().decode("latin-1")
+
+
+def page_count(path):
+    return len(re.findall(r"/Type /Page\b", page_text(path)))
+
+
+def test_nested_lists_become_rows():
+    rows = list(pdf._field_rows({"wipe_results": CERTIFICATE["wipe_results"], "retries": CERTIFICATE["retries"]}))
+    assert rows == [("wipe_results[0].partition", "userdata"), ("wipe_results[0].status", "success"),
+                    ("wipe_results[0].passes[0]", 1), ("wipe_results[0].passes[1]", 2),
+                    ("wipe_results[1].partition", "metadata"), ("wipe_results[1].status", "success"),
+                    ("retries[0][0]", 0), ("retries[0][1]", 1), ("retries[1][0]", 2)]
+
+
+def test_render_certificate_lays_out_every_field(tmp_path):
+    document = pdf.PDF()
+    document.set_compression(False)
+    pdf.render_certificate(document, CERTIFICATE, True, "Signature is valid")
+    path = str(tmp_path / "one.pdf")
+    document.output(path)
+    text = page_text(path)
+    for label in ("wipe_results[0].partition", "wipe_results[0].passes[1]", "wipe_results[1].status",
+                  "retries[1][0]", "serial", "notes"):
+        assert f"({label})" in text
+    # A top-level list is laid out row by row, never as one Python repr
+    assert "{'partition'" not in text and "[[0, 1]" not in text
+    assert "Certificate Status: VERIFIED" in text
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bulk_create_writes_one_pdf_per_source(signed, tmp_path, workers):
+    source, key_path = signed
+    output_dir = tmp_path / "pdfs"
+    summary = pdf.bulk_create(source, key_path, str(output_dir), workers=workers)
+    assert (summary["total"], summary["rendered"], summary["invalid"], summary["errors"]) == (4, 4, 1, [])
+    assert summary["duplicate_ids"] == 2
+    assert summary["certificates_per_second"] > 0
+    # c.json reuses a's certificate_id and d.json b's; neither may overwrite the first PDF
+    assert sorted(os.listdir(output_dir)) == ["CERT-TEST-000001--c.json.pdf", "CERT-TEST-000001.pdf",
+                                              "CERT-TEST-000002--d.json.pdf", "CERT-TEST-000002.pdf"]
+    for name in os.listdir(output_dir):
+        assert page_count(output_dir / name) == 1
+
+
+def test_bulk_create_merges_into_one_document(signed, tmp_path):
+    source, key_path = signed
+    merged = str(tmp_path / "merged.pdf")
+    summary = pdf.bulk_create(source, key_path, str(tmp_path / "unused"), merge_path=merged, workers=1)
+    assert (summary["rendered"], summary["invalid"]) == (4, 1)
+    assert page_count(merged) == 4
+    assert not os.path.exists(tmp_path / "unused")
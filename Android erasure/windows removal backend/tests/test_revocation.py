@@ -0,0 +1,71 @@
+# tests/test_revocation.py
+
+import json
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from certcore import cache, revocation, signing
+
+CERTIFICATE = {"certificate_id": "CERT-TEST-000002", "device_info": {"serial": "TEST0002"}}
+
+
+@pytest.fixture
+def signed():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    fingerprint = signing.load_pem_keys([private_key.public_key().public_bytes(
+        signing.Encoding.PEM, signing.PublicFormat.SubjectPublicKeyInfo)])[0]
+    signature = private_key.sign(signing.canonicalize(CERTIFICATE), ec.ECDSA(hashes.SHA256()))
+    return dict(CERTIFICATE, signature=signature.hex()), fingerprint
+
+
+@pytest.fixture
+def revocations(tmp_path):
+    revocations = revocation.RevocationList(str(tmp_path / "revoked_keys.json"))
+    signing.set_revocation_list(revocations)
+    yield revocations
+    signing.set_revocation_list(None)
+
+
+@pytest.fixture(params=["off", "on"])
+def verification_cache(request, tmp_path):
+    results = cache.VerificationCache(str(tmp_path / "cache.sqlite3")) if request.param == "on" else None
+    signing.set_verification_cache(results)
+    yield results
+    signing.set_verification_cache(None)
+    if results is not None:
+        results.close()
+
+
+def test_revoked_key_fails_with_or_without_cache(signed, revocations, verification_cache):
+    certificate, fingerprint = signed
+    assert signing.verify_with_keys(certificate, [fingerprint])[0]
+    assert revocations.revoke(fingerprint, "test")
+    assert signing.verify_with_keys(certificate, [fingerprint]) == (False, "Public key has been revoked.", None)
+
+
+def test_revocation_written_by_another_process_is_picked_up(signed, revocations, verification_cache):
+    certificate, fingerprint = signed
+    assert signing.verify_with_keys(certificate, [fingerprint])[0]
+    # Same file, separate instance: as if `cache revoke` ran elsewhere
+    revocation.RevocationList(revocations.path).revoke(fingerprint)
+    assert not signing.verify_with_keys(certificate, [fingerprint])[0]
+
+
+@pytest.mark.parametrize("content", ["{not json", json.dumps(["a list"]), json.dumps({"revoked_keys": []})])
+def test_unreadable_list_is_an_error(signed, revocations, verification_cache, content):
+    certificate, fingerprint = signed
+    with open(revocations.path, "w") as f:
+        f.write(content)
+    is_valid, status, _ = signing.verify_with_keys(certificate, [fingerprint])
+    assert not is_valid
+    assert status.startswith("Key revocation list is unavailable")
+
+
+def test_missing_list_is_empty(revocations):
+    assert revocations.load() == {}
+    assert not revocations.is_revoked("00" * 32)
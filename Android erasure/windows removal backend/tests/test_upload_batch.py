@@ -0,0 +1,88 @@
+# tests/test_upload_batch.py
+
+import json
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from certcore import cli, revocation, signing, upload_service
+from mock_ipfs import MockIpfsServer, raw_cid
+
+
+@pytest.fixture
+def ipfs():
+    server = MockIpfsServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def isolated(tmp_path):
+    # Keep the run away from the operator's cache and revocation list
+    signing.set_verification_cache(None)
+    signing.set_revocation_list(revocation.RevocationList(str(tmp_path / "revoked_keys.json")))
+    yield
+    signing.set_revocation_list(None)
+
+
+@pytest.fixture
+def certificates(tmp_path):
+    """A directory of two signed certificates, a byte-identical copy of one and a tampered one."""
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    key_path = tmp_path / "public.pem"
+    key_path.write_bytes(private_key.public_key().public_bytes(
+        signing.Encoding.PEM, signing.PublicFormat.SubjectPublicKeyInfo))
+    source = tmp_path / "certs"
+    source.mkdir()
+    contents = {}
+    for number in (1, 2):
+        data = {"certificate_id": f"CERT-TEST-{number:06d}", "device_info": {"serial": f"TEST{number:04d}"}}
+        data["signature"] = private_key.sign(signing.canonicalize(data), ec.ECDSA(hashes.SHA256())).hex()
+        contents[data["certificate_id"]] = json.dumps(data).encode()
+        (source / f"cert{number}.json").write_bytes(contents[data["certificate_id"]])
+    (source / "cert1-copy.json").write_bytes(contents["CERT-TEST-000001"])
+    tampered = json.loads(contents["CERT-TEST-000002"])
+    tampered["device_info"]["serial"] = "TEST9999"
+    (source / "tampered.json").write_text(json.dumps(tampered))
+    return str(source), str(key_path), contents
+
+
+def run(tmp_path, ipfs, source, key_path):
+    return upload_service.upload_batch(source, [key_path], api=ipfs.url, in_flight=4, workers=1,
+                                       index_path=str(tmp_path / "cid_index.json"),
+                                       mapping_path=str(tmp_path / "cid_map.json"))
+
+
+def test_identical_content_is_uploaded_once(tmp_path, ipfs, isolated, certificates):
+    source, key_path, contents = certificates
+    summary = run(tmp_path, ipfs, source, key_path)
+    assert (summary["total"], summary["uploaded"], summary["skipped"], summary["rejected"], summary["failed"]) \
+        == (4, 2, 1, 1, 0)
+    assert ipfs.requests == summary["distinct_uploads"] == 2
+    assert sorted(ipfs.store) == sorted(raw_cid(content) for content in contents.values())
+    assert summary["connections_opened"] <= 4
+    with open(tmp_path / "cid_map.json") as f:
+        mapping = json.load(f)
+    assert {certificate_id: entry["cid"] for certificate_id, entry in mapping.items()} \
+        == {certificate_id: raw_cid(content) for certificate_id, content in contents.items()}
+
+
+def test_rerun_sends_nothing(tmp_path, ipfs, isolated, certificates, capsys):
+    source, key_path, _ = certificates
+    run(tmp_path, ipfs, source, key_path)
+    requests = ipfs.requests
+    summary = run(tmp_path, ipfs, source, key_path)
+    assert ipfs.requests == requests
+    assert (summary["uploaded"], summary["skipped"], summary["rejected"]) == (0, 3, 1)
+    assert summary["uploads_per_second"] == 0.0
+
+    capsys.readouterr()
+    assert cli.main(["upload-batch", source, key_path, "--api", ipfs.url, "--workers", "1",
+                     "--index", str(tmp_path / "cid_index.json"), "--map", str(tmp_path / "cid_map.json")]) == 0
+    output = capsys.readouterr().out
+    assert "Uploads: nothing uploaded" in output
+    assert "None" not in output
@@ -1,96 +1,52 @@
-'''
 # uploader.py (v2)
 #
 # Verifies the ECDSA signature of a certificate and then uploads it to IPFS.
+# The implementation lives in certcore.ipfs; `python -m certcore upload` is
+# the same command.
 #
 # Prerequisites:
 # pip install ipfshttpclient cryptography
 #
+# Service mode takes many certificates at once: they are verified in
+# parallel and uploaded concurrently over one pool of HTTP connections.
+# Content already recorded in the local CID index is skipped, and the
+# certificate_id -> CID links go to a mapping file instead of the signed JSON
+# (see certcore.upload_service).
+#
 # Usage:
 # python uploader.py <json_path> <public_key_pem_path>
+# python uploader.py --batch <dir|glob|file.jsonl> <public_key_pem_path>... [--api http://127.0.0.1:5001]
+#                    [--in-flight N] [--workers N] [--index cid_index.json] [--map cid_map.json]
 
-import json
 import sys
-import ipfshttpclient
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives.serialization import load_pem_public_key
-from cryptography.exceptions import InvalidSignature
-
-def verify_signature(public_key_path, certificate_data):
-    """Verifies the ECDSA signature of the certificate."""
-    try:
-        with open(public_key_path, "rb") as f:
-            public_key = load_pem_public_key(f.read())
-    except Exception as e:
-        return False, f"Could not load public key: {e}"
-
-    signature_hex = certificate_data.pop('signature', None)
-    if not signature_hex:
-        return False, "No signature found in certificate."
-
-    try:
-        signature = bytes.fromhex(signature_hex)
-    except ValueError:
-        return False, "Signature is not valid hex."
 
-    payload = json.dumps(certificate_data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+from certcore.cli import main as certcore_main
 
-    try:
-        public_key.verify(signature, payload, ec.ECDSA(hashes.SHA256()))
-        return True, "Signature is VALID"
-    except InvalidSignature:
-        return False, "Signature is INVALID"
-    except Exception as e:
-        return False, f"An unexpected error occurred during verification: {e}"
 
 def main(json_path, key_path):
-    # 1. Read the certificate data
-    try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-    except Exception as e:
-        print(f"Error: Could not read JSON file at {json_path}. {e}")
-        sys.exit(1)
+    from certcore.ipfs import GATEWAY_URL, upload_certificate
 
-    # 2. Verify the signature before proceeding
+    # Verify the signature before uploading; only valid certificates go to IPFS
     print(f"Verifying signature for {json_path}...")
-    is_valid, status_text = verify_signature(key_path, data.copy())
-
-    if not is_valid:
-        print(f"Verification FAILED: {status_text}")
+    success, message, cid = upload_certificate(json_path, key_path)
+    if not success:
+        print(f"Error: {message}")
         print("Aborting upload. Only valid certificates should be uploaded.")
         sys.exit(1)
 
-    print(f"Verification PASSED: {status_text}")
+    print(message)
+    print(f"Successfully uploaded to IPFS. CID: {cid}")
+    print("You can view the file at: " + GATEWAY_URL + cid)
 
-    # 3. Connect to IPFS and upload
-    try:
-        client = ipfshttpclient.connect()
-        print("Connecting to IPFS daemon...")
-        res = client.add(json_path)
-        ipfs_cid = res['Hash']
-        print(f"Successfully uploaded to IPFS. CID: {ipfs_cid}")
-        print("You can view the file at: https://ipfs.io/ipfs/" + ipfs_cid)
-    except Exception as e:
-        print(f"Error: Failed to connect to or upload to IPFS daemon: {e}")
-        print("Please ensure the IPFS daemon is running.")
-        sys.exit(1)
+    # The CID is deliberately not written back into the JSON: that would
+    # invalidate the signature. Service mode keeps the links in a mapping file.
 
-    # 4. (Optional) Update JSON with IPFS CID and re-save
-    # This part is commented out as it would invalidate the original signature.
-    # A better approach is to have a separate system that links the certificate ID to the CID.
-    # with open(json_path, 'r+') as f:
-    #     data = json.load(f)
-    #     data['blockchain_integration']['ipfs_cid'] = ipfs_cid
-    #     f.seek(0)
-    #     json.dump(data, f, indent=4)
-    #     f.truncate()
-    # print(f"Updated {json_path} with IPFS CID.")
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        sys.exit(certcore_main(["upload-batch"] + sys.argv[2:]))
     if len(sys.argv) != 3:
         print("Usage: python uploader.py <json_path> <public_key_pem_path>")
+        print("       python uploader.py --batch <dir|glob|file.jsonl> <public_key_pem_path>... [options]")
         sys.exit(1)
     main(sys.argv[1], sys.argv[2])
-'''
\ No newline at end of file
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Wipe Log Store - indexed SQLite copy of andnr.py wipe logs for fleet analytics
+Loads every wipe_log*.json under the given files or directories into one
+database, then answers fleet questions from its indexes instead of
+re-parsing thousands of JSON files:
+
+    python3 wipelog_store.py ingest wipe_logs/ archive/
+    python3 wipelog_store.py summary                  # like GET /api/devices/stats/summary
+    python3 wipelog_store.py failures --days 7        # failure rate per model
+    python3 wipelog_store.py partitions --model "Pixel 7"
+    python3 wipelog_store.py device 359760857203935   # every wipe of one IMEI or serial
+
+Ingest is incremental: a file whose mtime and size are unchanged is not
+opened again, and one whose content hash is unchanged is not re-parsed.
+Parsing runs in worker processes; the database is written from one. Files
+that were deleted since, or no longer parse as a wipe log, are dropped along
+with the wipes only they held.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from imei import valid_imei
+
+DEFAULT_DB = "wipe_logs.sqlite3"
+# Files parsed per worker task and rows committed per transaction
+CHUNK_SIZE = 64
+COMMIT_EVERY = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS wipes (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    serial TEXT,
+    imei TEXT,
+    manufacturer TEXT,
+    model TEXT,
+    bootloader_version TEXT,
+    android_version TEXT,
+    result TEXT,
+    started_at REAL,
+    ended_at REAL,
+    duration_seconds REAL,
+    errors_count INTEGER,
+    warnings_count INTEGER,
+    commands_executed INTEGER,
+    timed_out_commands INTEGER
+);
+CREATE INDEX IF NOT EXISTS wipes_device ON wipes (device_id, result, started_at);
+CREATE INDEX IF NOT EXISTS wipes_serial ON wipes (serial);
+CREATE INDEX IF NOT EXISTS wipes_imei ON wipes (imei);
+CREATE INDEX IF NOT EXISTS wipes_model ON wipes (model, started_at);
+CREATE INDEX IF NOT EXISTS wipes_result ON wipes (result, started_at);
+CREATE INDEX IF NOT EXISTS wipes_started ON wipes (started_at);
+CREATE TABLE IF NOT EXISTS partitions (
+    wipe_id INTEGER NOT NULL REFERENCES wipes (id) ON DELETE CASCADE,
+    model TEXT,
+    partition TEXT NOT NULL,
+    action TEXT NOT NULL,
+    status TEXT,
+    size_bytes INTEGER,
+    duration_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS partitions_wipe ON partitions (wipe_id);
+CREATE INDEX IF NOT EXISTS partitions_model ON partitions (model, partition, action, duration_seconds);
+CREATE TABLE IF NOT EXISTS stages (
+    wipe_id INTEGER NOT NULL REFERENCES wipes (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stages_wipe ON stages (wipe_id);
+
+-- Rollups kept current by triggers, so summary queries do not aggregate every wipe
+CREATE TABLE IF NOT EXISTS devices (
+    device_id TEXT PRIMARY KEY,
+    imei TEXT,
+    serial TEXT,
+    model TEXT,
+    wipes INTEGER NOT NULL,
+    erasures INTEGER NOT NULL,
+    last_erasure REAL
+);
+CREATE INDEX IF NOT EXISTS devices_erasures ON devices (erasures, last_erasure);
+CREATE INDEX IF NOT EXISTS devices_last_erasure ON devices (last_erasure);
+CREATE TRIGGER IF NOT EXISTS wipes_insert AFTER INSERT ON wipes BEGIN
+    INSERT INTO devices VALUES (NEW.device_id, NEW.imei, NEW.serial, NEW.model, 1, NEW.result = 'success',
+                                CASE WHEN NEW.result = 'success' THEN NEW.started_at END)
+    ON CONFLICT (device_id) DO UPDATE SET
+        imei = COALESCE(excluded.imei, imei),
+        serial = COALESCE(excluded.serial, serial),
+        model = excluded.model,
+        wipes = wipes + 1,
+        erasures = erasures + excluded.erasures,
+        last_erasure = MAX(COALESCE(last_erasure, excluded.last_erasure), COALESCE(excluded.last_erasure, last_erasure));
+END;
+CREATE TRIGGER IF NOT EXISTS wipes_delete AFTER DELETE ON wipes BEGIN
+    UPDATE devices SET
+        wipes = wipes - 1,
+        erasures = erasures - (OLD.result = 'success'),
+        last_erasure = (SELECT MAX(started_at) FROM wipes WHERE device_id = OLD.device_id AND result = 'success')
+    WHERE device_id = OLD.device_id;
+    DELETE FROM devices WHERE device_id = OLD.device_id AND wipes <= 0;
+END;
+
+CREATE TABLE IF NOT EXISTS partition_stats (
+    model TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    action TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    total_seconds REAL NOT NULL,
+    max_seconds REAL NOT NULL,
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (model, partition, action)
+);
+CREATE TRIGGER IF NOT EXISTS partitions_insert AFTER INSERT ON partitions
+WHEN NEW.duration_seconds IS NOT NULL BEGIN
+    INSERT INTO partition_stats VALUES (NEW.model, NEW.partition, NEW.action, 1, NEW.duration_seconds,
+                                        NEW.duration_seconds, NEW.status = 'failed')
+    ON CONFLICT (model, partition, action) DO UPDATE SET
+        runs = runs + 1,
+        total_seconds = total_seconds + excluded.total_seconds,
+        max_seconds = MAX(max_seconds, excluded.max_seconds),
+        failures = failures + excluded.failures;
+END;
+CREATE TRIGGER IF NOT EXISTS partitions_delete AFTER DELETE ON partitions
+WHEN OLD.duration_seconds IS NOT NULL BEGIN
+    UPDATE partition_stats SET
+        runs = runs - 1,
+        total_seconds = total_seconds - OLD.duration_seconds,
+        failures = failures - (OLD.status = 'failed'),
+        max_seconds = COALESCE((SELECT MAX(duration_seconds) FROM partitions WHERE model = OLD.model
+                                AND partition = OLD.partition AND action = OLD.action), 0)
+    WHERE model = OLD.model AND partition = OLD.partition AND action = OLD.action;
+    DELETE FROM partition_stats WHERE model = OLD.model AND partition = OLD.partition AND action = OLD.action
+        AND runs <= 0;
+END;
+"""
+
+# Sections a log must hold in this shape, when present, to be indexed
+SECTION_TYPES = {"device_info": dict, "summary": dict, "wipe_results": list, "stage_durations": dict,
+                 "errors": list, "warnings": list}
+# What a column can store
+SCALAR_TYPES = (str, int, float, type(None))
+
+WIPE_COLUMNS = ("sha256", "path", "device_id", "serial", "imei", "manufacturer", "model", "bootloader_version",
+                "android_version", "result", "started_at", "ended_at", "duration_seconds", "errors_count",
+                "warnings_count", "commands_executed", "timed_out_commands")
+
+
+def find_logs(paths):
+    """Every wipe_log*.json under the given files and directories, recursively"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.startswith("wipe_log") and name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+
+def epoch(value):
+    """Seconds since the epoch for an ISO timestamp, or None"""
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+def malformed(log):
+    """Why a parsed log is not a wipe log this store can index, or None"""
+    if not isinstance(log, dict):
+        return "not a JSON object"
+    for field, kind in SECTION_TYPES.items():
+        if log.get(field) is not None and not isinstance(log[field], kind):
+            return f"{field} is not a JSON {'object' if kind is dict else 'array'}"
+    if not isinstance((log.get("summary") or {}).get("stage_durations") or {}, dict):
+        return "summary.stage_durations is not a JSON object"
+    if not all(isinstance(entry, dict) for entry in log.get("wipe_results") or []):
+        return "wipe_results holds an entry that is not a JSON object"
+    return None
+
+
+def malformed_rows(wipe, partitions, stages):
+    """Why extracted rows cannot be stored, or None"""
+    for column, value in wipe.items():
+        if not isinstance(value, SCALAR_TYPES):
+            return f"{column} is not a plain value"
+    for row in partitions:
+        if row[0] is None or row[1] is None or not all(isinstance(value, SCALAR_TYPES) for value in row):
+            return "wipe_results holds an entry without a plain partition and action"
+    for stage, seconds in stages:
+        if not isinstance(seconds, (int, float)):
+            return f"stage {stage} has no duration in seconds"
+    return None
+
+
+def extract(path):
+    """Parse one log into (path, sha256, wipe row, partition rows, stage rows); runs in a worker.
+    
+    A file that cannot be read or is not shaped like a wipe log comes back as
+    (path, None, reason, None, None)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        log = json.loads(data)
+    except (OSError, ValueError) as e:
+        return path, None, str(e), None, None
+    problem = malformed(log)
+    if problem:
+        return path, None, problem, None, None
+    info = log.get("device_info") or {}
+    summary = log.get("summary") or {}
+    imei = info.get("imei") if isinstance(info.get("imei"), str) and valid_imei(info.get("imei")) else None
+    serial = info.get("serial") if info.get("serial") not in (None, "unknown") else info.get("device_id")
+    # Devices are counted by IMEI like the server does, falling back to the serial
+    device_id = imei or serial or "unknown"
+    started = epoch(summary.get("start_time") or log.get("timestamp"))
+    ended = epoch(summary.get("end_time"))
+    wipe = {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "path": os.path.abspath(path),
+        "device_id": device_id,
+        "serial": serial,
+        "imei": imei,
+        "manufacturer": info.get("manufacturer"),
+        "model": info.get("model") or "unknown",
+        "bootloader_version": info.get("bootloader_version"),
+        "android_version": info.get("android_version"),
+        "result": log.get("result"),
+        "started_at": started,
+        "ended_at": ended,
+        "duration_seconds": summary.get("duration_seconds"),
+        "errors_count": len(log.get("errors") or []),
+        "warnings_count": len(log.get("warnings") or []),
+        "commands_executed": summary.get("commands_executed"),
+        "timed_out_commands": summary.get("timed_out_commands"),
+    }
+    partitions = [(entry.get("partition"), entry.get("action"), entry.get("status"), entry.get("size_bytes"),
+                   entry.get("duration_seconds"))
+                  for entry in log.get("wipe_results") or [] if entry.get("action") != "skip"]
+    stages = list((log.get("stage_durations") or summary.get("stage_durations") or {}).items())
+    problem = malformed_rows(wipe, partitions, stages)
+    if problem:
+        return path, None, problem, None, None
+    return path, wipe["sha256"], wipe, partitions, stages
+
+
+class WipeLogStore:
+    """SQLite index over wipe logs"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def changed_files(self, paths):
+        """(path, mtime_ns, size) for files that are new or whose mtime or size changed"""
+        known = {path: (mtime, size) for path, mtime, size in self.db.execute("SELECT path, mtime_ns, size FROM files")}
+        changed = []
+        unchanged = 0
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            path = os.path.abspath(path)
+            if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+                unchanged += 1
+            else:
+                changed.append((path, stat.st_mtime_ns, stat.st_size))
+        return changed, unchanged
+
+    def ingest(self, paths, jobs=None):
+        """Load new and changed logs and drop deleted ones; returns counts of ingested, unchanged,
+        duplicate, invalid and pruned files"""
+        start = time.monotonic()
+        changed, unchanged = self.changed_files(find_logs(paths))
+        known_hashes = dict(self.db.execute("SELECT path, sha256 FROM files"))
+        counts = {"ingested": 0, "unchanged": unchanged, "duplicate": 0, "invalid": 0, "pruned": 0}
+        jobs = jobs or os.cpu_count() or 1
+        pending = 0
+
+        executor = ProcessPoolExecutor(jobs) if jobs > 1 and len(changed) > CHUNK_SIZE else None
+        try:
+            parsed = (executor.map(extract, [path for path, _, _ in changed], chunksize=CHUNK_SIZE)
+                      if executor else map(extract, [path for path, _, _ in changed]))
+            stat_by_path = {path: (mtime, size) for path, mtime, size in changed}
+            self.db.execute("BEGIN")
+            counts["pruned"] = self.prune()
+            for path, sha256, wipe, partitions, stages in parsed:
+                if sha256 is None:
+                    counts["invalid"] += 1
+                    if path in known_hashes:
+                        # Was a wipe log, is not any more: it no longer counts
+                        self.forget(path, known_hashes[path])
+                    continue
+                mtime, size = stat_by_path[path]
+                old_sha256 = known_hashes.get(path)
+                if old_sha256 == sha256:
+                    # Touched but not changed: remember the new mtime and move on
+                    counts["unchanged"] += 1
+                else:
+                    if old_sha256:
+                        self.release(path, old_sha256)
+                    if self.db.execute("SELECT 1 FROM wipes WHERE sha256 = ?", (sha256,)).fetchone():
+                        # The same log copied somewhere else is one wipe, not two
+                        counts["duplicate"] += 1
+                    else:
+                        self.insert_wipe(wipe, partitions, stages)
+                        counts["ingested"] += 1
+                self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, mtime, size, sha256))
+                pending += 1
+                if pending >= COMMIT_EVERY:
+                    self.db.execute("COMMIT")
+                    self.db.execute("BEGIN")
+                    pending = 0
+            self.db.execute("COMMIT")
+        finally:
+            if executor:
+                executor.shutdown()
+        counts["seconds"] = round(time.monotonic() - start, 3)
+        return counts
+
+    def release(self, path, old_sha256):
+        """Drop the wipe a file no longer holds, unless another file still has that content"""
+        other = self.db.execute("SELECT path FROM files WHERE sha256 = ? AND path != ?", (old_sha256, path)).fetchone()
+        if other:
+            self.db.execute("UPDATE wipes SET path = ? WHERE sha256 = ? AND path = ?", (other[0], old_sha256, path))
+        else:
+            self.db.execute("DELETE FROM wipes WHERE sha256 = ?", (old_sha256,))
+
+    def forget(self, path, sha256):
+        self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.release(path, sha256)
+
+    def prune(self):
+        """Forget files that no longer exist, and the wipes only they held; returns how many went"""
+        gone = [(path, sha256) for path, sha256 in self.db.execute("SELECT path, sha256 FROM files")
+                if not os.path.exists(path)]
+        for path, sha256 in gone:
+            self.forget(path, sha256)
+        return len(gone)
+
+    def insert_wipe(self, wipe, partitions, stages):
+        cursor = self.db.execute(f"INSERT INTO wipes ({', '.join(WIPE_COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * len(WIPE_COLUMNS))})",
+                                 [wipe[column] for column in WIPE_COLUMNS])
+        wipe_id = cursor.lastrowid
+        self.db.executemany("INSERT INTO partitions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [(wipe_id, wipe["model"], *row) for row in partitions])
+        self.db.executemany("INSERT INTO stages VALUES (?, ?, ?)", [(wipe_id, *row) for row in stages])
+
+    def query(self, sql, params=()):
+        cursor = self.db.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def summary(self, days=30, top=10):
+        """The aggregates of GET /api/devices/stats/summary; an erasure is a successful wipe"""
+        since = time.time() - days * 86400
+        total_devices, total_erasures = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(erasures), 0) FROM devices").fetchone()
+        recently_erased = self.db.execute("SELECT COUNT(*) FROM devices WHERE last_erasure >= ?",
+                                          (since,)).fetchone()[0]
+        top_devices = self.query(
+            "SELECT device_id, imei, serial, model AS deviceModel, erasures AS erasureCount, "
+            "last_erasure AS lastErasure FROM devices WHERE erasures > 0 "
+            "ORDER BY erasures DESC, last_erasure DESC LIMIT ?", (top,))
+        for device in top_devices:
+            device["lastErasure"] = iso(device["lastErasure"])
+        return {
+            "totalDevices": total_devices,
+            "totalErasures": total_erasures,
+            "recentlyErased": recently_erased,
+            "topDevices": top_devices,
+        }
+
+    def failure_rates(self, days=None):
+        """Wipes, failures and failure rate per model, worst first"""
+        since = time.time() - days * 86400 if days else 0
+        rows = self.query(
+            "SELECT model, COUNT(*) AS wipes, SUM(result != 'success') AS failures, "
+            "ROUND(AVG(result != 'success'), 4) AS failure_rate, ROUND(AVG(duration_seconds), 1) AS mean_seconds "
+            "FROM wipes WHERE started_at >= ? AND result IN ('success', 'failed', 'error') "
+            "GROUP BY model ORDER BY failure_rate DESC, wipes DESC", (since,))
+        return rows
+
+    def slowest_partitions(self, model=None, limit=20):
+        """Mean and max duration per model, partition and action, slowest first"""
+        return self.query(
+            "SELECT model, partition, action, runs, ROUND(total_seconds / runs, 3) AS mean_seconds, "
+            "ROUND(max_seconds, 3) AS max_seconds, failures FROM partition_stats "
+            "WHERE ? IS NULL OR model = ? ORDER BY total_seconds / runs DESC LIMIT ?",
+            (model, model, limit))
+
+    def device_history(self, device):
+        """Every wipe of an IMEI or serial, newest first"""
+        rows = self.query(
+            "SELECT serial, imei, model, result, started_at, duration_seconds, errors_count, path FROM wipes "
+            "WHERE device_id = ? OR serial = ? OR imei = ? ORDER BY started_at DESC", (device, device, device))
+        for row in rows:
+            row["started_at"] = iso(row["started_at"])
+        return rows
+
+    def close(self):
+        self.db.close()
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def print_table(rows):
+    if not rows:
+        print("(no rows)")
+        return
+    columns = list(rows[0])
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexed store and fleet queries for andnr.py wipe logs")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Load new and changed wipe logs")
+    ingest.add_argument("paths", nargs="+", help="wipe_log*.json files or directories holding them")
+    ingest.add_argument("--jobs", type=int, help="Parser processes (default: one per CPU)")
+
+    summary = commands.add_parser("summary", help="Device and erasure totals, like /api/devices/stats/summary")
+    summary.add_argument("--days", type=int, default=30, help="Window for recentlyErased (default: 30)")
+    summary.add_argument("--top", type=int, default=10, help="Devices listed in topDevices (default: 10)")
+
+    failures = commands.add_parser("failures", help="Failure rate per model")
+    failures.add_argument("--days", type=int, help="Only wipes started in the last DAYS days")
+
+    partitions = commands.add_parser("partitions", help="Slowest partitions by model")
+    partitions.add_argument("--model", help="Only this model")
+    partitions.add_argument("--limit", type=int, default=20, help="Rows to show (default: 20)")
+
+    device = commands.add_parser("device", help="Every wipe of one device")
+    device.add_argument("device", help="IMEI or serial")
+
+    args = parser.parse_args()
+
+    store = WipeLogStore(args.db)
+    start = time.monotonic()
+    if args.command == "ingest":
+        result = store.ingest(args.paths, args.jobs)
+        if not args.json:
+            print(f"Ingested {result['ingested']} logs in {result['seconds']}s ({result['unchanged']} unchanged, "
+                  f"{result['duplicate']} duplicates, {result['invalid']} invalid, {result['pruned']} removed) "
+                  f"into {args.db}")
+    elif args.command == "summary":
+        result = store.summary(args.days, args.top)
+    elif args.command == "failures":
+        result = store.failure_rates(args.days)
+    elif args.command == "partitions":
+        result = store.slowest_partitions(args.model, args.limit)
+    else:
+        result = store.device_history(args.device)
+    elapsed = time.monotonic() - start
+    store.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.command == "summary":
+        print(f"Devices: {result['totalDevices']}  Erasures: {result['totalErasures']}  "
+              f"Erased in the last {args.days} days: {result['recentlyErased']}")
+        print_table(result["topDevices"])
+    elif args.command != "ingest":
+        print_table(result)
+    if args.command != "ingest" and not args.json:
+        print(f"({elapsed * 1000:.0f} ms)", file=sys.stderr)